@@ -0,0 +1,52 @@
+from sectorizedradialprofile.binning import make_bin_edges
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.geometry import SectorGeometry, GeometryCache
+
+from .fixtures import make_frame
+
+
+class Frame2k(object):
+    '''single 2048x2048 frame, full circle and quarter sector'''
+    params = [None, (0, 90)]
+    param_names = ['angle_range']
+    timeout = 300
+
+    def setup(self, angle_range):
+        self.data = make_frame(2048)
+        self.center = (1000, 1030)
+        self.bin_edges = make_bin_edges(1500, bin_width=1)
+        self.geometry = SectorGeometry(self.data.shape, center=self.center, angle_range=angle_range,
+                                       bin_edges=self.bin_edges)
+
+    def _calculate(self, angle_range, **kwargs):
+        o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache())
+        o_calculate.add_params(center=self.center, angle_range=angle_range)
+        o_calculate.calculate(**kwargs)
+        return o_calculate
+
+    def time_compile_geometry(self, angle_range):
+        SectorGeometry(self.data.shape, center=self.center, angle_range=angle_range, bin_edges=self.bin_edges)
+
+    def time_gather(self, angle_range):
+        self.geometry.gather(self.data)
+
+    def time_accumulate(self, angle_range):
+        self.geometry.accumulate(self.data)
+
+    def time_calculate_exact(self, angle_range):
+        self._calculate(angle_range)
+
+    def time_calculate_binned(self, angle_range):
+        self._calculate(angle_range, bin_width=1, engine='numpy')
+
+    def time_calculate_threads(self, angle_range):
+        self._calculate(angle_range, bin_width=1, n_workers=4)
+
+    def peakmem_calculate_exact(self, angle_range):
+        self._calculate(angle_range)
+
+    def peakmem_calculate_binned(self, angle_range):
+        self._calculate(angle_range, bin_width=1, engine='numpy')
+
+    def peakmem_calculate_threads(self, angle_range):
+        self._calculate(angle_range, bin_width=1, n_workers=4)
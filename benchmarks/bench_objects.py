@@ -0,0 +1,20 @@
+from sectorizedradialprofile.batch import calculate_objects_profiles
+
+from .fixtures import make_volume, make_label_analysis
+
+
+class AmiraObjects(object):
+    '''128 Amira-Avizo like objects of a 256^3 volume'''
+    params = [1, 4]
+    param_names = ['n_workers']
+    timeout = 600
+
+    def setup(self, n_workers):
+        self.data = make_volume(256)
+        self.df_amira = make_label_analysis(128, size=256)
+
+    def time_objects_profiles(self, n_workers):
+        calculate_objects_profiles(self.data, self.df_amira, bin_width=1, n_workers=n_workers)
+
+    def peakmem_objects_profiles(self, n_workers):
+        calculate_objects_profiles(self.data, self.df_amira, bin_width=1, n_workers=n_workers)
@@ -0,0 +1,36 @@
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.geometry import GeometryCache
+from sectorizedradialprofile.polar import PolarTransform
+
+from .fixtures import make_frame
+
+SECTOR_EDGES = list(range(0, 361, 10))
+
+
+class SectorSweep36(object):
+    '''36 sectors of 10 degrees of a 2048x2048 frame'''
+    timeout = 600
+
+    def setup(self):
+        self.data = make_frame(2048)
+        self.center = (1000, 1030)
+        self.polar_transform = PolarTransform(self.data.shape, center=self.center, bin_width=1, angle_step=10,
+                                              geometry_cache=GeometryCache())
+
+    def time_sector_loop(self):
+        '''one calculation per sector, as done before the single pass sectors'''
+        for _from, _to in zip(SECTOR_EDGES[:-1], SECTOR_EDGES[1:]):
+            o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache())
+            o_calculate.add_params(center=self.center, angle_range=(_from, _to))
+            o_calculate.calculate(bin_width=1, engine='numpy')
+
+    def time_calculate_sectors(self):
+        o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache())
+        o_calculate.calculate_sectors(center=self.center, sector_edges=SECTOR_EDGES, bin_width=1)
+
+    def time_polar_transform(self):
+        self.polar_transform.transform(self.data)
+
+    def peakmem_calculate_sectors(self):
+        o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache())
+        o_calculate.calculate_sectors(center=self.center, sector_edges=SECTOR_EDGES, bin_width=1)
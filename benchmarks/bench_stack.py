@@ -0,0 +1,30 @@
+import numpy as np
+
+from sectorizedradialprofile.geometry import GeometryCache
+from sectorizedradialprofile.stack_profile import CalculateStackRadialProfile
+
+from .fixtures import make_stack
+
+
+class Stack1000(object):
+    '''1000 frames of 512x512 pixels, e.g. a time of flight run'''
+    params = [np.float64, np.float32]
+    param_names = ['dtype']
+    timeout = 900
+
+    def setup(self, dtype):
+        self.data = make_stack(1000, size=512)
+        self.center = (250, 260)
+
+    def _calculate(self, dtype):
+        o_calculate = CalculateStackRadialProfile(data=self.data, dtype=dtype, geometry_cache=GeometryCache())
+        o_calculate.add_params(center=self.center, radius=200)
+        o_calculate.add_params(center=self.center, angle_range=(0, 90))
+        o_calculate.calculate(bin_width=1)
+        return o_calculate
+
+    def time_calculate(self, dtype):
+        self._calculate(dtype)
+
+    def peakmem_calculate(self, dtype):
+        self._calculate(dtype)
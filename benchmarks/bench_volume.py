@@ -0,0 +1,40 @@
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.geometry import GeometryCache
+
+from .fixtures import make_volume
+
+
+class Volume512(object):
+    '''512^3 16 bits volume, in memory and by slabs of 64 MiB'''
+    timeout = 900
+
+    def setup(self):
+        self.data = make_volume(512)
+        self.center = (250, 260, 256)
+
+    def _calculate(self, **kwargs):
+        o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache())
+        o_calculate.add_params(center=self.center, radius=200)
+        o_calculate.calculate(**kwargs)
+        return o_calculate
+
+    def time_calculate_exact(self):
+        self._calculate()
+
+    def time_calculate_binned(self):
+        self._calculate(bin_width=1, engine='numpy')
+
+    def time_calculate_slabs(self):
+        self._calculate(bin_width=1, memory_budget=2 ** 26)
+
+    def time_calculate_threads(self):
+        self._calculate(bin_width=1, n_workers=4)
+
+    def peakmem_calculate_exact(self):
+        self._calculate()
+
+    def peakmem_calculate_binned(self):
+        self._calculate(bin_width=1, engine='numpy')
+
+    def peakmem_calculate_slabs(self):
+        self._calculate(bin_width=1, memory_budget=2 ** 26)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+def make_frame(size=2048, dtype=np.float32, seed=0):
+    """
+    Synthetic detector frame: rings around the center with noise and a few dead (NaN) pixels
+
+    :param size: number of rows and columns
+    :type size: int
+    :param dtype: dtype of the frame
+    :type dtype: np.dtype
+    :return: frame
+    :rtype: np.array
+    """
+    rng = np.random.RandomState(seed)
+    _y, _x = np.ogrid[:size, :size]
+    _radius = np.hypot(_x - size / 2, _y - size / 2)
+    frame = (1000 + 500 * np.cos(_radius / 20) + rng.normal(0, 10, (size, size))).astype(dtype)
+    if frame.dtype.kind == 'f':
+        frame.flat[rng.randint(0, frame.size, size)] = np.nan
+    return frame
+
+
+def make_volume(size=512, dtype=np.uint16, seed=0):
+    """
+    Synthetic tomography volume with 16 bits noise
+
+    :param size: number of planes, rows and columns
+    :type size: int
+    :param dtype: dtype of the volume
+    :type dtype: np.dtype
+    :return: volume
+    :rtype: np.array
+    """
+    rng = np.random.RandomState(seed)
+    volume = np.empty((size, size, size), dtype=dtype)
+    for _plane in range(size):
+        volume[_plane] = rng.randint(0, 2 ** 12, (size, size))
+    return volume
+
+
+def make_stack(n_frames=1000, size=512, dtype=np.uint16, seed=0):
+    """
+    Synthetic stack of frames, e.g. the time of flight frames of a run
+
+    :param n_frames: number of frames
+    :type n_frames: int
+    :param size: number of rows and columns of each frame
+    :type size: int
+    :param dtype: dtype of the stack
+    :type dtype: np.dtype
+    :return: stack of shape (n_frames, size, size)
+    :rtype: np.array
+    """
+    rng = np.random.RandomState(seed)
+    stack = np.empty((n_frames, size, size), dtype=dtype)
+    for _frame in range(n_frames):
+        stack[_frame] = rng.randint(0, 2 ** 12, (size, size))
+    return stack
+
+
+def make_label_analysis(n_objects=128, size=256, seed=0):
+    """
+    Synthetic Amira-Avizo label analysis of spherical objects within a volume
+
+    :param n_objects: number of objects
+    :type n_objects: int
+    :param size: size of the volume along each axis
+    :type size: int
+    :return: label analysis with 'index', 'BaryCenterX', 'BaryCenterY', 'BaryCenterZ' and 'EqDiameter' columns
+    :rtype: pd.DataFrame
+    """
+    rng = np.random.RandomState(seed)
+    _radius = rng.uniform(4, 16, n_objects)
+    _center = rng.uniform(16, size - 16, (n_objects, 3)).round()
+    return pd.DataFrame({'index': np.arange(1, n_objects + 1),
+                         'BaryCenterX': _center[:, 0],
+                         'BaryCenterY': _center[:, 1],
+                         'BaryCenterZ': _center[:, 2],
+                         'EqDiameter': 2 * _radius})
@@ -5,21 +5,17 @@ import pickle
 import shutil
 from PIL import Image
 
+from sectorizedradialprofile.loader import load_frame, load_stack
+from sectorizedradialprofile.export import write_csv_rows
+
 
 def load_data(file_name):
     '''
     load the various file_name format
     '''
     data_type = get_data_type(file_name)
-    if data_type == '.fits':
-        hdulist = pyfits.open(file_name)
-        hdu = hdulist[0]
-        _image = np.asarray(hdu.data)
-        hdulist.close()
-        return _image
-    elif data_type == '.tiff':
-        _image = Image.open(file_name)
-        return np.array(_image)
+    if data_type in ['.fits', '.tiff']:
+        return load_frame(file_name)
     else:
         raise NotImplementedError
     
@@ -59,19 +55,10 @@ def read_single_fits(file):
     return _image
     
 def read_fits(list_files):
-    '''takes a list of files, load them using pyfits and return a list of 
-    arrays of data
+    '''takes a list of files, load them concurrently into a single stack and
+    return a list of the frames of the stack
     '''
-    data = []
-    for _file in list_files:
-
-        hdu_list = pyfits.open(_file)  # fits
-        hdu = hdu_list[0]
-        _image = hdu.data
-        _image = np.asarray(_image)
-        data.append(_image)
-        hdu_list.close()
-    return data    
+    return list(load_stack(list_files))
 
 def make_fits(data=[], filename=''):
     hdu = pyfits.PrimaryHDU(data)
@@ -121,12 +108,8 @@ def make_ascii_file(metadata=[], data=[], output_file_name=''):
     for _meta in metadata:
         _line = _meta + "\n"
         f.write(_line)
-        
-    for _data in data:
-        _str_data = [str(_value) for _value in _data]
-        _line = ",".join(_str_data) + "\n"
-        f.write(_line)
-       
+
+    write_csv_rows(f, data)
     f.close()
     
 def make_ascii_file_3d_array(metadata=[], first_column=[], data=[], output_file_name=''):
@@ -135,11 +118,6 @@ def make_ascii_file_3d_array(metadata=[], first_column=[], data=[], output_file_
     for _meta in metadata:
         _line = _meta + "\n"
         f.write(_line)
-        
-    for _index, _data in enumerate(data):
-        _str_data = [str(_value) for _value in _data]
-        _line = "{}".format(str(first_column[_index]) + "," + ",".join(_str_data) + "\n")
-        f.write(_line)
-       
+
+    write_csv_rows(f, np.column_stack((first_column, data)))
     f.close()
-   
\ No newline at end of file
@@ -5,3 +5,4 @@
 pytest-cov == 2.4.0
 pytest == 3.0.7
 Pillow == 4.0.0
+asv
@@ -0,0 +1,118 @@
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile, label_analysis_to_dict
+
+# data shared with the worker processes, attached once per worker by '_init_worker'
+_worker_data = None
+_worker_shared_memory = None
+
+
+def calculate_objects_profiles(data: np.ndarray, objects, bin_width=None, n_bins=None, n_workers=None):
+    """
+    Radial profile of each object of a volume (e.g. the particles of an Amira-Avizo label analysis),
+    computed in parallel by a pool of processes. The volume is placed once in shared memory (or
+    re-opened by each worker when it is a whole 'np.memmap') instead of being sent to every worker.
+
+    :param data: numpy 2D or 3D array
+    :type data: np.array
+    :param objects: '{name: [center, radius]}' as returned by 'load_label_analysis_amira', or the Amira-Avizo
+        label analysis DataFrame
+    :type objects: dict or pd.DataFrame
+    :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+    :type bin_width: int or float
+    :param n_bins: Optional. Number of radial bins up to the radius of each object.
+    :type n_bins: int
+    :param n_workers: Optional. Number of worker processes, default is the number of CPUs. 1 runs in this process.
+    :type n_workers: int
+    :return: radial profile of each object, by name
+    :rtype: dict
+    """
+    if isinstance(objects, pd.DataFrame):
+        objects = label_analysis_to_dict(objects)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    _task_list = [(_name, tuple(_center), _radius, bin_width, n_bins)
+                  for _name, (_center, _radius) in objects.items()]
+    if n_workers == 1 or len(_task_list) <= 1:
+        _init_worker(data=data)
+        try:
+            return dict(_calculate_object_profile(*_task) for _task in _task_list)
+        finally:
+            _release_worker()
+
+    _shared_memory = None
+    _memmap_args = get_memmap_args(data)
+    if _memmap_args is not None:
+        _initargs = (None, data.shape, data.dtype, _memmap_args)
+    else:
+        _shared_memory = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        np.ndarray(data.shape, dtype=data.dtype, buffer=_shared_memory.buf)[:] = data
+        _initargs = (_shared_memory.name, data.shape, data.dtype, None)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=get_process_context(), initializer=_init_worker,
+                                 initargs=_initargs) as _executor:
+            _futures = [_executor.submit(_calculate_object_profile, *_task) for _task in _task_list]
+            return dict(_future.result() for _future in _futures)
+    finally:
+        if _shared_memory is not None:
+            _shared_memory.close()
+            _shared_memory.unlink()
+
+
+def get_memmap_args(data):
+    """
+    Arguments re-opening a memory mapped array in another process. Only an array mapping its whole 'np.memmap'
+    can be re-opened, a slice of it keeps the file name and offset of the array it comes from.
+
+    :param data: numpy array
+    :type data: np.array
+    :return: '(file name, offset, Fortran order)', or 'None' when the array has to be shared otherwise
+    :rtype: tuple
+    """
+    if not isinstance(data, np.memmap) or data.filename is None or not isinstance(data.base, mmap.mmap):
+        return None
+    if not (data.flags.c_contiguous or data.flags.f_contiguous):
+        return None
+    return data.filename, data.offset, not data.flags.c_contiguous
+
+
+def get_process_context():
+    '''start method of the worker processes, a forked process can hang on the locks of the numba threads'''
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _init_worker(shared_memory_name=None, shape=None, dtype=None, memmap_args=None, data=None):
+    '''attach the data shared by the parent process'''
+    global _worker_data, _worker_shared_memory
+    if data is not None:
+        _worker_data = data
+    elif memmap_args is not None:
+        _file_name, _offset, _f_contiguous = memmap_args
+        _worker_data = np.memmap(_file_name, dtype=dtype, mode='r', shape=shape, offset=_offset,
+                                 order='F' if _f_contiguous else 'C')
+    else:
+        _worker_shared_memory = shared_memory.SharedMemory(name=shared_memory_name)
+        _worker_data = np.ndarray(shape, dtype=dtype, buffer=_worker_shared_memory.buf)
+
+
+def _release_worker():
+    global _worker_data, _worker_shared_memory
+    _worker_data = None
+    if _worker_shared_memory is not None:
+        _worker_shared_memory.close()
+        _worker_shared_memory = None
+
+
+def _calculate_object_profile(name, center, radius, bin_width, n_bins):
+    o_calculate = CalculateRadialProfile(data=_worker_data)
+    o_calculate.add_params(center=center, radius=radius)
+    o_calculate.calculate(bin_width=bin_width, n_bins=n_bins)
+    return name, o_calculate.radial_profile
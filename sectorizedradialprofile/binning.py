@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+
+
+class BinAccumulator(object):
+
+    def __init__(self, n_bins: int, n_frames=None):
+        """
+        Streaming per bin statistics (count, mean and sum of squared deviations M2), which can be
+        merged in any order (Chan et al.), so that only O(n_bins) memory is kept whatever the number
+        of values, parameter sets, chunks or workers
+
+        :param n_bins: number of radial bins
+        :type n_bins: int
+        :param n_frames: Optional. Number of frames of a stack, each frame then has its own bins.
+        :type n_frames: int
+        """
+        self.n_bins = n_bins
+        self.n_frames = n_frames
+        _shape = n_bins if n_frames is None else (n_frames, n_bins)
+        self.count = np.zeros(_shape, dtype=np.int64)
+        self.mean = np.zeros(_shape, dtype=np.float64)
+        self.m2 = np.zeros(_shape, dtype=np.float64)
+
+    @property
+    def sum(self):
+        return self.count * self.mean
+
+    def add(self, bin_index, values):
+        """
+        Accumulates the values into their bins in a single pass over the values for the count and
+        sum, and a second one for the deviations to the bin means
+
+        :param bin_index: bin index of each value
+        :type bin_index: np.array
+        :param values: values to accumulate
+        :type values: np.array
+        """
+        values = np.asarray(values, dtype=np.float64)
+        _count = np.bincount(bin_index, minlength=self.n_bins)
+        _sum = np.bincount(bin_index, weights=values, minlength=self.n_bins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            _mean = np.where(_count > 0, _sum / _count, 0)
+        _deviation = values - _mean[bin_index]
+        _m2 = np.bincount(bin_index, weights=_deviation * _deviation, minlength=self.n_bins)
+        self.combine(_count, _mean, _m2)
+
+    def combine(self, count, mean, m2, index=Ellipsis):
+        """
+        Merges the statistics of another set of values into the bins
+
+        :param count: number of values of each bin
+        :type count: np.array
+        :param mean: mean of each bin
+        :type mean: np.array
+        :param m2: sum of the squared deviations to the mean of each bin
+        :type m2: np.array
+        :param index: Optional. Bins (or frames) the statistics are merged into, default is all of them.
+            An index array must not repeat a bin.
+        :type index: slice or np.array
+        """
+        _count_a = self.count[index]
+        _count = _count_a + count
+        _delta = mean - self.mean[index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            _weight = np.where(_count > 0, count / _count, 0)
+        self.mean[index] = self.mean[index] + _delta * _weight
+        self.m2[index] = self.m2[index] + m2 + _delta * _delta * _count_a * _weight
+        self.count[index] = _count
+
+    def merge(self, other, bin_map=None):
+        """
+        Merges another accumulator into this one
+
+        :param other: accumulator to merge
+        :type other: BinAccumulator
+        :param bin_map: Optional. Bin of this accumulator each bin of the other one goes to, default is the same bin.
+        :type bin_map: np.array
+        :return: this accumulator
+        :rtype: BinAccumulator
+        """
+        self.combine(other.count, other.mean, other.m2, index=Ellipsis if bin_map is None else bin_map)
+        return self
+
+    def collapse(self, index=Ellipsis):
+        """
+        Merges rows (frames or sectors) of a 2D accumulator into a 1D accumulator
+
+        :param index: Optional. Rows to merge, default is all of them.
+        :type index: slice or np.array
+        :return: accumulator of the merged rows
+        :rtype: BinAccumulator
+        """
+        _count = self.count[index]
+        _mean = self.mean[index]
+        accumulator = BinAccumulator(self.n_bins)
+        accumulator.count = _count.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            accumulator.mean = np.where(accumulator.count > 0, (_count * _mean).sum(axis=0) / accumulator.count, 0)
+        _delta = _mean - accumulator.mean
+        accumulator.m2 = self.m2[index].sum(axis=0) + (_count * _delta * _delta).sum(axis=0)
+        return accumulator
+
+    def split(self, n_rows):
+        """
+        Splits the combined bins 'row * n_bins + bin' of a 1D accumulator (e.g. of sectors or objects)
+        into one accumulator per row, sharing the memory of this one
+
+        :param n_rows: number of rows
+        :type n_rows: int
+        :return: accumulator of each row
+        :rtype: list
+        """
+        _n_bins = self.n_bins // n_rows
+        accumulator_list = []
+        for _row in range(n_rows):
+            _row_bins = slice(_row * _n_bins, (_row + 1) * _n_bins)
+            accumulator = BinAccumulator(0)
+            accumulator.n_bins = _n_bins
+            accumulator.count = self.count[_row_bins]
+            accumulator.mean = self.mean[_row_bins]
+            accumulator.m2 = self.m2[_row_bins]
+            accumulator_list.append(accumulator)
+        return accumulator_list
+
+    def statistics(self):
+        """
+        Derives mean, std (ddof=1) and sem of each bin, empty bins are NaN
+
+        :return: mean, std and sem arrays
+        :rtype: tuple
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(self.count > 0, self.mean, np.nan)
+            std = np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+            sem = std / np.sqrt(self.count)
+        return mean, std, sem
+
+    def to_dataframe(self, radius):
+        """
+        Shapes the accumulated statistics like the 'groupby' radial profile, dropping empty bins
+
+        :param radius: radius value of each bin (i.e. the bin centers)
+        :type radius: np.array
+        :return: profile indexed by radius with 'mean', 'std' and 'sem' columns
+        :rtype: pd.DataFrame
+        """
+        mean, std, sem = self.statistics()
+        _occupied = self.count > 0
+        df = pd.DataFrame({'mean': mean[_occupied],
+                           'std': std[_occupied],
+                           'sem': sem[_occupied]},
+                          index=pd.Index(np.asarray(radius)[_occupied], name='radius'))
+        return df
+
+
+def make_bin_edges(r_max, bin_width=None, n_bins=None):
+    """
+
+    :param r_max: largest radius to be covered by the bins
+    :type r_max: float
+    :param bin_width: width of each radial bin. Exclusive with 'n_bins'
+    :type bin_width: float
+    :param n_bins: number of radial bins between 0 and 'r_max'. Exclusive with 'bin_width'
+    :type n_bins: int
+    :return: bin edges starting at 0
+    :rtype: np.array
+    """
+    _validate_binning(bin_width=bin_width, n_bins=n_bins)
+    if bin_width is None:
+        bin_width = r_max / n_bins if r_max > 0 else 1.0
+    else:
+        n_bins = max(int(np.ceil(r_max / bin_width)), 1)
+    return np.arange(n_bins + 1) * bin_width
+
+
+def radius_to_bin_index(radius_array, bin_edges):
+    """
+    Assigns each radius to its bin, the last bin includes its right edge (as np.histogram)
+
+    :param radius_array: radius of each pixel
+    :type radius_array: np.array
+    :param bin_edges: bin edges starting at 0 with constant width
+    :type bin_edges: np.array
+    :return: bin index of each pixel
+    :rtype: np.array
+    """
+    _bin_width = bin_edges[1] - bin_edges[0]
+    _n_bins = len(bin_edges) - 1
+    bin_index = (np.asarray(radius_array) / _bin_width).astype(np.intp)
+    np.minimum(bin_index, _n_bins - 1, out=bin_index)
+    return bin_index
+
+
+def bin_centers(bin_edges):
+    return (bin_edges[:-1] + bin_edges[1:]) / 2
+
+
+def _validate_binning(bin_width, n_bins):
+    if bin_width is not None and n_bins is not None:
+        raise ValueError("'bin_width' and 'n_bins' can not be used together.")
+    if bin_width is None and n_bins is None:
+        raise ValueError("Either 'bin_width' or 'n_bins' has to be provided.")
+    if bin_width is not None:
+        if bin_width <= 0:
+            raise ValueError("'bin_width' has to be greater than zero.")
+    if n_bins is not None:
+        if int(n_bins) != n_bins or n_bins <= 0:
+            raise ValueError("'n_bins' has to be a positive integer.")
+
+
+def accumulate_sorted(sorted_radius, values):
+    """
+    Accumulates the values in one bin per distinct radius. The radii being sorted, each bin is a
+    contiguous run of values and neither sorting nor hashing is needed
+
+    :param sorted_radius: sorted radius of each value
+    :type sorted_radius: np.array
+    :param values: values to accumulate
+    :type values: np.array
+    :return: radius of the bins and accumulator
+    :rtype: tuple
+    """
+    _new_bin = np.ones(len(sorted_radius), dtype=bool)
+    np.not_equal(sorted_radius[1:], sorted_radius[:-1], out=_new_bin[1:])
+    bin_index = np.cumsum(_new_bin) - 1
+    radius = sorted_radius[_new_bin]
+    accumulator = BinAccumulator(len(radius))
+    accumulator.add(bin_index, values)
+    return radius, accumulator
+
+
+def merge_accumulators(radius_list, accumulator_list):
+    """
+    Merges partial accumulators (e.g. of parameter sets or slabs) whose bins may differ, on the union of their bins
+
+    :param radius_list: radius of the bins of each accumulator
+    :type radius_list: list
+    :param accumulator_list: accumulators to merge
+    :type accumulator_list: list
+    :return: radius of the merged bins and merged accumulator
+    :rtype: tuple
+    """
+    radius = np.unique(np.concatenate(radius_list)) if len(radius_list) else np.array([])
+    accumulator = BinAccumulator(len(radius))
+    for _radius, _accumulator in zip(radius_list, accumulator_list):
+        accumulator.merge(_accumulator, bin_map=np.searchsorted(radius, _radius))
+    return radius, accumulator
@@ -1,20 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import numpy as np
 import pandas as pd
 
+from sectorizedradialprofile.binning import BinAccumulator, make_bin_edges, bin_centers, accumulate_sorted, \
+    merge_accumulators
+from sectorizedradialprofile.geometry import SectorGeometry, default_geometry_cache, get_bounding_window, \
+    get_window_offsets, calculate_radius, calculate_angle_deg, get_angle_range_indices, is_half_integer_center, \
+    calculate_integer_squared_radius, get_max_squared_radius, get_detector_mask
+from sectorizedradialprofile.slab import get_slab_windows, get_block_windows
+from sectorizedradialprofile.chunked import get_chunks, calculate_chunked, dask
+from sectorizedradialprofile.fused import fused_accumulate, NUMBA_AVAILABLE
+
+ENGINES = ['numpy', 'numba']
+# intermediate arrays of the last parameter set and the step computing them, when they were skipped
+LAZY_INTERMEDIATES = {'radius_array': 'calculate_pixels_radius',
+                      'array_angle_deg': 'calculate_pixels_angle_position',
+                      'intermediate_array_angle_deg': 'calculate_pixels_angle_position',
+                      'inside_indices': 'turn_off_data_outside',
+                      'sorted_radius_indices': 'sort_indices_of_radius',
+                      'sorted_radius': 'sort_data_by_radius_value',
+                      'data_sorted_by_radius': 'sort_data_by_radius_value'}
+
 
 class CalculateRadialProfile(object):
 
-    def __init__(self, data: np.ndarray):
+    def __init__(self, data: np.ndarray, geometry_cache=None, stats=None, mask=None):
         """
 
-        :param data: numpy 2D array
+        :param data: numpy 2D or 3D array, 'np.memmap' or 'SlabReader' for data larger than the memory,
+            or chunked array (dask array, zarr array or chunked HDF5 dataset), see 'calculate_by_chunks'
         :type data: np.array
+        :param geometry_cache: Optional. Cache of the compiled geometries used by the binned engine,
+            default 'None' uses the module wide cache.
+        :type geometry_cache: GeometryCache
+        :param stats: Optional. Records the wall time, memory and pixels of each stage of the calculations,
+            default 'None' measures nothing.
+        :type stats: ProfileStats
+        :param mask: Optional. Pixels left out of every profile (True in a boolean array of the data shape),
+            e.g. dead pixels or the beam stop, without setting them to NaN. See 'DetectorMask'.
+        :type mask: DetectorMask or np.array
         """
         self.data = data
+        self.geometry_cache = default_geometry_cache if geometry_cache is None else geometry_cache
+        self.stats = stats
+        self._param_index = None
         self.dimension = len(data.shape)
         if self.dimension not in [2, 3]:
             raise ValueError('Only 2D or 3D np.array are supported.')
         self.bool_2d = self.dimension == 2  # boolean indicator of data dimension, True: 2D, False: 3D
+        self.mask = get_detector_mask(mask, data.shape)
+        self.chunks = get_chunks(data)
         self.center = None
         self.radius = None
         self.angle_range = None
@@ -22,14 +58,27 @@ class CalculateRadialProfile(object):
         self.y0 = None
         self.z0 = None
         self.param_list = []
+        self.window = None
+        # coordinates are open grids, broadcasting them never creates a full size index array
         if self.bool_2d:
-            self.y_index, self.x_index = np.indices(self.data.shape)
+            self.y_index, self.x_index = np.ogrid[tuple(slice(0, _len) for _len in self.data.shape)]
             self.y_len, self.x_len = np.shape(self.data)  # retrieve the size of the array
         else:
-            self.z_index, self.y_index, self.x_index = np.indices(self.data.shape)
+            self.z_index, self.y_index, self.x_index = np.ogrid[tuple(slice(0, _len) for _len in self.data.shape)]
             self.z_len, self.y_len, self.x_len = np.shape(self.data)  # retrieve the size of the array
-        self.final_radius_array = None
-        self.final_data_array = None
+        self.bin_edges = None
+        self.bin_radius = None
+        self.bin_accumulator = None
+
+    def __getattr__(self, name):
+        '''intermediate arrays skipped by the integer radius path are computed when inspected'''
+        _step = LAZY_INTERMEDIATES.get(name)
+        if _step is None or self.__dict__.get('window') is None:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        getattr(self, _step)()
+        if name not in self.__dict__:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        return self.__dict__[name]
 
     def add_params(self, center: tuple, radius=None, angle_range=None):
         """
@@ -39,6 +88,7 @@ class CalculateRadialProfile(object):
         :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
         :type radius: int or float
         :param angle_range: Angular coverage in degrees '(0, 360)'. Optional, default 'None' used to include all.
+            A sector crossing 0 degree is given with a start greater than its end, e.g. '(350, 10)'.
         :type angle_range: tuple
         """
         self._validate_params(center=center, radius=radius, angle_range=angle_range)
@@ -49,59 +99,390 @@ class CalculateRadialProfile(object):
         self.y0 = self.center[1]
         self.param_list.append(form_param_dict(center=center, radius=radius, angle_range=angle_range))
 
-    def calculate(self):
+    def calculate(self, bin_width=None, n_bins=None, memory_budget=None, engine=None, n_workers=None,
+                  scheduler=None):
+        """
+        Performs the radial profile calculation, one row per distinct radius unless a binning is specified.
+        The distinct radii of a center on the pixel grid (or half way between pixels) are grouped
+        without sorting, see 'accumulate_integer_radius'
+
+        :param bin_width: Optional. Width of the radial bins, switches to the binned engine.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius, switches to the binned engine.
+        :type n_bins: int
+        :param memory_budget: Optional. Memory in bytes, processes the data slab by slab within this budget.
+        :type memory_budget: int
+        :param engine: Optional. Engine of the binned calculation, see 'calculate_binned'. Needs 'bin_width' or
+            'n_bins', and can not be combined with 'memory_budget', 'n_workers' or chunked data, which are
+            processed by blocks with numpy.
+        :type engine: str
+        :param n_workers: Optional. Number of threads processing blocks of rows (or planes) of the data,
+            see 'calculate_by_slabs'.
+        :type n_workers: int
+        :param scheduler: Optional. dask scheduler of dask array data, see 'calculate_by_chunks'.
+        :type scheduler: str
+        """
+        if engine is not None:
+            if engine not in ENGINES:
+                raise ValueError("'engine' has to be one of {}.".format(ENGINES))
+            if bin_width is None and n_bins is None:
+                raise ValueError("'engine' is only used by the binned calculation, give 'bin_width' or 'n_bins'.")
+            if self.chunks is not None or memory_budget is not None or n_workers is not None:
+                raise ValueError("'engine' is only used by the binned calculation, not with 'memory_budget', "
+                                 "'n_workers' or chunked data.")
+        if self.chunks is not None:
+            self.calculate_by_chunks(bin_width=bin_width, n_bins=n_bins, scheduler=scheduler,
+                                     n_workers=1 if n_workers is None else n_workers)
+            return
+        if memory_budget is not None or n_workers is not None:
+            self.calculate_by_slabs(bin_width=bin_width, n_bins=n_bins, memory_budget=memory_budget,
+                                    n_workers=1 if n_workers is None else n_workers)
+            return
+        if bin_width is not None or n_bins is not None:
+            self.calculate_binned(bin_width=bin_width, n_bins=n_bins, engine=engine)
+            return
+        self.bin_edges = None
+        _radius_list = []
+        _accumulator_list = []
+        for self._param_index, each_param_dict in enumerate(self.param_list):
+            if is_half_integer_center(each_param_dict['center']):
+                _radius, _accumulator = self.accumulate_integer_radius(each_param_dict)
+            else:
+                _current_radius_array, _current_data_array = self.get_sorted_radial_array(each_param_dict)
+                with self._stage('accumulate', n_pixels=len(_current_data_array)):
+                    _radius, _accumulator = accumulate_sorted(_current_radius_array, _current_data_array)
+            _radius_list.append(_radius)
+            _accumulator_list.append(_accumulator)
+        self._param_index = None
+        with self._stage('merge'):
+            self.bin_radius, self.bin_accumulator = merge_accumulators(_radius_list, _accumulator_list)
+        self.calculate_profile()
+
+    def calculate_binned(self, bin_width=None, n_bins=None, engine='numpy'):
+        """
+        Performs the radial profile calculation over radial bins, accumulating the
+        count, mean and M2 of each bin without sorting.
+        With the 'numpy' engine, the pixel to bin assignment of each parameter set is compiled
+        once and kept in the geometry cache, so that data of the same shape only pay the gathering.
+        The 'numba' engine computes the radius, the selection and the bin of each pixel in fused
+        parallel loops, without any window sized temporary array, see 'fused_accumulate'.
+
+        :param bin_width: Width of the radial bins. Exclusive with 'n_bins'
+        :type bin_width: int or float
+        :param n_bins: Number of radial bins up to the largest radius. Exclusive with 'bin_width'
+        :type n_bins: int
+        :param engine: Optional. 'numpy' or 'numba' (numba needed). Default: 'numpy', which reuses the cached
+            geometries across calls
+        :type engine: str
+        """
+        if len(self.param_list) == 0:
+            raise ValueError("No parameters to calculate, use 'add_params' first.")
+        if engine is None:
+            engine = 'numpy'
+        if engine not in ENGINES:
+            raise ValueError("'engine' has to be one of {}.".format(ENGINES))
+        if engine == 'numba' and not NUMBA_AVAILABLE:
+            raise ImportError("numba is needed by the 'numba' engine, use the 'numpy' engine otherwise.")
+        _r_max = max([self._get_max_radius(each_param_dict) for each_param_dict in self.param_list])
+        self.bin_edges = make_bin_edges(_r_max, bin_width=bin_width, n_bins=n_bins)
+        _accumulator = BinAccumulator(len(self.bin_edges) - 1)
+        for self._param_index, each_param_dict in enumerate(self.param_list):
+            if engine == 'numba':
+                _window = get_bounding_window(self.data.shape, **each_param_dict)
+                with self._stage('fused', n_pixels=_get_window_size(_window)):
+                    fused_accumulate(self.data, _window, bin_edges=self.bin_edges, accumulator=_accumulator,
+                                     mask=self.mask, **each_param_dict)
+            else:
+                with self._stage('geometry') as _record:
+                    _geometry = self.geometry_cache.get(shape=self.data.shape, bin_edges=self.bin_edges,
+                                                        mask=self.mask, **each_param_dict)
+                    if _record is not None:
+                        _record.n_pixels = len(_geometry.pixel_indices)
+                with self._stage('accumulate', n_pixels=len(_geometry.pixel_indices)):
+                    _geometry.accumulate(self.data, _accumulator)
+        self._param_index = None
+        self.bin_radius = bin_centers(self.bin_edges)
+        self.bin_accumulator = _accumulator
+        self.calculate_profile()
+
+    def calculate_cached(self, bin_width=None, n_bins=None):
+        """
+        Performs the radial profile calculation with the compiled geometries of the cache, one row
+        per distinct radius unless a binning is specified. For frames of the same shape, e.g. during
+        an acquisition, each frame then only pays the gathering of its selected pixels
+
+        :param bin_width: Optional. Width of the radial bins.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        """
+        if bin_width is not None or n_bins is not None:
+            self.calculate_binned(bin_width=bin_width, n_bins=n_bins, engine='numpy')
+            return
+        if len(self.param_list) == 0:
+            raise ValueError("No parameters to calculate, use 'add_params' first.")
+        self.bin_edges = None
+        _radius_list = []
+        _accumulator_list = []
+        for self._param_index, each_param_dict in enumerate(self.param_list):
+            with self._stage('geometry') as _record:
+                _geometry = self.geometry_cache.get(shape=self.data.shape, mask=self.mask, **each_param_dict)
+                if _record is not None:
+                    _record.n_pixels = len(_geometry.pixel_indices)
+            with self._stage('accumulate', n_pixels=len(_geometry.pixel_indices)):
+                _radius_list.append(_geometry.bin_radius)
+                _accumulator_list.append(_geometry.accumulate(self.data))
+        self._param_index = None
+        with self._stage('merge'):
+            self.bin_radius, self.bin_accumulator = merge_accumulators(_radius_list, _accumulator_list)
+        self.calculate_profile()
+
+    def calculate_sectors(self, center: tuple, sector_edges, radius=None, bin_width=None, n_bins=None):
+        """
+        Performs the radial profile calculation of several contiguous sectors in a single pass,
+        each pixel being assigned to a combined (sector, radius) bin. Results are arrays of shape
+        (number of sectors, number of radii) in 'sector_mean', 'sector_std', 'sector_sem' and
+        'sector_count', with the radii in 'sector_radius'. 2D only
+
+        :param center: Origin of the radial plot, '(x0, y0)'.
+        :type center: tuple
+        :param sector_edges: Increasing angles in degrees within (0, 360), e.g. 'range(0, 361, 10)' for 36 sectors.
+            A sector includes its start edge, the last sector also includes its end edge.
+        :type sector_edges: list
+        :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
+        :type radius: int or float
+        :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        """
+        if not self.bool_2d:
+            raise ValueError('Angular range selection is not available for 3D data.')
+        self._validate_params(center=center, radius=radius, angle_range=None)
+        _param_dict = form_param_dict(center=center, radius=radius, angle_range=None)
+        if bin_width is not None or n_bins is not None:
+            self.bin_edges = make_bin_edges(self._get_max_radius(_param_dict), bin_width=bin_width, n_bins=n_bins)
+        else:
+            self.bin_edges = None
+        with self._stage('geometry') as _record:
+            _geometry = self.geometry_cache.get(shape=self.data.shape, bin_edges=self.bin_edges,
+                                                sector_edges=tuple(sector_edges), mask=self.mask, **_param_dict)
+            if _record is not None:
+                _record.n_pixels = len(_geometry.pixel_indices)
+        with self._stage('accumulate', n_pixels=len(_geometry.pixel_indices)):
+            _accumulator = _geometry.accumulate(self.data)
+        _shape = (_geometry.n_sectors, len(_geometry.bin_radius))
+        _count = _accumulator.count.reshape(_shape)
+        _occupied = _count.any(axis=0)
+        mean, std, sem = [_statistic.reshape(_shape)[:, _occupied] for _statistic in _accumulator.statistics()]
+        self.sector_params = _param_dict
+        self.sector_edges = _geometry.sector_edges
+        self.sector_radius = _geometry.bin_radius[_occupied]
+        self.sector_mean = mean
+        self.sector_std = std
+        self.sector_sem = sem
+        self.sector_count = _count[:, _occupied]
+
+    def calculate_by_slabs(self, bin_width=None, n_bins=None, memory_budget=None, n_workers=1):
         """
-        Performs the radial profile calculation
-        :return:
-        :rtype:
+        Performs the radial profile calculation slab by slab along the first axis, so that only
+        one slab of the data (e.g. of a 'np.memmap' volume) is read and processed at a time.
+        The partial bins of the slabs are merged, giving the same profile as the in-memory calculation.
+        The slabs can be processed by a pool of threads, the numpy kernels computing the radius,
+        the selection and the bins releasing the GIL. The slabs only depend on the data and the
+        memory budget, and their partial bins are merged in slab order, so that the profile does
+        not depend on the number of threads. The 'geometry' and 'accumulate' stages of each slab
+        are recorded with the index of its parameter set, from the thread processing it
+
+        :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        :param memory_budget: Optional. Memory in bytes a slab can use, each thread processing one slab at a time.
+            Default 'None' uses blocks of 'BLOCK_PIXELS' pixels, see 'get_block_windows'.
+        :type memory_budget: int
+        :param n_workers: Number of threads, a 'SlabReader' callback then has to be thread safe. Default: 1
+        :type n_workers: int
         """
-        _final_radius_array = np.array([])
-        _final_data_array = np.array([])
-        for each_param_dict in self.param_list:
-            _current_radius_array, _current_data_array = self.get_sorted_radial_array(each_param_dict)
-            _final_radius_array = np.concatenate((_final_radius_array, _current_radius_array), axis=None)
-            _final_data_array = np.concatenate((_final_data_array, _current_data_array), axis=None)
-        self.final_radius_array = np.array(_final_radius_array)
-        self.final_data_array = np.array(_final_data_array)
+        if n_workers < 1:
+            raise ValueError("'n_workers' has to be at least 1.")
+        if len(self.param_list) == 0:
+            raise ValueError("No parameters to calculate, use 'add_params' first.")
+        if bin_width is not None or n_bins is not None:
+            _r_max = max([self._get_max_radius(each_param_dict) for each_param_dict in self.param_list])
+            self.bin_edges = make_bin_edges(_r_max, bin_width=bin_width, n_bins=n_bins)
+        else:
+            self.bin_edges = None
+        _task_list = []
+        for _param_index, each_param_dict in enumerate(self.param_list):
+            _window = get_bounding_window(self.data.shape, **each_param_dict)
+            if memory_budget is None:
+                _slab_window_list = get_block_windows(_window)
+            else:
+                _slab_window_list = get_slab_windows(_window, memory_budget, itemsize=self.data.dtype.itemsize)
+            for _slab_window in _slab_window_list:
+                _task_list.append((_slab_window, _param_index))
+        if n_workers == 1 or len(_task_list) <= 1:
+            _result_list = [self._accumulate_slab(*_task) for _task in _task_list]
+        else:
+            with ThreadPoolExecutor(max_workers=n_workers) as _executor:
+                _result_list = list(_executor.map(lambda _task: self._accumulate_slab(*_task), _task_list))
+        _radius_list = [_radius for _radius, _ in _result_list]
+        _accumulator_list = [_accumulator for _, _accumulator in _result_list]
+        with self._stage('merge'):
+            self.bin_radius, self.bin_accumulator = merge_accumulators(_radius_list, _accumulator_list)
         self.calculate_profile()
 
+    def calculate_by_chunks(self, bin_width=None, n_bins=None, n_workers=1, scheduler=None):
+        """
+        Performs the radial profile calculation of chunked data chunk by chunk, each chunk being reduced
+        into partial bins with the coordinates of its pixels offset by its position. The partial bins
+        are merged by a tree reduction, see 'calculate_chunked'. The data are never held in memory,
+        dask arrays being reduced by the dask scheduler. The stages of each chunk and parameter set
+        are recorded, except for dask arrays whose reduction is only recorded as a whole 'chunks' stage
+
+        :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        :param n_workers: Number of threads reading the chunks of zarr arrays or HDF5 datasets. Default: 1
+        :type n_workers: int
+        :param scheduler: Optional. dask scheduler, e.g. 'processes' for the local multi-process scheduler.
+        :type scheduler: str
+        """
+        if self.chunks is None:
+            raise ValueError("'data' is not a chunked array.")
+        if len(self.param_list) == 0:
+            raise ValueError("No parameters to calculate, use 'add_params' first.")
+        if bin_width is not None or n_bins is not None:
+            _r_max = max([self._get_max_radius(each_param_dict) for each_param_dict in self.param_list])
+            self.bin_edges = make_bin_edges(_r_max, bin_width=bin_width, n_bins=n_bins)
+        else:
+            self.bin_edges = None
+        if dask is not None and isinstance(self.data, dask.array.Array):
+            _context = self._stage('chunks', n_pixels=int(np.prod(self.data.shape)))
+        else:
+            _context = nullcontext()
+        with _context:
+            self.bin_radius, self.bin_accumulator = calculate_chunked(self.data, self.param_list,
+                                                                      bin_edges=self.bin_edges, mask=self.mask,
+                                                                      n_workers=n_workers, scheduler=scheduler,
+                                                                      stats=self.stats)
+        self.calculate_profile()
+
+    def _accumulate_slab(self, slab_window, param_index):
+        '''radius of the bins and accumulator of one slab of one parameter set'''
+        with self._stage('geometry', param_index=param_index) as _record:
+            _geometry = SectorGeometry(self.data.shape, bin_edges=self.bin_edges, sub_window=slab_window,
+                                       mask=self.mask, **self.param_list[param_index])
+            if _record is not None:
+                _record.n_pixels = len(_geometry.pixel_indices)
+        with self._stage('accumulate', n_pixels=len(_geometry.pixel_indices), param_index=param_index):
+            return _geometry.bin_radius, _geometry.accumulate(self.data)
+
     def calculate_profile(self):
-        '''calculate the final profile'''
-        df = pd.DataFrame()
-        df['radius'] = self.final_radius_array
-        df['value'] = self.final_data_array
-        df1 = df.groupby('radius').agg({'value': ['mean', 'std', 'sem']})['value']
-        self.radial_profile = df1
+        '''calculate the final profile from the accumulated bins'''
+        with self._stage('profile', n_pixels=int(self.bin_accumulator.count.sum())):
+            self.radial_profile = self.bin_accumulator.to_dataframe(self.bin_radius)
+
+    def accumulate_integer_radius(self, param_dict):
+        """
+        Groups the pixels by exact radius when the center is on the pixel grid or half way between
+        pixels. The squared distances are then integers (times 4), the pixels are grouped with a
+        lookup on their integer squared distance instead of sorting their float radius, and the
+        square root is only taken for the occupied radii. The bins are the same as the sorted ones.
+        The intermediate arrays of the sorting path are only computed when inspected
+
+        :return: radius of the bins and accumulator
+        :rtype: tuple
+        """
+        self._set_current_params(param_dict)
+        for _name in LAZY_INTERMEDIATES:
+            self.__dict__.pop(_name, None)
+        _window_size = _get_window_size(self.window)
+        with self._stage('radius', n_pixels=_window_size):
+            _squared_radius, _scale = calculate_integer_squared_radius(self.window, self.center)
+        _inside_indices = None
+        if self.angle_range is not None:
+            with self._stage('angle', n_pixels=_window_size):
+                if not self.bool_2d:
+                    raise ValueError('Angular range selection is not available for 3D data.')
+                _y_offset, _x_offset = get_window_offsets(self.window, self.center)
+                _inside_indices = get_angle_range_indices(calculate_angle_deg(_y_offset, _x_offset),
+                                                          self.angle_range)
+        with self._stage('selection', n_pixels=_window_size):
+            if self.radius is not None:
+                _in_radius_indices = _squared_radius <= get_max_squared_radius(self.radius, _scale)
+                _inside_indices = _in_radius_indices if _inside_indices is None \
+                    else np.logical_and(_inside_indices, _in_radius_indices)
+            if self.mask is not None:
+                _not_masked_indices = np.invert(self.mask.mask[self.window])
+                _inside_indices = _not_masked_indices if _inside_indices is None \
+                    else np.logical_and(_inside_indices, _not_masked_indices)
+            _window_data = self.data[self.window]
+            if _inside_indices is None:
+                _pixel_indices = None
+            else:
+                _pixel_indices = np.flatnonzero(_inside_indices)
+        with self._stage('gather') as _record:
+            _squared_radius = np.broadcast_to(_squared_radius, _window_data.shape).reshape(-1)
+            if _pixel_indices is None:
+                _values = np.asarray(_window_data).reshape(-1)
+            else:
+                _values = np.asarray(_window_data).flat[_pixel_indices]
+                _squared_radius = _squared_radius[_pixel_indices]
+            if _values.dtype.kind in 'fc':
+                _not_nan_indices = np.invert(np.isnan(_values))
+                if not _not_nan_indices.all():
+                    _values = _values[_not_nan_indices]
+                    _squared_radius = _squared_radius[_not_nan_indices]
+            if _record is not None:
+                _record.n_pixels = len(_values)
+        with self._stage('accumulate', n_pixels=len(_values)):
+            # the squared distances to a half integer center are '4 * key + number of half integer coordinates'
+            _n_half = sum([not float(_each).is_integer() for _each in self.center])
+            _key = _squared_radius if _scale == 1 else (_squared_radius - _n_half) // 4
+            _occupied = np.zeros(int(_key.max()) + 1 if len(_key) else 0, dtype=bool)
+            _occupied[_key] = True
+            _occupied_keys = np.flatnonzero(_occupied)
+            _lookup = np.cumsum(_occupied, dtype=np.int32 if len(_occupied) < 2 ** 31 else np.int64) - 1
+            _occupied_squared_radius = _occupied_keys if _scale == 1 else 4 * _occupied_keys + _n_half
+            radius = np.sqrt(_occupied_squared_radius / float(_scale ** 2))
+            accumulator = BinAccumulator(len(radius))
+            accumulator.add(_lookup[_key], _values)
+        return radius, accumulator
 
     def get_sorted_radial_array(self, param_dict):
         """
+        The intermediate arrays (radius, angle, working data, sorting) only cover the window
+        bounding the parameters, see 'get_bounding_window'
+
         :return: sorted radius array and data array
         :rtype: np.array
         """
-        self.center = param_dict['center']
-        self.radius = param_dict['radius']
-        self.angle_range = param_dict['angle_range']
-        self.x0 = self.center[0]
-        self.y0 = self.center[1]
-        if not self.bool_2d:
-            self.z0 = self.center[2]
-
-        self.calculate_pixels_radius()
-        self.calculate_pixels_angle_position()
-        self.turn_off_data_outside()
-        self.sort_indices_of_radius()
-        self.sort_data_by_radius_value()
+        self._set_current_params(param_dict)
+        _window_size = _get_window_size(self.window)
+        with self._stage('radius', n_pixels=_window_size):
+            self.calculate_pixels_radius()
+        if self.angle_range is not None:
+            with self._stage('angle', n_pixels=_window_size):
+                self.calculate_pixels_angle_position()
+        with self._stage('selection', n_pixels=_window_size):
+            self.turn_off_data_outside()
+        with self._stage('sort', n_pixels=_window_size):
+            self.sort_indices_of_radius()
+        with self._stage('gather') as _record:
+            self.sort_data_by_radius_value()
+            if _record is not None:
+                _record.n_pixels = len(self.data_sorted_by_radius)
         return self.sorted_radius[:], self.data_sorted_by_radius[:]
 
     def sort_data_by_radius_value(self):
-        '''sort the working data by radius indices'''
-        _data_sorted_by_radius = self.working_data.flat[self.sorted_radius_indices]
-        _sorted_radius = self.radius_array.flat[self.sorted_radius_indices]
-        _nan_indices = np.isnan(_data_sorted_by_radius)
-        _not_nan_indices = np.invert(_nan_indices)
-        self.data_sorted_by_radius = _data_sorted_by_radius[_not_nan_indices]
-        self.sorted_radius = _sorted_radius[_not_nan_indices]
-        # print(self.sorted_radius)
+        '''sort the selected data by radius indices, gathering them from the original data'''
+        _keep_indices = self.inside_indices.flat[self.sorted_radius_indices]
+        _sorted_indices = self.sorted_radius_indices[_keep_indices]
+        self.data_sorted_by_radius = self.data[self.window].flat[_sorted_indices]
+        self.sorted_radius = self.radius_array.flat[_sorted_indices]
 
     def sort_indices_of_radius(self):
         '''sort the indices of the radius array'''
@@ -110,73 +491,112 @@ class CalculateRadialProfile(object):
 
     def turn_off_data_outside(self):
         '''using the angle range provided and the angle value of each pixels,
-        this algorithm replace all the initial data by 0 outside the range specified'''
-        inside_indices = np.isreal(self.data)
+        this algorithm flags the pixels outside the range specified, or NaN, as not to be kept.
+        The data themselves are neither copied nor modified'''
+        inside_indices = self.get_inside_indices()
+        _window_data = self.data[self.window]
+        if _window_data.dtype.kind in 'fc':
+            inside_indices = np.logical_and(inside_indices, np.invert(np.isnan(_window_data)))
+        self.inside_indices = inside_indices
+
+    @property
+    def working_data(self):
+        '''float copy of the window data with NaN outside of the selection, only built when inspected'''
+        working_data = np.array(self.data[self.window], dtype=np.float64)
+        working_data[np.invert(self.inside_indices)] = np.nan
+        return working_data
+
+    def get_inside_indices(self):
+        '''boolean array of the pixels within the angle range and the radius, and not masked'''
+        inside_indices = np.isreal(self.data[self.window])
         if self.angle_range is not None:
-            left_angles_indices = self.array_angle_deg >= self.angle_range[0]
-            right_angles_indices = self.array_angle_deg <= self.angle_range[1]
-            inside_indices = np.logical_and(left_angles_indices, right_angles_indices)
+            inside_indices = get_angle_range_indices(self.array_angle_deg, self.angle_range)
         if self.radius is not None:
             in_radius_indices = self.radius_array <= self.radius
             inside_indices = np.logical_and(inside_indices, in_radius_indices)
-        not_keep_indices = np.invert(inside_indices)
-
-        working_data = np.array(self.data, dtype=np.float64)  # forced array to be float so NaN can be used
-        working_data[not_keep_indices] = np.nan  # replaced 0 with NaN so the mean & std can be calculated correctly
-        #working_data[self.y0, self.x0] = 1  # make sure center is part of the pixel to keep
-
-        self.working_data = working_data
+        if self.mask is not None:
+            inside_indices = np.logical_and(inside_indices, np.invert(self.mask.mask[self.window]))
+        return inside_indices
 
     def calculate_pixels_angle_position(self):
         '''determine the angle position related to the top vertical center of
-        each pixel in degrees'''
+        each pixel in degrees, within [0, 360['''
         if self.angle_range is not None:
             if self.bool_2d:
-                complex_array = (self.y_index - self.y0) + 1j * \
-                                (self.x_index - self.x0)
-                # complex_array = (self.y_len - self.y_index - self.y0) + 1j * \
-                #                 (self.x_index - self.x0)
-                array_angle_deg = np.abs(np.angle(complex_array, deg=True) - 180)
+                _y_offset, _x_offset = get_window_offsets(self.window, self.center)
+                array_angle_deg = calculate_angle_deg(_y_offset, _x_offset)
                 self.intermediate_array_angle_deg = array_angle_deg
-
-                # removing all negative angles -> [0, 360[
-                array_angle_deg_pos = np.array(array_angle_deg)
-                for _y in np.arange(self.y_len):
-                    for _x in np.arange(self.x_len):
-                        _value = array_angle_deg[_y, _x]
-                        if _value < 0:
-                            array_angle_deg_pos[_y, _x] = 2 * 180 + _value
-
-                self.array_angle_deg = array_angle_deg_pos
+                self.array_angle_deg = array_angle_deg
             else:
                 raise ValueError('Angular range selection is not available for 3D data.')
 
     def calculate_pixels_radius(self):
-        '''calculate radii of all pixels '''
-        if self.bool_2d:
-            r_array = np.sqrt((self.x_index - self.x0) ** 2 + (self.y_index - self.y0) ** 2)
-            self.radius_array = r_array
-        else:
-            r_array = np.sqrt(
-                (self.x_index - self.x0) ** 2 + (self.y_index - self.y0) ** 2 + (self.z_index - self.z0) ** 2)
-            self.radius_array = r_array
+        '''calculate radii of all pixels within the window'''
+        self.radius_array = calculate_radius(get_window_offsets(self.window, self.center))
+
+    def _set_current_params(self, param_dict):
+        self.center = param_dict['center']
+        self.radius = param_dict['radius']
+        self.angle_range = param_dict['angle_range']
+        self.x0 = self.center[0]
+        self.y0 = self.center[1]
+        if not self.bool_2d:
+            self.z0 = self.center[2]
+        self.window = get_bounding_window(self.data.shape, self.center, self.radius, self.angle_range)
+
+    def _stage(self, stage, n_pixels=None, param_index=None):
+        '''context measuring a stage when stats are recorded, doing nothing otherwise'''
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.measure(stage, param_index=self._param_index if param_index is None else param_index,
+                                  n_pixels=n_pixels)
+
+    def _get_max_radius(self, param_dict):
+        return get_max_radius(self.data.shape, param_dict)
 
     def _validate_params(self, center, radius, angle_range):
-        assert type(center) == tuple
-        if len(center) != self.dimension:
-            raise ValueError("'center' input is not dimensionally correct for input data.")
-        for each in center:
-            if each < 0:
-                raise ValueError("'center' input can not be negative.")
-        if radius is not None:
-            if radius <= 0:
-                raise ValueError("'radius' has to be greater than zero.")
-        if angle_range is not None:
-            assert type(angle_range) == tuple
-            assert len(angle_range) == 2
-            for each in angle_range:
-                if each < 0:
-                    raise ValueError("'angle_range' has to be within (0, 360).")
+        validate_params(center=center, radius=radius, angle_range=angle_range, dimension=self.dimension)
+
+
+def _get_window_size(window):
+    return int(np.prod([_slice.stop - _slice.start for _slice in window]))
+
+
+def get_max_radius(shape, param_dict):
+    """
+    Largest radius reachable with the parameters, i.e. the radius or the distance to the farthest corner
+
+    :param shape: shape of the data, '(y, x)' or '(z, y, x)'
+    :type shape: tuple
+    :param param_dict: parameters as shaped by 'form_param_dict'
+    :type param_dict: dict
+    :return: largest radius
+    :rtype: float
+    """
+    if param_dict['radius'] is not None:
+        return param_dict['radius']
+    _squared_distance = 0
+    for _center, _len in zip(param_dict['center'], shape[::-1]):
+        _squared_distance += max(_center, _len - 1 - _center) ** 2
+    return np.sqrt(_squared_distance)
+
+
+def validate_params(center, radius, angle_range, dimension):
+    assert type(center) == tuple
+    if len(center) != dimension:
+        raise ValueError("'center' input is not dimensionally correct for input data.")
+    for each in center:
+        if each < 0:
+            raise ValueError("'center' input can not be negative.")
+    if radius is not None:
+        if radius <= 0:
+            raise ValueError("'radius' has to be greater than zero.")
+    if angle_range is not None:
+        assert type(angle_range) == tuple
+        assert len(angle_range) == 2
+        for each in angle_range:
+            if each < 0 or each > 360:
+                raise ValueError("'angle_range' has to be within (0, 360).")
 
 
 def load_label_analysis_amira(file_path, drop=None, z_flipper=None):
@@ -200,6 +620,23 @@ def load_label_analysis_amira(file_path, drop=None, z_flipper=None):
         _df_amira['BaryCenterZ'] = z_flipper - _df_amira['BaryCenterZ']
     df_amira = _df_amira.round(decimals=0)
     print(_df_amira)
+    return label_analysis_to_dict(df_amira)
+
+
+def label_analysis_to_dict(df_amira):
+    """
+
+    :param df_amira: Amira-Avizo label analysis with 'index', 'BaryCenterX', 'BaryCenterY', 'BaryCenterZ'
+        and 'EqRadius' (or 'EqDiameter') columns
+    :type df_amira: pd.DataFrame
+    :return: A dictionary containing center and radius of each object, named 'obj_<index>'
+    :rtype: dict
+    """
+    df_amira = df_amira.reset_index(drop=True)
+    if 'EqRadius' in df_amira.columns:
+        _radius = df_amira['EqRadius']
+    else:
+        _radius = df_amira['EqDiameter'] / 2
     _analysis_dict = {}
     for _i, _each in enumerate(df_amira['index']):
         _name = 'obj_' + str(_each)
@@ -207,7 +644,7 @@ def load_label_analysis_amira(file_path, drop=None, z_flipper=None):
             (df_amira['BaryCenterX'][_i],
              df_amira['BaryCenterY'][_i],
              df_amira['BaryCenterZ'][_i]),
-            df_amira['EqRadius'][_i]
+            _radius[_i]
         ]
     return _analysis_dict
 
@@ -0,0 +1,209 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+
+from sectorizedradialprofile.binning import BinAccumulator, bin_centers, merge_accumulators
+from sectorizedradialprofile.geometry import SectorGeometry, get_bounding_window, intersect_windows
+
+try:
+    import dask
+    import dask.array
+except ImportError:
+    dask = None
+
+# number of partial accumulators merged together at each level of the tree reduction
+SPLIT_EVERY = 8
+
+
+def get_chunks(data):
+    """
+    Chunks of a chunked array, e.g. a dask array, a zarr array or a chunked HDF5 dataset
+
+    :param data: array
+    :type data: np.array or dask.array.Array
+    :return: size of the chunks along each axis, '((4, 4, 2), (10,))', None when the data are not chunked
+    :rtype: tuple
+    """
+    if isinstance(data, np.ndarray):
+        return None
+    _chunks = getattr(data, 'chunks', None)
+    if _chunks is None:
+        return None
+    if all([np.ndim(_axis_chunks) == 0 for _axis_chunks in _chunks]):
+        # regular chunk shape of zarr and HDF5, the last chunk of an axis being cut by the shape
+        return tuple(tuple(min(int(_chunk), _len - _start) for _start in range(0, _len, int(_chunk)))
+                     for _chunk, _len in zip(_chunks, data.shape))
+    return tuple(tuple(int(_chunk) for _chunk in _axis_chunks) for _axis_chunks in _chunks)
+
+
+def get_chunk_windows(chunks):
+    """
+
+    :param chunks: size of the chunks along each axis, see 'get_chunks'
+    :type chunks: tuple
+    :return: window of each chunk, one slice per axis, in the C order of the grid of chunks
+    :rtype: list
+    """
+    _axis_window_list = []
+    for _axis_chunks in chunks:
+        _edges = np.concatenate([[0], np.cumsum(_axis_chunks, dtype=np.int64)])
+        _axis_window_list.append([slice(int(_start), int(_stop)) for _start, _stop in zip(_edges[:-1], _edges[1:])])
+    return list(itertools.product(*_axis_window_list))
+
+
+def accumulate_chunk(block, chunk_window, shape, param_list, bin_edges=None, block_mask=None, stats=None):
+    """
+    Partial bins of one chunk of the data for all the parameter sets, the coordinates of its
+    pixels being offset by the position of the chunk in the data
+
+    :param block: data of the chunk
+    :type block: np.array
+    :param chunk_window: position of the chunk in the data, one slice per axis
+    :type chunk_window: tuple
+    :param shape: shape of the whole data
+    :type shape: tuple
+    :param param_list: parameter sets, see 'form_param_dict'
+    :type param_list: list
+    :param bin_edges: Optional. Radial bin edges, default is one bin per distinct radius.
+    :type bin_edges: np.array
+    :param block_mask: Optional. Pixels of the chunk left out, True in a boolean array of the chunk shape.
+    :type block_mask: np.array
+    :param stats: Optional. Records the 'geometry' and 'accumulate' stages of each parameter set.
+    :type stats: ProfileStats
+    :return: radius of the bins and accumulator
+    :rtype: tuple
+    """
+    block = np.asarray(block)
+    _radius_list = []
+    _accumulator_list = []
+    for _param_index, each_param_dict in enumerate(param_list):
+        with _measure(stats, 'geometry', _param_index) as _record:
+            _geometry = SectorGeometry(shape, bin_edges=bin_edges, sub_window=chunk_window, **each_param_dict)
+            if _record is not None:
+                _record.n_pixels = len(_geometry.pixel_indices)
+        if len(_geometry.pixel_indices) == 0:
+            continue
+        with _measure(stats, 'accumulate', _param_index, n_pixels=len(_geometry.pixel_indices)):
+            _radius, _accumulator = _accumulate_geometry(block, chunk_window, _geometry, block_mask)
+        _radius_list.append(_radius)
+        _accumulator_list.append(_accumulator)
+    if len(_radius_list) == 0 and bin_edges is not None:
+        return bin_centers(bin_edges), BinAccumulator(len(bin_edges) - 1)
+    return merge_accumulators(_radius_list, _accumulator_list)
+
+
+def _accumulate_geometry(block, chunk_window, geometry, block_mask):
+    '''radius of the bins and accumulator of the pixels of a chunk selected by a geometry'''
+    _local_window = tuple(slice(_slice.start - _chunk_slice.start, _slice.stop - _chunk_slice.start)
+                          for _slice, _chunk_slice in zip(geometry.window, chunk_window))
+    _bin_index = geometry.bin_index
+    _values = block[_local_window].reshape(-1)[geometry.pixel_indices]
+    _kept_indices = None
+    if block_mask is not None:
+        _kept_indices = np.invert(block_mask[_local_window].reshape(-1)[geometry.pixel_indices])
+    if _values.dtype.kind in 'fc':
+        _not_nan_indices = np.invert(np.isnan(_values))
+        _kept_indices = _not_nan_indices if _kept_indices is None \
+            else np.logical_and(_kept_indices, _not_nan_indices)
+    if _kept_indices is not None and not _kept_indices.all():
+        _values = _values[_kept_indices]
+        _bin_index = _bin_index[_kept_indices]
+    _accumulator = BinAccumulator(geometry.n_bins)
+    _accumulator.add(_bin_index, _values)
+    return geometry.bin_radius, _accumulator
+
+
+def _measure(stats, stage, param_index, n_pixels=None):
+    '''context measuring a stage when stats are recorded, doing nothing otherwise'''
+    if stats is None:
+        return nullcontext()
+    return stats.measure(stage, param_index=param_index, n_pixels=n_pixels)
+
+
+def merge_partials(partial_list):
+    '''single radius and accumulator of a list of partial ones'''
+    return merge_accumulators([_radius for _radius, _ in partial_list],
+                              [_accumulator for _, _accumulator in partial_list])
+
+
+def calculate_chunked(data, param_list, bin_edges=None, mask=None, n_workers=1, scheduler=None,
+                      split_every=SPLIT_EVERY, stats=None):
+    """
+    Bins of the parameter sets of a chunked array, each chunk being read and reduced into its
+    own partial bins, then the partial bins being merged by groups of 'split_every' up to a
+    single accumulator. Only the chunks overlapping the parameter sets are read, one at a time
+    by each worker, so that the array is never held in memory.
+    A dask array is reduced by dask, e.g. on the local multi-process scheduler with
+    'scheduler="processes"'. Other chunked arrays (zarr, HDF5 datasets) are read chunk by chunk
+    by a pool of threads
+
+    :param data: chunked array, see 'get_chunks'
+    :type data: dask.array.Array
+    :param param_list: parameter sets, see 'form_param_dict'
+    :type param_list: list
+    :param bin_edges: Optional. Radial bin edges, default is one bin per distinct radius.
+    :type bin_edges: np.array
+    :param mask: Optional. Pixels left out, see 'DetectorMask'.
+    :type mask: DetectorMask
+    :param n_workers: Optional. Number of threads reading the chunks of arrays which are not dask arrays. Default: 1
+    :type n_workers: int
+    :param scheduler: Optional. dask scheduler, e.g. 'threads' or 'processes', default is the dask default.
+    :type scheduler: str
+    :param split_every: Optional. Number of partial accumulators merged together. Default: 8
+    :type split_every: int
+    :param stats: Optional. Records the stages of each chunk and parameter set, see 'accumulate_chunk'. The chunks
+        of a dask array are reduced by the dask scheduler and are not recorded.
+    :type stats: ProfileStats
+    :return: radius of the bins and accumulator
+    :rtype: tuple
+    """
+    _chunks = get_chunks(data)
+    if _chunks is None:
+        raise ValueError("'data' is not a chunked array.")
+    if split_every < 2:
+        raise ValueError("'split_every' has to be at least 2.")
+    if n_workers < 1:
+        raise ValueError("'n_workers' has to be at least 1.")
+    _shape = tuple(data.shape)
+    _window_list = [get_bounding_window(_shape, **each_param_dict) for each_param_dict in param_list]
+    _task_list = []
+    for _chunk_index, _chunk_window in enumerate(get_chunk_windows(_chunks)):
+        if any([_get_size(intersect_windows(_window, _chunk_window)) for _window in _window_list]):
+            _task_list.append((_chunk_index, _chunk_window))
+
+    def _get_block_mask(_chunk_window):
+        return None if mask is None else mask.mask[_chunk_window]
+
+    if dask is not None and isinstance(data, dask.array.Array):
+        _block_list = data.to_delayed().ravel()
+        _accumulate = dask.delayed(accumulate_chunk, pure=True)
+        _partial_list = [_accumulate(_block_list[_chunk_index], _chunk_window, _shape, param_list, bin_edges,
+                                     _get_block_mask(_chunk_window))
+                         for _chunk_index, _chunk_window in _task_list]
+        _merge = dask.delayed(merge_partials, pure=True)
+    else:
+        def _read_and_accumulate(_task):
+            _chunk_index, _chunk_window = _task
+            return accumulate_chunk(data[_chunk_window], _chunk_window, _shape, param_list, bin_edges,
+                                    _get_block_mask(_chunk_window), stats=stats)
+
+        if n_workers == 1 or len(_task_list) <= 1:
+            _partial_list = [_read_and_accumulate(_task) for _task in _task_list]
+        else:
+            with ThreadPoolExecutor(max_workers=n_workers) as _executor:
+                _partial_list = list(_executor.map(_read_and_accumulate, _task_list))
+        _merge = merge_partials
+
+    if len(_partial_list) == 0:
+        return merge_partials([])
+    while len(_partial_list) > 1:
+        _partial_list = [_merge(_partial_list[_start: _start + split_every])
+                         for _start in range(0, len(_partial_list), split_every)]
+    if dask is not None and isinstance(data, dask.array.Array):
+        return dask.compute(_partial_list[0], scheduler=scheduler)[0]
+    return _partial_list[0]
+
+
+def _get_size(window):
+    return int(np.prod([_slice.stop - _slice.start for _slice in window]))
@@ -0,0 +1,243 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sectorizedradialprofile.batch import get_process_context
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.export import export_npz, export_hdf5, export_csv
+from sectorizedradialprofile.loader import load_frame
+
+EXPORTERS = {'npz': (export_npz, '.npz'),
+             'hdf5': (export_hdf5, '.h5'),
+             'csv': (export_csv, '.csv')}
+COMPLETED_FILE_NAME = 'completed.txt'
+
+
+def load_manifest(file_path):
+    """
+    Reads a JSON manifest of the batch, e.g.
+    '{"output_dir": "profiles", "format": "npz", "defaults": {"bin_width": 1},
+    "entries": [{"name": "run_12", "files": "run_12/*.fits", "center": [500, 500], "radius": 300,
+    "angle_range": [0, 90]}, {"files": ["sample.tif"], "center": [250, 260], "sector_edges": [0, 180, 360]}]}'.
+    An entry can also list several parameter sets as '"params": [{"center": ..., "radius": ...}, ...]',
+    and a '"mask"' image whose non zero pixels are left out (dead pixels, beam stop, ...).
+    Relative paths are relative to the manifest folder
+
+    :param file_path: path of the JSON manifest
+    :type file_path: str
+    :return: manifest
+    :rtype: dict
+    """
+    with open(file_path) as _file:
+        manifest = json.load(_file)
+    manifest.setdefault('base_dir', os.path.dirname(os.path.abspath(file_path)))
+    return manifest
+
+
+def make_tasks(manifest):
+    """
+    One task per input file of each entry of the manifest. The output of a file is written in
+    the folder of its entry, keeping the folders of the file below the fixed part of its pattern
+    (e.g. 'run_1/f.npz' and 'run_2/f.npz' for '*/f.tif')
+
+    :param manifest: manifest, see 'load_manifest'
+    :type manifest: dict
+    :return: tasks, dictionaries with 'input', 'output', 'format' and the calculation parameters
+    :rtype: list
+    """
+    _base_dir = manifest.get('base_dir', os.getcwd())
+    _output_dir = os.path.join(_base_dir, manifest.get('output_dir', 'profiles'))
+    _format = manifest.get('format', 'npz')
+    if _format not in EXPORTERS:
+        raise ValueError("'format' has to be one of {}.".format(list(EXPORTERS)))
+    _extension = EXPORTERS[_format][1]
+    task_list = []
+    _outputs = {}
+    for _index, _entry in enumerate(manifest['entries']):
+        _entry = dict(manifest.get('defaults', {}), **_entry)
+        _name = _entry.get('name', 'entry_{:03}'.format(_index))
+        _patterns = _entry['files'] if isinstance(_entry['files'], list) else [_entry['files']]
+        _file_list = []
+        for _pattern in _patterns:
+            _matches = sorted(glob.glob(os.path.join(_base_dir, _pattern)))
+            if len(_matches) == 0:
+                raise ValueError("No file matches '{}'.".format(_pattern))
+            _root = _get_glob_root(os.path.join(_base_dir, _pattern))
+            _file_list += [(_file, os.path.relpath(_file, _root)) for _file in _matches]
+        if 'params' in _entry:
+            _param_list = [_format_params(_params) for _params in _entry['params']]
+        else:
+            _param_list = [_format_params(_entry)]
+        for _file, _relative_path in _file_list:
+            _output = os.path.join(_output_dir, _name, os.path.splitext(_relative_path)[0] + _extension)
+            if _output in _outputs:
+                raise ValueError("'{}' and '{}' have the same output '{}'.".format(_outputs[_output], _file, _output))
+            _outputs[_output] = _file
+            task_list.append({'input': _file,
+                              'output': _output,
+                              'format': _format,
+                              'param_list': _param_list,
+                              'sector_edges': _entry.get('sector_edges'),
+                              'bin_width': _entry.get('bin_width'),
+                              'n_bins': _entry.get('n_bins'),
+                              'mask': None if _entry.get('mask') is None else os.path.join(_base_dir, _entry['mask'])})
+    return task_list
+
+
+def _get_glob_root(pattern):
+    '''folder of a glob pattern before its first wildcard, the outputs keep the folders of the inputs below it'''
+    _root = os.path.dirname(pattern)
+    while any(_char in _root for _char in '*?['):
+        _root = os.path.dirname(_root)
+    return _root
+
+
+def _format_params(params):
+    return {'center': tuple(params['center']),
+            'radius': params.get('radius'),
+            'angle_range': None if params.get('angle_range') is None else tuple(params['angle_range'])}
+
+
+def process_task(task):
+    """
+    Calculates the profile of the file of a task and writes it, through a temporary file so that
+    an interrupted task never leaves a complete looking output
+
+    :param task: task, see 'make_tasks'
+    :type task: dict
+    :return: output file of the task
+    :rtype: str
+    """
+    data = load_frame(task['input'])
+    _mask = None if task.get('mask') is None else load_frame(task['mask']) != 0
+    o_calculate = CalculateRadialProfile(data=data, mask=_mask)
+    if task['sector_edges'] is not None:
+        if len(task['param_list']) != 1:
+            raise ValueError("'sector_edges' takes a single center.")
+        _params = task['param_list'][0]
+        o_calculate.calculate_sectors(center=_params['center'], sector_edges=task['sector_edges'],
+                                      radius=_params['radius'], bin_width=task['bin_width'], n_bins=task['n_bins'])
+    else:
+        for _params in task['param_list']:
+            o_calculate.add_params(**_params)
+        o_calculate.calculate(bin_width=task['bin_width'], n_bins=task['n_bins'])
+    return write_output(o_calculate, task['output'], task['format'], metadata={'input': task['input']})
+
+
+def write_output(o_calculate, output, file_format, metadata=None):
+    """
+    Writes the results of a calculation through a temporary file, so that an interrupted
+    writing never leaves a complete looking output
+
+    :param o_calculate: calculation whose results are written
+    :type o_calculate: CalculateRadialProfile
+    :param output: path of the output file, with the extension of the format
+    :type output: str
+    :param file_format: 'npz', 'hdf5' or 'csv'
+    :type file_format: str
+    :param metadata: Optional. Information saved with the results.
+    :type metadata: dict
+    :return: output file
+    :rtype: str
+    """
+    _exporter, _extension = EXPORTERS[file_format]
+    _output_folder = os.path.dirname(output)
+    if _output_folder and not os.path.exists(_output_folder):
+        os.makedirs(_output_folder, exist_ok=True)
+    _temporary_file = output[:-len(_extension)] + '.partial' + _extension
+    if os.path.exists(_temporary_file):
+        os.remove(_temporary_file)
+    _exporter(o_calculate, _temporary_file, metadata=metadata)
+    os.replace(_temporary_file, output)
+    return output
+
+
+def read_completed(output_dir):
+    '''outputs recorded as completed in the output folder'''
+    _file_path = os.path.join(output_dir, COMPLETED_FILE_NAME)
+    if not os.path.exists(_file_path):
+        return set()
+    with open(_file_path) as _file:
+        return set([_line.rstrip('\n') for _line in _file if _line.strip()])
+
+
+def run_batch(manifest, n_workers=None, restart=False):
+    """
+    Processes the tasks of a manifest with a pool of processes. Each completed output is recorded
+    in 'completed.txt' of the output folder as soon as it is written, so that a batch run again
+    only processes the tasks not completed yet. A task which fails (e.g. an unreadable input) is
+    reported without stopping the other tasks, and is processed again by the next run
+
+    :param manifest: manifest, see 'load_manifest'
+    :type manifest: dict
+    :param n_workers: Optional. Number of worker processes, default is the number of CPUs. 1 runs in this process.
+    :type n_workers: int
+    :param restart: Optional. Processes all the tasks again, forgetting the completed ones. Default: False
+    :type restart: bool
+    :return: number of tasks processed and skipped, and the error of each failed task by input file
+    :rtype: tuple
+    """
+    _base_dir = manifest.get('base_dir', os.getcwd())
+    _output_dir = os.path.join(_base_dir, manifest.get('output_dir', 'profiles'))
+    if not os.path.exists(_output_dir):
+        os.makedirs(_output_dir)
+    _completed_file_path = os.path.join(_output_dir, COMPLETED_FILE_NAME)
+    if restart and os.path.exists(_completed_file_path):
+        os.remove(_completed_file_path)
+    _completed = read_completed(_output_dir)
+    _all_task_list = make_tasks(manifest)
+    _task_list = [_task for _task in _all_task_list
+                  if os.path.relpath(_task['output'], _output_dir) not in _completed
+                  or not os.path.exists(_task['output'])]
+    _n_skipped = len(_all_task_list) - len(_task_list)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    _n_processed = 0
+    failures = {}
+    with open(_completed_file_path, 'a') as _completed_file:
+        def _record(_task, _get_output):
+            nonlocal _n_processed
+            try:
+                _output = _get_output()
+            except Exception as _error:
+                failures[_task['input']] = '{}: {}'.format(type(_error).__name__, _error)
+                return
+            _completed_file.write(os.path.relpath(_output, _output_dir) + '\n')
+            _completed_file.flush()
+            _n_processed += 1
+
+        if n_workers == 1 or len(_task_list) <= 1:
+            for _task in _task_list:
+                _record(_task, lambda: process_task(_task))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=get_process_context()) as _executor:
+                _futures = {_executor.submit(process_task, _task): _task for _task in _task_list}
+                for _future in as_completed(_futures):
+                    _record(_futures[_future], _future.result)
+    return _n_processed, _n_skipped, failures
+
+
+def main(argv=None):
+    '''console entry point, see 'sectorized-radial-profile --help' '''
+    parser = argparse.ArgumentParser(prog='sectorized-radial-profile',
+                                     description='Radial profiles of the files of a JSON manifest.')
+    parser.add_argument('manifest', help='JSON manifest of the files and parameters, see load_manifest')
+    parser.add_argument('-n', '--n-workers', type=int, default=None, help='number of worker processes')
+    parser.add_argument('-f', '--format', choices=list(EXPORTERS), default=None,
+                        help='output format, overrides the format of the manifest')
+    parser.add_argument('--restart', action='store_true', help='process again the completed files')
+    _args = parser.parse_args(argv)
+    manifest = load_manifest(_args.manifest)
+    if _args.format is not None:
+        manifest['format'] = _args.format
+    _n_processed, _n_skipped, failures = run_batch(manifest, n_workers=_args.n_workers, restart=_args.restart)
+    print('{} file(s) processed, {} already completed'.format(_n_processed, _n_skipped))
+    if failures:
+        print('{} file(s) failed:'.format(len(failures)), file=sys.stderr)
+        for _input, _error in sorted(failures.items()):
+            print('  {}: {}'.format(_input, _error), file=sys.stderr)
+        return 1
+    return 0
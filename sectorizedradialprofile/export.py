@@ -0,0 +1,197 @@
+import json
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+KINDS = ['profile', 'sectors', 'stack']
+STATISTICS = ['mean', 'std', 'sem', 'count']
+CSV_CHUNK_ROWS = 4096
+
+
+def get_result_arrays(o_calculate, kind=None):
+    """
+    Arrays of the results of a calculation, with the parameters it was made with
+
+    :param o_calculate: calculation whose results are exported
+    :type o_calculate: CalculateRadialProfile or CalculateStackRadialProfile
+    :param kind: Optional. 'profile', 'sectors' or 'stack', default is deduced from the calculation,
+        'profile' being preferred when a 'CalculateRadialProfile' holds both a profile and sectors.
+    :type kind: str
+    :return: kind of the results and dictionary of arrays: 'radius', 'mean', 'std', 'sem', 'count',
+        'bin_edges' when binned, 'sector_edges' for sectors and the parameters 'param_center',
+        'param_radius' and 'param_angle_range' (NaN when not set)
+    :rtype: tuple
+    """
+    if kind is None:
+        if hasattr(o_calculate, 'n_frames'):
+            kind = 'stack'
+        elif getattr(o_calculate, 'radial_profile', None) is not None:
+            kind = 'profile'
+        else:
+            kind = 'sectors'
+    if kind not in KINDS:
+        raise ValueError("'kind' has to be one of {}.".format(KINDS))
+    arrays = {}
+    if kind == 'profile':
+        if getattr(o_calculate, 'radial_profile', None) is None:
+            raise ValueError("No profile to export, use 'calculate' first.")
+        _occupied = o_calculate.bin_accumulator.count > 0
+        arrays['radius'] = np.asarray(o_calculate.radial_profile.index)
+        for _statistic in ['mean', 'std', 'sem']:
+            arrays[_statistic] = o_calculate.radial_profile[_statistic].values
+        arrays['count'] = o_calculate.bin_accumulator.count[_occupied]
+        _param_list = o_calculate.param_list
+    elif kind == 'sectors':
+        if getattr(o_calculate, 'sector_mean', None) is None:
+            raise ValueError("No sectors to export, use 'calculate_sectors' first.")
+        arrays['radius'] = o_calculate.sector_radius
+        for _statistic in STATISTICS:
+            arrays[_statistic] = getattr(o_calculate, 'sector_' + _statistic)
+        arrays['sector_edges'] = o_calculate.sector_edges
+        _param_list = [o_calculate.sector_params]
+    else:
+        if getattr(o_calculate, 'mean', None) is None:
+            raise ValueError("No stack profiles to export, use 'calculate' first.")
+        arrays['radius'] = o_calculate.radius
+        for _statistic in STATISTICS:
+            arrays[_statistic] = getattr(o_calculate, _statistic)
+        _param_list = o_calculate.param_list
+    if o_calculate.bin_edges is not None:
+        arrays['bin_edges'] = o_calculate.bin_edges
+    arrays['param_center'] = np.array([_param['center'] for _param in _param_list], dtype=np.float64)
+    arrays['param_radius'] = np.array([np.nan if _param['radius'] is None else _param['radius']
+                                       for _param in _param_list], dtype=np.float64)
+    arrays['param_angle_range'] = np.array([(np.nan, np.nan) if _param['angle_range'] is None
+                                            else _param['angle_range'] for _param in _param_list],
+                                           dtype=np.float64).reshape(-1, 2)
+    return kind, arrays
+
+
+def export_npz(o_calculate, file_path, metadata=None, kind=None, compressed=False):
+    """
+    Writes the results of a calculation to a numpy .npz file, the arrays being written in bulk
+
+    :param o_calculate: calculation whose results are exported
+    :type o_calculate: CalculateRadialProfile or CalculateStackRadialProfile
+    :param file_path: path of the .npz file
+    :type file_path: str
+    :param metadata: Optional. JSON serializable information saved with the results, e.g. the data file name.
+    :type metadata: dict
+    :param kind: Optional. 'profile', 'sectors' or 'stack', see 'get_result_arrays'.
+    :type kind: str
+    :param compressed: Optional. Compresses the arrays. Default: False
+    :type compressed: bool
+    """
+    kind, arrays = get_result_arrays(o_calculate, kind=kind)
+    _save = np.savez_compressed if compressed else np.savez
+    _save(file_path, kind=np.array(kind), metadata=np.array(json.dumps(metadata or {})), **arrays)
+
+
+def read_npz(file_path):
+    """
+
+    :param file_path: path of a .npz file written by 'export_npz'
+    :type file_path: str
+    :return: kind of the results, dictionary of arrays and metadata
+    :rtype: tuple
+    """
+    with np.load(file_path) as _file:
+        arrays = {_key: _file[_key] for _key in _file.files if _key not in ['kind', 'metadata']}
+        return str(_file['kind']), arrays, json.loads(str(_file['metadata']))
+
+
+def export_hdf5(o_calculate, file_path, metadata=None, kind=None, group='/'):
+    """
+    Writes the results of a calculation to a HDF5 file (h5py needed), one dataset per array,
+    the metadata being attributes of the group
+
+    :param o_calculate: calculation whose results are exported
+    :type o_calculate: CalculateRadialProfile or CalculateStackRadialProfile
+    :param file_path: path of the HDF5 file, appended to when it exists
+    :type file_path: str
+    :param metadata: Optional. Information saved with the results, each value has to be a HDF5 attribute.
+    :type metadata: dict
+    :param kind: Optional. 'profile', 'sectors' or 'stack', see 'get_result_arrays'.
+    :type kind: str
+    :param group: Optional. Group the results are written to, e.g. one group per data file. Default: '/'
+    :type group: str
+    """
+    if h5py is None:
+        raise ImportError("h5py is needed to export to HDF5, use 'export_npz' otherwise.")
+    kind, arrays = get_result_arrays(o_calculate, kind=kind)
+    with h5py.File(file_path, 'a') as _file:
+        _group = _file.require_group(group)
+        for _name, _array in arrays.items():
+            _group.create_dataset(_name, data=_array)
+        _group.attrs['kind'] = kind
+        for _key, _value in (metadata or {}).items():
+            _group.attrs[_key] = _value
+
+
+def export_csv(o_calculate, file_path, metadata=None, kind=None):
+    """
+    Writes the results of a calculation to a CSV file, one row per radius (and per sector or frame).
+    The header lines start with '#', the values are written with all their digits
+
+    :param o_calculate: calculation whose results are exported
+    :type o_calculate: CalculateRadialProfile or CalculateStackRadialProfile
+    :param file_path: path of the CSV file
+    :type file_path: str
+    :param metadata: Optional. Information written in the header, one '# key: value' line per item.
+    :type metadata: dict
+    :param kind: Optional. 'profile', 'sectors' or 'stack', see 'get_result_arrays'.
+    :type kind: str
+    """
+    kind, arrays = get_result_arrays(o_calculate, kind=kind)
+    _columns = ['radius'] + STATISTICS
+    _values = [arrays[_column] for _column in STATISTICS]
+    _radius = arrays['radius']
+    if kind == 'profile':
+        _table = np.column_stack([_radius] + _values)
+    else:
+        _n_rows = arrays['mean'].shape[0]
+        _row_index = np.repeat(np.arange(_n_rows), len(_radius))
+        _first_columns = [np.tile(_radius, _n_rows)]
+        if kind == 'sectors':
+            _columns = ['sector_start', 'sector_end'] + _columns
+            _first_columns = [arrays['sector_edges'][:-1][_row_index],
+                              arrays['sector_edges'][1:][_row_index]] + _first_columns
+        else:
+            _columns = ['frame'] + _columns
+            _first_columns = [_row_index] + _first_columns
+        _table = np.column_stack(_first_columns + [_array.ravel() for _array in _values])
+
+    _header = ['kind: ' + kind]
+    for _name in ['param_center', 'param_radius', 'param_angle_range', 'bin_edges']:
+        if _name in arrays:
+            _header.append(_name + ': ' + json.dumps(np.where(np.isnan(arrays[_name]), None,
+                                                              arrays[_name]).tolist()))
+    _header += ['{}: {}'.format(_key, _value) for _key, _value in (metadata or {}).items()]
+    with open(file_path, 'w') as _file:
+        _file.write(''.join(['# ' + _line + '\n' for _line in _header]))
+        _file.write(','.join(_columns) + '\n')
+        write_csv_rows(_file, _table)
+
+
+def write_csv_rows(file, table, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Writes a 2D array as comma separated rows, formatting a whole chunk of rows with a single
+    string operation instead of converting and joining each value
+
+    :param file: opened text file
+    :type file: file
+    :param table: 2D array of numbers
+    :type table: np.array
+    :param chunk_rows: Optional. Number of rows formatted at once.
+    :type chunk_rows: int
+    """
+    table = np.asarray(table, dtype=np.float64)
+    if table.ndim == 1:
+        table = table[:, np.newaxis]
+    _row_format = ','.join(['%.17g'] * table.shape[1]) + '\n'
+    for _start in range(0, table.shape[0], chunk_rows):
+        _chunk = table[_start: _start + chunk_rows]
+        file.write((_row_format * len(_chunk)) % tuple(_chunk.ravel().tolist()))
@@ -0,0 +1,157 @@
+import math
+import numpy as np
+
+from sectorizedradialprofile.binning import BinAccumulator
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# the kernels are compiled when numba is installed, they otherwise run as plain (slow) python, which is only
+# meant for testing them: the 'numba' engine of the calculations requires numba
+NUMBA_AVAILABLE = numba is not None
+if NUMBA_AVAILABLE:
+    _jit = numba.njit(parallel=True, cache=True)
+    _jit_serial = numba.njit(cache=True)
+    _prange = numba.prange
+else:
+    def _jit(function):
+        return function
+    _jit_serial = _jit
+    _prange = range
+
+_DEGREES = 180.0 / np.pi
+
+
+def fused_accumulate(data, window, center, radius=None, angle_range=None, bin_edges=None, accumulator=None,
+                     n_blocks=None, mask=None):
+    """
+    Accumulates the pixels of the window into radial bins with fused loops computing the radius,
+    the sector test, the NaN masking and the binning of each pixel, so that no window sized
+    temporary (radius, angle or selection array) is allocated. The rows of the window are split
+    into blocks reduced in parallel into their own partial bins, summed in block order afterwards.
+    A first loop accumulates the count and sum of each bin, a second one the squared deviations
+    to the bin means
+
+    :param data: numpy 2D or 3D array
+    :type data: np.array
+    :param window: one slice per axis of the data, see 'get_bounding_window'
+    :type window: tuple
+    :param center: coordinates in form of (x,y) or (x, y, z)
+    :type center: tuple
+    :param radius: Optional. The maximum distance from specified center.
+    :type radius: int or float
+    :param angle_range: Optional. Angular coverage in degrees, 2D only.
+    :type angle_range: tuple
+    :param bin_edges: radial bin edges starting at 0 with constant width, see 'make_bin_edges'
+    :type bin_edges: np.array
+    :param accumulator: Optional. Accumulator to add the data to, a new one is created by default.
+    :type accumulator: BinAccumulator
+    :param n_blocks: Optional. Number of blocks of rows, default is the number of numba threads.
+    :type n_blocks: int
+    :param mask: Optional. Pixels left out, see 'DetectorMask'.
+    :type mask: DetectorMask
+    :return: the accumulator holding the data
+    :rtype: BinAccumulator
+    """
+    if bin_edges is None:
+        raise ValueError("The fused engine needs 'bin_edges'.")
+    _n_bins = len(bin_edges) - 1
+    if accumulator is None:
+        accumulator = BinAccumulator(_n_bins)
+    _window_data = np.asarray(data[window])
+    _use_mask = mask is not None
+    _window_mask = np.asarray(mask.mask[window]) if _use_mask else np.zeros((1,) * _window_data.ndim, dtype=bool)
+    if _window_data.ndim == 2:
+        _window_data = _window_data[np.newaxis]
+        _window_mask = _window_mask[np.newaxis]
+        _origin = np.array([0] + [_slice.start for _slice in window], dtype=np.float64)
+        _center = np.array((0,) + tuple(center[::-1]), dtype=np.float64)
+    else:
+        _origin = np.array([_slice.start for _slice in window], dtype=np.float64)
+        _center = np.array(center[::-1], dtype=np.float64)
+    if n_blocks is None:
+        n_blocks = numba.get_num_threads() if NUMBA_AVAILABLE else 1
+    _n_rows = _window_data.shape[0] * _window_data.shape[1]
+    n_blocks = max(min(n_blocks, _n_rows), 1)
+    _args = (_window_data, _use_mask, _window_mask, _origin, _center,
+             -1.0 if radius is None else float(radius),
+             angle_range is not None,
+             0.0 if angle_range is None else float(angle_range[0]),
+             0.0 if angle_range is None else float(angle_range[1]),
+             float(bin_edges[1] - bin_edges[0]), _n_bins, n_blocks)
+
+    _count, _sum = _sum_kernel(*_args)
+    _count = _count.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        _mean = np.where(_count > 0, _sum.sum(axis=0) / _count, 0)
+    _m2 = _deviation_kernel(*_args, _mean).sum(axis=0)
+    accumulator.combine(_count, _mean, _m2)
+    return accumulator
+
+
+@_jit_serial
+def _get_bin(data, use_mask, mask, origin, center, radius, use_angle, angle_from, angle_to, bin_width, n_bins,
+             z, y, x):
+    '''bin of a pixel, -1 when it is NaN, masked or outside the radius or the angle range'''
+    _value = data[z, y, x]
+    if _value != _value:
+        return -1
+    if use_mask and mask[z, y, x]:
+        return -1
+    _dz = origin[0] + z - center[0]
+    _dy = origin[1] + y - center[1]
+    _dx = origin[2] + x - center[2]
+    _radius = math.sqrt(_dx * _dx + _dy * _dy + _dz * _dz)
+    if radius >= 0 and _radius > radius:
+        return -1
+    if use_angle:
+        _angle = (180.0 - math.atan2(_dx, _dy) * _DEGREES) % 360.0
+        if angle_from <= angle_to:
+            if _angle < angle_from or _angle > angle_to:
+                return -1
+        elif angle_to < _angle < angle_from:
+            return -1
+    return min(int(_radius / bin_width), n_bins - 1)
+
+
+@_jit
+def _sum_kernel(data, use_mask, mask, origin, center, radius, use_angle, angle_from, angle_to, bin_width, n_bins,
+                n_blocks):
+    '''partial count and sum of each bin, one row of partials per block of rows'''
+    _n_y = data.shape[1]
+    _n_rows = data.shape[0] * _n_y
+    count = np.zeros((n_blocks, n_bins), dtype=np.int64)
+    total = np.zeros((n_blocks, n_bins), dtype=np.float64)
+    for _block in _prange(n_blocks):
+        for _row in range(_block * _n_rows // n_blocks, (_block + 1) * _n_rows // n_blocks):
+            _z = _row // _n_y
+            _y = _row % _n_y
+            for _x in range(data.shape[2]):
+                _bin = _get_bin(data, use_mask, mask, origin, center, radius, use_angle, angle_from, angle_to,
+                                bin_width, n_bins, _z, _y, _x)
+                if _bin >= 0:
+                    count[_block, _bin] += 1
+                    total[_block, _bin] += data[_z, _y, _x]
+    return count, total
+
+
+@_jit
+def _deviation_kernel(data, use_mask, mask, origin, center, radius, use_angle, angle_from, angle_to, bin_width,
+                      n_bins, n_blocks, mean):
+    '''partial sum of the squared deviations to the mean of each bin, one row of partials per block of rows'''
+    _n_y = data.shape[1]
+    _n_rows = data.shape[0] * _n_y
+    m2 = np.zeros((n_blocks, n_bins), dtype=np.float64)
+    for _block in _prange(n_blocks):
+        for _row in range(_block * _n_rows // n_blocks, (_block + 1) * _n_rows // n_blocks):
+            _z = _row // _n_y
+            _y = _row % _n_y
+            for _x in range(data.shape[2]):
+                _bin = _get_bin(data, use_mask, mask, origin, center, radius, use_angle, angle_from, angle_to,
+                                bin_width, n_bins, _z, _y, _x)
+                if _bin >= 0:
+                    _deviation = data[_z, _y, _x] - mean[_bin]
+                    m2[_block, _bin] += _deviation * _deviation
+    return m2
@@ -0,0 +1,589 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse
+
+from sectorizedradialprofile.binning import BinAccumulator, radius_to_bin_index, bin_centers
+
+
+class SectorGeometry(object):
+
+    def __init__(self, shape: tuple, center: tuple, radius=None, angle_range=None, bin_edges=None, sub_window=None,
+                 sector_edges=None, mask=None):
+        """
+        Pixel to bin assignment of one set of parameters, compiled once for a given data shape
+
+        :param shape: shape of the data, '(y, x)' or '(z, y, x)'
+        :type shape: tuple
+        :param center: Origin of the radial plot, '(x0, y0)' or '(x0, y0, z0)'.
+        :type center: tuple
+        :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
+        :type radius: int or float
+        :param angle_range: Angular coverage in degrees '(0, 360)'. Optional, default 'None' used to include all.
+        :type angle_range: tuple
+        :param bin_edges: Optional radial bin edges (see 'make_bin_edges'), default 'None' gives one bin per
+            distinct radius.
+        :type bin_edges: np.array
+        :param sub_window: Optional. One slice per axis restricting the geometry to a sub-array of the data,
+            e.g. a slab of a volume.
+        :type sub_window: tuple
+        :param sector_edges: Optional. Increasing angles in degrees within (0, 360) splitting the selection into
+            contiguous sectors, 2D only. The bin of a pixel then combines its sector and its radius,
+            'sector * n_radial_bins + radial bin'.
+        :type sector_edges: list
+        :param mask: Optional. Pixels left out of the selection, see 'DetectorMask'.
+        :type mask: DetectorMask or np.array
+        """
+        self._set_params(shape=shape, center=center, radius=radius, angle_range=angle_range, bin_edges=bin_edges,
+                         sub_window=sub_window, sector_edges=sector_edges, mask=mask)
+        self.compile()
+
+    def _set_params(self, shape, center, radius, angle_range, bin_edges, sub_window=None, sector_edges=None,
+                    mask=None):
+        self.shape = tuple(int(_len) for _len in shape)
+        self.center = tuple(float(_each) for _each in center)
+        self.radius = None if radius is None else float(radius)
+        self.angle_range = None if angle_range is None else tuple(float(_each) for _each in angle_range)
+        self.bin_edges = None if bin_edges is None else np.asarray(bin_edges, dtype=np.float64)
+        self.sub_window = None if sub_window is None else tuple(slice(*_slice.indices(_len)[:2])
+                                                                for _slice, _len in zip(sub_window, self.shape))
+        if len(self.center) != len(self.shape):
+            raise ValueError("'center' input is not dimensionally correct for input data.")
+        self.sector_edges = None if sector_edges is None else np.asarray(sector_edges, dtype=np.float64)
+        self.n_sectors = 1 if self.sector_edges is None else len(self.sector_edges) - 1
+        self.mask = get_detector_mask(mask, self.shape)
+        self.mask_key = None if self.mask is None else self.mask.key
+        if (self.angle_range is not None or self.sector_edges is not None) and len(self.shape) != 2:
+            raise ValueError('Angular range selection is not available for 3D data.')
+        if self.sector_edges is not None:
+            if self.angle_range is not None:
+                raise ValueError("'sector_edges' and 'angle_range' can not be used together.")
+            _validate_sector_edges(self.sector_edges)
+
+    @property
+    def key(self):
+        return make_geometry_key(self.shape, self.center, self.radius, self.angle_range, self.bin_edges,
+                                 self.sub_window, self.sector_edges, mask_key=self.mask_key)
+
+    def compile(self):
+        '''select the pixels of the window within the radius and the sector, and not masked, and assign their bin'''
+        _angle_range = self.angle_range
+        if self.sector_edges is not None:
+            _angle_range = (self.sector_edges[0], self.sector_edges[-1])
+        self.window = get_bounding_window(self.shape, self.center, self.radius, _angle_range)
+        if self.sub_window is not None:
+            self.window = intersect_windows(self.window, self.sub_window)
+        _offsets = get_window_offsets(self.window, self.center)
+        radius_array = calculate_radius(_offsets)
+        inside_indices = np.ones(radius_array.shape, dtype=bool)
+        if self.radius is not None:
+            inside_indices = radius_array <= self.radius
+        if _angle_range is not None:
+            array_angle_deg = calculate_angle_deg(_offsets[0], _offsets[1])
+            inside_indices = np.logical_and(inside_indices, get_angle_range_indices(array_angle_deg, _angle_range))
+        if self.mask is not None:
+            inside_indices = np.logical_and(inside_indices, np.invert(self.mask.mask[self.window]))
+        self.pixel_indices = np.flatnonzero(inside_indices)
+        _radius = radius_array.ravel()[self.pixel_indices]
+        if self.bin_edges is None:
+            self.bin_radius, self.bin_index = np.unique(_radius, return_inverse=True)
+        else:
+            self.bin_index = radius_to_bin_index(_radius, self.bin_edges)
+            self.bin_radius = bin_centers(self.bin_edges)
+        if self.sector_edges is not None:
+            _sector_index = np.searchsorted(self.sector_edges, array_angle_deg.ravel()[self.pixel_indices],
+                                            side='right') - 1
+            np.minimum(_sector_index, self.n_sectors - 1, out=_sector_index)  # last edge belongs to last sector
+            self.bin_index = _sector_index * len(self.bin_radius) + self.bin_index
+        self.n_bins = self.n_sectors * len(self.bin_radius)
+
+    @property
+    def nbytes(self):
+        '''memory, in bytes, of the compiled arrays, the flat indices included once computed'''
+        _arrays = [self.pixel_indices, self.bin_index, self.bin_radius, getattr(self, '_flat_indices', None)]
+        return sum([_array.nbytes for _array in _arrays if _array is not None])
+
+    @property
+    def flat_indices(self):
+        '''indices of the selected pixels in the flattened data, computed on first use'''
+        if getattr(self, '_flat_indices', None) is None:
+            _window_shape = tuple(_slice.stop - _slice.start for _slice in self.window)
+            _coordinates = np.unravel_index(self.pixel_indices, _window_shape)
+            _coordinates = [_index + _slice.start for _index, _slice in zip(_coordinates, self.window)]
+            self._flat_indices = np.ravel_multi_index(_coordinates, self.shape)
+        return self._flat_indices
+
+    def gather_pixels(self, data):
+        """
+        Picks the selected pixels of the data, NaN included, in the order of 'pixel_indices'.
+        Only the selected pixels are copied, in their original dtype
+
+        :param data: array of the same shape as the geometry
+        :type data: np.array
+        :return: value of each selected pixel
+        :rtype: np.array
+        """
+        if tuple(np.shape(data)) != self.shape:
+            raise ValueError("'data' shape {} does not match the geometry shape {}.".format(np.shape(data),
+                                                                                           self.shape))
+        if isinstance(data, np.ndarray) and data.flags.c_contiguous:
+            return data.reshape(-1)[self.flat_indices]
+        return np.asarray(data[self.window]).reshape(-1)[self.pixel_indices]
+
+    def gather(self, data):
+        """
+        Picks the selected pixels of the data, leaving out the NaN ones, see 'gather_pixels'
+
+        :param data: array of the same shape as the geometry
+        :type data: np.array
+        :return: bin index and value of each selected pixel
+        :rtype: tuple
+        """
+        values = self.gather_pixels(data)
+        bin_index = self.bin_index
+        if values.dtype.kind in 'fc':
+            _not_nan_indices = np.invert(np.isnan(values))
+            if not _not_nan_indices.all():
+                values = values[_not_nan_indices]
+                bin_index = bin_index[_not_nan_indices]
+        return bin_index, values
+
+    def accumulate(self, data, accumulator=None):
+        """
+
+        :param data: array of the same shape as the geometry
+        :type data: np.array
+        :param accumulator: Optional. Accumulator to add the data to, a new one is created by default.
+        :type accumulator: BinAccumulator
+        :return: the accumulator holding the data
+        :rtype: BinAccumulator
+        """
+        if accumulator is None:
+            accumulator = BinAccumulator(self.n_bins)
+        accumulator.add(*self.gather(data))
+        return accumulator
+
+    def make_operator(self, bin_map=None, n_bins=None, dtype=np.float64):
+        """
+        Sparse pixel to bin operator, so that the bin sums of flattened windows are one matrix product
+
+        :param bin_map: Optional. New index of each bin, to merge geometries into common bins.
+        :type bin_map: np.array
+        :param n_bins: Optional. Number of common bins when 'bin_map' is used.
+        :type n_bins: int
+        :param dtype: dtype of the operator, has to match the dtype of the data it is applied to
+        :type dtype: np.dtype
+        :return: matrix of shape (number of pixels in the window, number of bins)
+        :rtype: scipy.sparse.csr_matrix
+        """
+        _bin_index = self.bin_index if bin_map is None else bin_map[self.bin_index]
+        _n_bins = self.n_bins if n_bins is None else n_bins
+        _window_size = int(np.prod([_slice.stop - _slice.start for _slice in self.window]))
+        return scipy.sparse.csr_matrix((np.ones(len(self.pixel_indices), dtype=dtype),
+                                        (self.pixel_indices, _bin_index)),
+                                       shape=(_window_size, _n_bins))
+
+    def save(self, file_path):
+        '''save the compiled geometry to a numpy .npz file'''
+        np.savez(file_path,
+                 shape=np.array(self.shape),
+                 center=np.array(self.center),
+                 radius=np.array([] if self.radius is None else [self.radius]),
+                 angle_range=np.array([] if self.angle_range is None else self.angle_range),
+                 bin_edges=np.array([] if self.bin_edges is None else self.bin_edges),
+                 sub_window=np.array([] if self.sub_window is None else [[_slice.start, _slice.stop]
+                                                                         for _slice in self.sub_window]),
+                 sector_edges=np.array([] if self.sector_edges is None else self.sector_edges),
+                 mask_key=np.array('' if self.mask_key is None else self.mask_key),
+                 window=np.array([[_slice.start, _slice.stop] for _slice in self.window]),
+                 pixel_indices=self.pixel_indices,
+                 bin_index=self.bin_index,
+                 bin_radius=self.bin_radius)
+
+    @classmethod
+    def load(cls, file_path, mask=None):
+        '''load a geometry saved with 'save' without compiling it again, with the mask it was compiled with'''
+        with np.load(file_path) as _file:
+            geometry = cls.__new__(cls)
+            geometry._set_params(shape=_file['shape'],
+                                 center=_file['center'],
+                                 radius=_file['radius'][0] if len(_file['radius']) else None,
+                                 angle_range=_file['angle_range'] if len(_file['angle_range']) else None,
+                                 bin_edges=_file['bin_edges'] if len(_file['bin_edges']) else None,
+                                 sub_window=tuple(slice(int(_start), int(_stop))
+                                                  for _start, _stop in _file['sub_window']) or None,
+                                 sector_edges=_file['sector_edges'] if len(_file['sector_edges']) else None,
+                                 mask=mask)
+            _mask_key = str(_file['mask_key']) if 'mask_key' in _file.files else ''
+            if _mask_key != ('' if geometry.mask_key is None else geometry.mask_key):
+                raise ValueError("'{}' was not compiled with this mask.".format(file_path))
+            geometry.window = tuple(slice(int(_start), int(_stop)) for _start, _stop in _file['window'])
+            geometry.pixel_indices = _file['pixel_indices']
+            geometry.bin_index = _file['bin_index']
+            geometry.bin_radius = _file['bin_radius']
+        geometry.n_bins = geometry.n_sectors * len(geometry.bin_radius)
+        return geometry
+
+
+class GeometryCache(object):
+
+    def __init__(self, max_size=16, cache_dir=None, max_bytes=2 ** 28):
+        """
+        Least recently used cache of compiled geometries, which can be shared by threads.
+        A geometry larger than 'max_bytes' is returned without being kept
+
+        :param max_size: maximum number of geometries kept in memory
+        :type max_size: int
+        :param cache_dir: Optional. Folder where the compiled geometries are saved and reloaded from.
+        :type cache_dir: str
+        :param max_bytes: Optional. Maximum memory, in bytes, of the geometries kept in memory. Default: 256 MiB
+        :type max_bytes: int
+        """
+        if max_size < 1:
+            raise ValueError("'max_size' has to be at least 1.")
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._geometries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._geometries)
+
+    def __contains__(self, key):
+        return key in self._geometries
+
+    @property
+    def nbytes(self):
+        '''memory, in bytes, of the geometries kept in memory'''
+        with self._lock:
+            return sum([_geometry.nbytes for _geometry in self._geometries.values()])
+
+    def get(self, shape, center, radius=None, angle_range=None, bin_edges=None, sector_edges=None, mask=None):
+        """
+        Returns the geometry of the parameters, compiling it (or loading it from 'cache_dir') only once
+
+        :return: compiled geometry
+        :rtype: SectorGeometry
+        """
+        mask = get_detector_mask(mask, shape)
+        key = make_geometry_key(shape, center, radius, angle_range, bin_edges, sector_edges=sector_edges,
+                                mask_key=None if mask is None else mask.key)
+        with self._lock:
+            if key in self._geometries:
+                self._geometries.move_to_end(key)
+                return self._geometries[key]
+            _file_path = self._get_file_path(key)
+            if _file_path is not None and os.path.exists(_file_path):
+                geometry = SectorGeometry.load(_file_path, mask=mask)
+            else:
+                geometry = SectorGeometry(shape=shape, center=center, radius=radius, angle_range=angle_range,
+                                          bin_edges=bin_edges, sector_edges=sector_edges, mask=mask)
+                if _file_path is not None:
+                    geometry.save(_file_path)
+            self._geometries[key] = geometry
+            self._evict()
+            return geometry
+
+    def _evict(self):
+        '''drop the least recently used geometries until the cache fits its size and memory limits'''
+        _nbytes = self.nbytes
+        while len(self._geometries) > self.max_size or (self._geometries and _nbytes > self.max_bytes):
+            _nbytes -= self._geometries.popitem(last=False)[1].nbytes
+
+    def clear(self):
+        '''empty the in-memory cache, the saved geometries are kept'''
+        with self._lock:
+            self._geometries.clear()
+
+    def _get_file_path(self, key):
+        if self.cache_dir is None:
+            return None
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        _name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, 'geometry_' + _name + '.npz')
+
+
+default_geometry_cache = GeometryCache()
+
+
+def get_geometry(shape, center, radius=None, angle_range=None, bin_edges=None, sector_edges=None, mask=None):
+    """
+    Compiled geometry of the parameters from the default cache
+
+    :return: compiled geometry
+    :rtype: SectorGeometry
+    """
+    return default_geometry_cache.get(shape=shape, center=center, radius=radius, angle_range=angle_range,
+                                      bin_edges=bin_edges, sector_edges=sector_edges, mask=mask)
+
+
+def make_geometry_key(shape, center, radius=None, angle_range=None, bin_edges=None, sub_window=None,
+                      sector_edges=None, mask_key=None):
+    """
+    Hashable key identifying a geometry
+
+    :return: key
+    :rtype: tuple
+    """
+    _key = (tuple(int(_len) for _len in shape),
+            tuple(float(_each) for _each in center),
+            None if radius is None else float(radius),
+            None if angle_range is None else tuple(float(_each) for _each in angle_range))
+    _key += (None if bin_edges is None else tuple(float(_edge) for _edge in bin_edges),)
+    if sub_window is not None:
+        _key += (tuple((_slice.start, _slice.stop) for _slice in sub_window),)
+    if sector_edges is not None:
+        _key += (('sectors',) + tuple(float(_edge) for _edge in sector_edges),)
+    if mask_key is not None:
+        _key += (('mask', mask_key),)
+    return _key
+
+
+class DetectorMask(object):
+
+    def __init__(self, mask):
+        """
+        Static mask of the pixels left out of every profile, e.g. dead pixels, chip gaps and the beam stop.
+        The mask is copied and hashed once, the masked pixels being left out of the compiled selections
+        instead of being set to NaN in each frame
+
+        :param mask: boolean array of the data shape, True for the pixels left out
+        :type mask: np.array
+        """
+        _mask = np.array(mask, dtype=bool)
+        if _mask.ndim not in [2, 3]:
+            raise ValueError("'mask' has to be a 2D or 3D array.")
+        _mask.setflags(write=False)
+        self.mask = _mask
+        self.shape = _mask.shape
+        self.key = hashlib.sha1(repr(self.shape).encode() + np.packbits(_mask).tobytes()).hexdigest()
+
+    def __len__(self):
+        '''number of pixels left out'''
+        return int(np.count_nonzero(self.mask))
+
+    @classmethod
+    def from_pixels(cls, shape, pixels):
+        """
+
+        :param shape: shape of the data, '(y, x)' or '(z, y, x)'
+        :type shape: tuple
+        :param pixels: coordinates of the bad pixels, '[(x, y), ...]' or '[(x, y, z), ...]'
+        :type pixels: list
+        :return: mask of the bad pixels
+        :rtype: DetectorMask
+        """
+        _mask = np.zeros(shape, dtype=bool)
+        _pixels = np.asarray(pixels, dtype=np.intp).reshape(-1, len(_mask.shape))
+        _mask[tuple(_pixels[:, ::-1].T)] = True
+        return cls(_mask)
+
+
+def get_detector_mask(mask, shape=None):
+    """
+
+    :param mask: 'DetectorMask', boolean array (True for the pixels left out) or None
+    :type mask: DetectorMask or np.array
+    :param shape: Optional. Shape of the data the mask has to match.
+    :type shape: tuple
+    :return: the mask as a 'DetectorMask', None when no mask is given
+    :rtype: DetectorMask
+    """
+    if mask is None:
+        return None
+    if not isinstance(mask, DetectorMask):
+        mask = DetectorMask(mask)
+    if shape is not None and tuple(mask.shape) != tuple(int(_len) for _len in shape):
+        raise ValueError("'mask' shape {} does not match the data shape {}.".format(mask.shape, tuple(shape)))
+    return mask
+
+
+def _validate_sector_edges(sector_edges):
+    if len(sector_edges) < 2:
+        raise ValueError("'sector_edges' needs at least 2 edges.")
+    if np.any(np.diff(sector_edges) <= 0):
+        raise ValueError("'sector_edges' has to be increasing.")
+    if sector_edges[0] < 0 or sector_edges[-1] > 360:
+        raise ValueError("'sector_edges' has to be within (0, 360).")
+
+
+def get_bounding_window(shape, center, radius=None, angle_range=None):
+    """
+    Smallest sub-array holding all the pixels within the radius (and the sector in 2D) of the center
+
+    :param shape: shape of the data, '(y, x)' or '(z, y, x)'
+    :type shape: tuple
+    :param center: coordinates in form of (x,y) or (x, y, z)
+    :type center: tuple
+    :param radius: optional maximum distance from the center
+    :type radius: int or float
+    :param angle_range: optional sector in degrees, 2D only
+    :type angle_range: tuple
+    :return: one slice per axis of the data
+    :rtype: tuple
+    """
+    _center = np.array(center[::-1], dtype=np.float64)  # same axis order as the shape
+    if radius is None:
+        if angle_range is None:
+            return tuple(slice(0, _len) for _len in shape)
+        radius = np.sqrt(np.sum(np.maximum(_center, np.array(shape) - 1 - _center) ** 2))
+    if angle_range is None:
+        _low = _center - radius
+        _high = _center + radius
+    else:
+        # the sector is bounded by its center, its two arc ends and the cardinal points it goes through
+        _cardinal_angles = np.array([0, 90, 180, 270])
+        _angles = np.radians(np.concatenate((angle_range,
+                                             _cardinal_angles[get_angle_range_indices(_cardinal_angles,
+                                                                                      angle_range)])))
+        _y = np.concatenate(([_center[0]], _center[0] - radius * np.cos(_angles)))
+        _x = np.concatenate(([_center[1]], _center[1] + radius * np.sin(_angles)))
+        _low = np.array([_y.min(), _x.min()])
+        _high = np.array([_y.max(), _x.max()])
+    window = []
+    for _start, _stop, _len in zip(np.floor(_low), np.ceil(_high), shape):
+        _start = int(min(max(_start, 0), _len))
+        _stop = int(min(max(_stop + 1, _start), _len))
+        window.append(slice(_start, _stop))
+    return tuple(window)
+
+
+def intersect_windows(window, other_window):
+    """
+    Overlap of two windows, empty slices when they do not overlap
+
+    :return: one slice per axis
+    :rtype: tuple
+    """
+    intersection = []
+    for _slice, _other_slice in zip(window, other_window):
+        _start = max(_slice.start, _other_slice.start)
+        _stop = max(min(_slice.stop, _other_slice.stop), _start)
+        intersection.append(slice(_start, _stop))
+    return tuple(intersection)
+
+
+def get_window_offsets(window, center):
+    """
+    Offsets from the center of the pixels of the window, as open grids (one broadcastable
+    1D array per axis) so that no full size coordinate array is created
+
+    :param window: one slice per axis of the data, see 'get_bounding_window'
+    :type window: tuple
+    :param center: coordinates in form of (x,y) or (x, y, z)
+    :type center: tuple
+    :return: offsets in the data axis order, '[y, x]' or '[z, y, x]'
+    :rtype: list
+    """
+    _n_axis = len(window)
+    offsets = []
+    for _axis, (_slice, _center) in enumerate(zip(window, center[::-1])):
+        _shape = [1] * _n_axis
+        _shape[_axis] = -1
+        offsets.append((np.arange(_slice.start, _slice.stop, dtype=np.float64) - _center).reshape(_shape))
+    return offsets
+
+
+def calculate_radius(offsets):
+    """
+    Distance to the center of each pixel, allocating a single array of the window size
+
+    :param offsets: open grids of the offsets, see 'get_window_offsets'
+    :type offsets: list
+    :return: radius of each pixel
+    :rtype: np.array
+    """
+    _x_offset = offsets[-1]
+    _y_offset = offsets[-2]
+    squared_radius = _x_offset ** 2 + _y_offset ** 2
+    if len(offsets) == 3:
+        squared_radius = squared_radius + offsets[0] ** 2
+    return np.sqrt(squared_radius, out=squared_radius)
+
+
+def is_half_integer_center(center):
+    '''True when each coordinate of the center is on the pixel grid or half way between two pixels'''
+    return all([float(2 * _each).is_integer() for _each in center])
+
+
+def calculate_integer_squared_radius(window, center):
+    """
+    Exact squared distance to the center of each pixel as integers, for a center on the pixel grid
+    (scale 1) or with half integer coordinates (scale 2, the squared distances being multiplied by 4)
+
+    :param window: one slice per axis of the data, see 'get_bounding_window'
+    :type window: tuple
+    :param center: coordinates in form of (x,y) or (x, y, z), see 'is_half_integer_center'
+    :type center: tuple
+    :return: squared distance of each pixel times the squared scale, and the scale
+    :rtype: tuple
+    """
+    _scale = 1 if all([float(_each).is_integer() for _each in center]) else 2
+    _n_axis = len(window)
+    squared_radius = 0
+    for _axis, (_slice, _center) in enumerate(zip(window, center[::-1])):
+        _shape = [1] * _n_axis
+        _shape[_axis] = -1
+        _offset = np.arange(_slice.start, _slice.stop, dtype=np.int64) * _scale - int(round(_center * _scale))
+        squared_radius = squared_radius + (_offset * _offset).reshape(_shape)
+    return squared_radius, _scale
+
+
+def get_max_squared_radius(radius, scale=1):
+    """
+    Largest integer squared distance (times the squared scale) whose distance is within the radius,
+    the distance being computed as 'sqrt(squared_radius / scale ** 2)' as the float radius arrays
+
+    :param radius: maximum distance from the center
+    :type radius: int or float
+    :param scale: scale of the squared distances, see 'calculate_integer_squared_radius'
+    :type scale: int
+    :return: largest squared distance
+    :rtype: int
+    """
+    max_squared_radius = int(np.floor((radius * scale) ** 2))
+    while np.sqrt((max_squared_radius + 1) / scale ** 2) <= radius:
+        max_squared_radius += 1
+    while max_squared_radius >= 0 and np.sqrt(max_squared_radius / scale ** 2) > radius:
+        max_squared_radius -= 1
+    return max_squared_radius
+
+
+def calculate_angle_deg(y_offset, x_offset):
+    """
+    Angle of each pixel in degrees, 0 being the top vertical and going clockwise, within [0, 360[
+
+    :param y_offset: row offsets from the center
+    :type y_offset: np.array
+    :param x_offset: column offsets from the center
+    :type x_offset: np.array
+    :return: angle of each pixel
+    :rtype: np.array
+    """
+    array_angle_deg = np.degrees(np.arctan2(x_offset, y_offset))
+    np.subtract(180, array_angle_deg, out=array_angle_deg)
+    return np.mod(array_angle_deg, 360, out=array_angle_deg)
+
+
+def get_angle_range_indices(array_angle_deg, angle_range):
+    """
+    Boolean array of the angles within the range, bounds included. A range with
+    a start greater than its end wraps around 0 degree, e.g. (350, 10)
+
+    :param array_angle_deg: angle of each pixel in degrees
+    :type array_angle_deg: np.array
+    :param angle_range: angular coverage in degrees
+    :type angle_range: tuple
+    :return: boolean array of the pixels inside the range
+    :rtype: np.array
+    """
+    _from, _to = angle_range
+    left_angles_indices = array_angle_deg >= _from
+    right_angles_indices = array_angle_deg <= _to
+    if _from <= _to:
+        return np.logical_and(left_angles_indices, right_angles_indices)
+    return np.logical_or(left_angles_indices, right_angles_indices)
@@ -0,0 +1,113 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+
+class StageRecord(object):
+
+    def __init__(self, stage: str, param_index=None, n_pixels=None):
+        """
+        Measurements of one stage of a calculation
+
+        :param stage: name of the stage, e.g. 'radius', 'sort' or 'accumulate'
+        :type stage: str
+        :param param_index: Optional. Index of the parameter set (see 'add_params') the stage was run for.
+        :type param_index: int
+        :param n_pixels: Optional. Number of pixels the stage processed.
+        :type n_pixels: int
+        """
+        self.stage = stage
+        self.param_index = param_index
+        self.n_pixels = n_pixels
+        self.wall_time = None
+        self.allocated_bytes = None
+
+    def __repr__(self):
+        return 'StageRecord(stage={!r}, param_index={}, wall_time={}, allocated_bytes={}, n_pixels={})'.format(
+            self.stage, self.param_index, self.wall_time, self.allocated_bytes, self.n_pixels)
+
+
+class ProfileStats(object):
+
+    def __init__(self, callback=None, trace_memory=False):
+        """
+        Wall time, allocated memory and number of pixels of each stage of the calculations it is given to,
+        e.g. 'CalculateRadialProfile(data, stats=ProfileStats())'. Calculations without stats are not measured
+
+        :param callback: Optional. Function called with the 'StageRecord' of each stage as soon as it ends.
+        :type callback: callable
+        :param trace_memory: Optional. Measures the peak of memory allocated by each stage with 'tracemalloc',
+            which slows the allocations down. Default: False
+        :type trace_memory: bool
+        """
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.records = []
+
+    def __len__(self):
+        return len(self.records)
+
+    @contextmanager
+    def measure(self, stage, param_index=None, n_pixels=None):
+        """
+        Measures the stage run within the context, the number of pixels can be set on the yielded record
+
+        :param stage: name of the stage
+        :type stage: str
+        :param param_index: Optional. Index of the parameter set.
+        :type param_index: int
+        :param n_pixels: Optional. Number of pixels the stage processes.
+        :type n_pixels: int
+        """
+        record = StageRecord(stage=stage, param_index=param_index, n_pixels=n_pixels)
+        _started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+            elif hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            _start_memory = tracemalloc.get_traced_memory()[0]
+        _start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - _start_time
+            if self.trace_memory:
+                _current_memory, _peak_memory = tracemalloc.get_traced_memory()
+                if not hasattr(tracemalloc, 'reset_peak') and not _started_tracing:
+                    _peak_memory = _current_memory
+                record.allocated_bytes = max(_peak_memory - _start_memory, 0)
+                if _started_tracing:
+                    tracemalloc.stop()
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def to_dataframe(self):
+        """
+
+        :return: one row per stage run with 'stage', 'param_index', 'wall_time', 'allocated_bytes'
+            and 'n_pixels' columns
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame([[_record.stage, _record.param_index, _record.wall_time, _record.allocated_bytes,
+                              _record.n_pixels] for _record in self.records],
+                            columns=['stage', 'param_index', 'wall_time', 'allocated_bytes', 'n_pixels'])
+
+    def summary(self):
+        """
+        Total wall time, largest allocation and total number of pixels of each stage
+
+        :return: one row per stage, in the order the stages were first run
+        :rtype: pd.DataFrame
+        """
+        df = self.to_dataframe()
+        return df.groupby('stage', sort=False).agg({'wall_time': 'sum',
+                                                    'allocated_bytes': 'max',
+                                                    'n_pixels': 'sum'})
+
+    def clear(self):
+        '''forget the records'''
+        self.records = []
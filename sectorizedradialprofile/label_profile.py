@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.binning import BinAccumulator
+from sectorizedradialprofile.slab import get_slab_windows
+
+
+def calculate_label_profiles(data: np.ndarray, labels: np.ndarray, objects, bin_width=1, memory_budget=2 ** 28):
+    """
+    Radial profile of every labelled object of a volume (or image) in a single sweep, e.g. of the
+    label volume exported by Amira-Avizo with its label analysis. The profile of an object is made
+    of its own pixels only, binned by their distance to its barycenter. Each labelled pixel is
+    assigned to a combined '(object, radial bin)' bin, the data being processed slab by slab.
+
+    :param data: numpy 2D or 3D array, or 'np.memmap'
+    :type data: np.array
+    :param labels: integer array of the same shape as the data, 0 being the background
+    :type labels: np.array
+    :param objects: Amira-Avizo label analysis with 'index' (the label), 'BaryCenterX', 'BaryCenterY' and
+        'BaryCenterZ' columns, or '{label: center}' with centers '(x0, y0)' or '(x0, y0, z0)'
+    :type objects: pd.DataFrame or dict
+    :param bin_width: Optional. Width of the radial bins. Default: 1
+    :type bin_width: int or float
+    :param memory_budget: Optional. Memory in bytes a slab can use. Default: 256 MiB
+    :type memory_budget: int
+    :return: radial profile of each object named 'obj_<label>', with 'mean', 'std' and 'sem' columns
+    :rtype: dict
+    """
+    if tuple(data.shape) != tuple(labels.shape):
+        raise ValueError("'labels' shape {} does not match the data shape {}.".format(labels.shape, data.shape))
+    if len(data.shape) not in [2, 3]:
+        raise ValueError('Only 2D or 3D np.array are supported.')
+    if bin_width <= 0:
+        raise ValueError("'bin_width' has to be greater than zero.")
+    _label_list, _center_array = get_label_centers(objects, dimension=len(data.shape))
+    if len(_label_list) == 0:
+        raise ValueError("'objects' is empty.")
+    if np.any(_label_list <= 0):
+        raise ValueError('Labels have to be positive, 0 being the background.')
+    _n_objects = len(_label_list)
+    # object of each label, -1 for the labels which are not in the table
+    _object_lookup = np.full(_label_list.max() + 1, -1, dtype=np.intp)
+    _object_lookup[_label_list] = np.arange(_n_objects)
+    _center_array = _center_array[:, ::-1]  # data axis order
+
+    _n_bins = 1
+    accumulator = BinAccumulator(_n_objects * _n_bins)
+    _full_window = tuple(slice(0, _len) for _len in data.shape)
+    _itemsize = data.dtype.itemsize + labels.dtype.itemsize
+    for _slab_window in get_slab_windows(_full_window, memory_budget, itemsize=_itemsize):
+        _slab_labels = np.asarray(labels[_slab_window])
+        _coordinates = np.nonzero(_slab_labels > 0)
+        _object_index = _slab_labels[_coordinates]
+        _in_table = _object_index < len(_object_lookup)
+        _object_index = np.where(_in_table, _object_lookup[np.where(_in_table, _object_index, 0)], -1)
+        _kept = _object_index >= 0
+        _object_index = _object_index[_kept]
+        _coordinates = [_axis_coordinates[_kept] for _axis_coordinates in _coordinates]
+        _values = np.asarray(data[_slab_window])[tuple(_coordinates)]
+        if _values.dtype.kind in 'fc':
+            _not_nan = np.invert(np.isnan(_values))
+            _values = _values[_not_nan]
+            _object_index = _object_index[_not_nan]
+            _coordinates = [_axis_coordinates[_not_nan] for _axis_coordinates in _coordinates]
+        if len(_values) == 0:
+            continue
+        _squared_radius = np.zeros(len(_values), dtype=np.float64)
+        _slab_start = _slab_window[0].start
+        for _axis, _axis_coordinates in enumerate(_coordinates):
+            _offset = _axis_coordinates + (_slab_start if _axis == 0 else 0) - _center_array[_object_index, _axis]
+            _squared_radius += _offset * _offset
+        _bin_index = (np.sqrt(_squared_radius) / bin_width).astype(np.intp)
+        _slab_n_bins = int(_bin_index.max()) + 1
+        if _slab_n_bins > _n_bins:
+            accumulator = _restride(accumulator, _n_objects, _n_bins, _slab_n_bins)
+            _n_bins = _slab_n_bins
+        _slab_accumulator = BinAccumulator(_n_objects * _n_bins)
+        _slab_accumulator.add(_object_index * _n_bins + _bin_index, _values)
+        accumulator.merge(_slab_accumulator)
+
+    _radius = (np.arange(_n_bins) + 0.5) * bin_width
+    profile_dict = {}
+    for _label, _accumulator in zip(_label_list, accumulator.split(_n_objects)):
+        profile_dict['obj_' + str(_label)] = _accumulator.to_dataframe(_radius)
+    return profile_dict
+
+
+def get_label_centers(objects, dimension=3):
+    """
+
+    :param objects: Amira-Avizo label analysis or '{label: center}', see 'calculate_label_profiles'
+    :type objects: pd.DataFrame or dict
+    :param dimension: dimension of the data, 2 or 3
+    :type dimension: int
+    :return: labels and centers '(x0, y0)' or '(x0, y0, z0)' of the objects
+    :rtype: tuple
+    """
+    if isinstance(objects, pd.DataFrame):
+        _columns = ['BaryCenterX', 'BaryCenterY', 'BaryCenterZ'][:dimension]
+        label_list = objects['index'].values.astype(np.intp)
+        center_array = objects[_columns].values.astype(np.float64)
+    else:
+        label_list = np.array(list(objects.keys()), dtype=np.intp)
+        center_array = np.array([tuple(_center) for _center in objects.values()], dtype=np.float64)
+    if center_array.shape != (len(label_list), dimension):
+        raise ValueError("The centers are not dimensionally correct for input data.")
+    if len(np.unique(label_list)) != len(label_list):
+        raise ValueError('Each label can only be given once.')
+    return label_list, center_array
+
+
+def _restride(accumulator, n_rows, n_bins, new_n_bins):
+    '''accumulator of combined bins 'row * n_bins + bin' moved to rows of more bins'''
+    _bin_map = (np.arange(n_rows)[:, np.newaxis] * new_n_bins + np.arange(n_bins)).ravel()
+    return BinAccumulator(n_rows * new_n_bins).merge(accumulator, bin_map=_bin_map)
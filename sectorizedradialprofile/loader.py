@@ -0,0 +1,250 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+try:
+    from astropy.io import fits
+except ImportError:
+    fits = None
+
+FITS_BLOCK_SIZE = 2880
+FITS_CARD_SIZE = 80
+# dtype of the data of a FITS image, by BITPIX value, FITS being big endian
+FITS_DTYPES = {8: np.dtype('u1'), 16: np.dtype('>i2'), 32: np.dtype('>i4'), 64: np.dtype('>i8'),
+               -32: np.dtype('>f4'), -64: np.dtype('>f8')}
+FITS_EXTENSIONS = ['.fits', '.fit', '.fts']
+TIFF_EXTENSIONS = ['.tiff', '.tif']
+
+
+class FitsImage(object):
+
+    def __init__(self, file_path):
+        """
+        Primary image of a FITS file, whose header is parsed so that the data can be
+        memory mapped instead of being read and copied
+
+        :param file_path: path of the FITS file
+        :type file_path: str
+        """
+        self.file_path = file_path
+        self.header = {}
+        _offset = 0
+        with open(file_path, 'rb') as _file:
+            while 'END' not in self.header:
+                _block = _file.read(FITS_BLOCK_SIZE)
+                if len(_block) < FITS_BLOCK_SIZE:
+                    raise ValueError("'{}' is not a valid FITS file.".format(file_path))
+                _offset += FITS_BLOCK_SIZE
+                for _start in range(0, FITS_BLOCK_SIZE, FITS_CARD_SIZE):
+                    _keyword, _value = _parse_card(_block[_start: _start + FITS_CARD_SIZE])
+                    if _keyword:
+                        self.header[_keyword] = _value
+                    if _keyword == 'END':
+                        break
+        if self.header.get('SIMPLE') is not True or self.header.get('BITPIX') not in FITS_DTYPES:
+            raise ValueError("'{}' is not a valid FITS file.".format(file_path))
+        self.offset = _offset
+        _n_axis = self.header.get('NAXIS', 0)
+        self.shape = tuple(self.header['NAXIS' + str(_axis)] for _axis in range(_n_axis, 0, -1))
+        self.raw_dtype = FITS_DTYPES[self.header['BITPIX']]
+        self.bscale = self.header.get('BSCALE', 1)
+        self.bzero = self.header.get('BZERO', 0)
+
+    @property
+    def dtype(self):
+        '''dtype of the scaled data, unsigned integers being stored with an offset BZERO'''
+        if self.bscale == 1 and self.bzero == 0:
+            return self.raw_dtype.newbyteorder('=')
+        if self.bscale == 1 and self.raw_dtype.kind == 'i' and self.bzero == 2 ** (8 * self.raw_dtype.itemsize - 1):
+            return np.dtype('u' + str(self.raw_dtype.itemsize))
+        return np.dtype(np.float64) if self.raw_dtype.itemsize > 2 else np.dtype(np.float32)
+
+    def memmap(self):
+        '''memory mapped raw (unscaled, big endian) data'''
+        return np.memmap(self.file_path, dtype=self.raw_dtype, mode='r', offset=self.offset, shape=self.shape)
+
+    def read(self, out=None):
+        """
+        Scaled data, read from the memory map straight into 'out' when given
+
+        :param out: Optional. Array of the image shape the data are written to, e.g. a frame of a stack.
+        :type out: np.array
+        :return: data
+        :rtype: np.array
+        """
+        _raw = self.memmap()
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        if self.bscale == 1 and self.bzero == 0:
+            out[...] = _raw
+        elif self.dtype.kind == 'u' and self.raw_dtype.kind == 'i' and out.dtype == self.dtype:
+            # an offset of 2**(n-1) only flips the sign bit of the raw integers
+            np.bitwise_xor(_raw.view(self.raw_dtype.newbyteorder('>').str.replace('i', 'u')),
+                           2 ** (8 * self.raw_dtype.itemsize - 1), out=out, casting='unsafe')
+        else:
+            np.multiply(_raw, self.bscale, out=out, casting='unsafe')
+            out += self.bzero
+        del _raw
+        return out
+
+
+def _parse_card(card):
+    '''keyword and value of a FITS header card'''
+    card = card.decode('ascii', errors='replace')
+    _keyword = card[:8].strip()
+    if card[8:10] != '= ':
+        return _keyword, None
+    _value = card[10:].split('/')[0].strip()
+    if _value.startswith("'"):
+        return _keyword, card[10:].strip().split("'")[1].rstrip()
+    if _value == 'T':
+        return _keyword, True
+    if _value == 'F':
+        return _keyword, False
+    try:
+        return _keyword, int(_value)
+    except ValueError:
+        pass
+    try:
+        return _keyword, float(_value.replace('D', 'E'))
+    except ValueError:
+        return _keyword, _value
+
+
+def get_data_type(file_path):
+    '''file extension in lower case, e.g. '.fits' or '.tif' '''
+    return os.path.splitext(file_path)[1].strip().lower()
+
+
+def read_frame_info(file_path):
+    """
+
+    :param file_path: path of a FITS or TIFF file
+    :type file_path: str
+    :return: shape and dtype of the image
+    :rtype: tuple
+    """
+    _data_type = get_data_type(file_path)
+    if _data_type in FITS_EXTENSIONS:
+        _image = FitsImage(file_path)
+        if len(_image.shape):
+            return _image.shape, _image.dtype
+    if _data_type in TIFF_EXTENSIONS and tifffile is not None:
+        with tifffile.TiffFile(file_path) as _tiff:
+            _series = _tiff.series[0]
+            return tuple(_series.shape), np.dtype(_series.dtype)
+    _image = load_frame(file_path)
+    return _image.shape, _image.dtype
+
+
+def load_frame(file_path, out=None):
+    """
+    Loads a FITS or TIFF image, FITS data being memory mapped and TIFF data decoded
+    directly into 'out' when given
+
+    :param file_path: path of a FITS or TIFF file
+    :type file_path: str
+    :param out: Optional. Array of the image shape the data are written to, e.g. a frame of a stack.
+    :type out: np.array
+    :return: image
+    :rtype: np.array
+    """
+    _data_type = get_data_type(file_path)
+    if _data_type in FITS_EXTENSIONS:
+        _image = FitsImage(file_path)
+        if len(_image.shape) == 0:
+            return _load_fits_extension(file_path, out=out)
+        return _image.read(out=out)
+    if _data_type in TIFF_EXTENSIONS:
+        if tifffile is not None:
+            return tifffile.imread(file_path, out=out)
+        from PIL import Image
+        with Image.open(file_path) as _image:
+            _data = np.array(_image)
+        if out is None:
+            return _data
+        out[...] = _data
+        return out
+    raise NotImplementedError("'{}' files are not supported.".format(_data_type))
+
+
+def _load_fits_extension(file_path, out=None):
+    '''first image of a FITS file without primary image (e.g. compressed), read with astropy'''
+    if fits is None:
+        raise ValueError("'{}' has no primary image, astropy is needed to read its extensions.".format(file_path))
+    with fits.open(file_path) as _hdu_list:
+        _data = next(_hdu.data for _hdu in _hdu_list if _hdu.data is not None)
+        if out is None:
+            return np.array(_data)
+        out[...] = _data
+    return out
+
+
+def load_stack(list_files, n_workers=4, dtype=None):
+    """
+    Loads the frames of a list of FITS or TIFF files into a single preallocated stack,
+    the files being read concurrently by a pool of threads
+
+    :param list_files: paths of the files, all of the same shape
+    :type list_files: list
+    :param n_workers: Optional. Number of files read at the same time. Default: 4
+    :type n_workers: int
+    :param dtype: Optional. dtype of the stack, default is the dtype of the first file.
+    :type dtype: np.dtype
+    :return: stack of shape (number of files, ...) with the frames along the first axis
+    :rtype: np.array
+    """
+    if len(list_files) == 0:
+        raise ValueError("'list_files' is empty.")
+    if n_workers < 1:
+        raise ValueError("'n_workers' has to be at least 1.")
+    _shape, _dtype = read_frame_info(list_files[0])
+    stack = np.empty((len(list_files),) + tuple(_shape), dtype=_dtype if dtype is None else dtype)
+
+    def _load(_index):
+        if stack.dtype == _dtype or get_data_type(list_files[_index]) in FITS_EXTENSIONS:
+            load_frame(list_files[_index], out=stack[_index])
+        else:
+            stack[_index] = load_frame(list_files[_index])
+
+    with ThreadPoolExecutor(max_workers=n_workers) as _executor:
+        # consuming the results raises the first error of the workers
+        list(_executor.map(_load, range(len(list_files))))
+    return stack
+
+
+def iter_frames(list_files, n_workers=2, read_ahead=4):
+    """
+    Yields the frames of a list of FITS or TIFF files in order, while the next ones
+    are read in the background, so that the frames can be processed as they are loaded
+    without holding the whole stack in memory
+
+    :param list_files: paths of the files
+    :type list_files: list
+    :param n_workers: Optional. Number of files read at the same time. Default: 2
+    :type n_workers: int
+    :param read_ahead: Optional. Number of frames read in advance, bounds the memory used. Default: 4
+    :type read_ahead: int
+    :return: generator of the frames
+    :rtype: generator
+    """
+    if n_workers < 1 or read_ahead < 1:
+        raise ValueError("'n_workers' and 'read_ahead' have to be at least 1.")
+    with ThreadPoolExecutor(max_workers=n_workers) as _executor:
+        _futures = deque()
+        _files = iter(list_files)
+        for _file in _files:
+            _futures.append(_executor.submit(load_frame, _file))
+            if len(_futures) >= read_ahead:
+                break
+        while _futures:
+            _frame = _futures.popleft().result()
+            for _file in _files:
+                _futures.append(_executor.submit(load_frame, _file))
+                break
+            yield _frame
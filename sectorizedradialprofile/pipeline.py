@@ -0,0 +1,315 @@
+import asyncio
+import fnmatch
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile, form_param_dict, \
+    validate_params
+from sectorizedradialprofile.cli import EXPORTERS, write_output
+from sectorizedradialprofile.geometry import GeometryCache, get_detector_mask
+from sectorizedradialprofile.loader import load_frame
+
+STAGES = ['read', 'compute', 'write']
+
+
+class PipelineMetrics(object):
+
+    def __init__(self, callback=None):
+        """
+        Timings of each file processed by a 'WatchPipeline': when it was detected, and when each
+        stage started and ended, so that the time waited in the queue of each stage, the time of
+        each stage and the latency from detection to written profile can be followed
+
+        :param callback: Optional. Function called with the record of each file as soon as it is written (or failed).
+        :type callback: callable
+        """
+        self.callback = callback
+        self.records = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        '''add the record of a file, a dictionary with 'file', 'detected', '<stage>_start' and '<stage>_end' times'''
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def to_dataframe(self):
+        """
+
+        :return: one row per file with 'file', 'detected', then '<stage>_wait' and '<stage>_time' of each stage,
+            'latency' and 'error' columns, the times being in seconds
+        :rtype: pd.DataFrame
+        """
+        _row_list = []
+        for _record in self.records:
+            _row = [_record['file'], _record['detected']]
+            _previous_end = _record['detected']
+            for _stage in STAGES:
+                _start = _record.get(_stage + '_start', np.nan)
+                _end = _record.get(_stage + '_end', np.nan)
+                _row += [_start - _previous_end, _end - _start]
+                _previous_end = _end
+            _row += [_record.get('write_end', np.nan) - _record['detected'], _record.get('error')]
+            _row_list.append(_row)
+        _columns = ['file', 'detected'] + [_stage + _suffix for _stage in STAGES for _suffix in ['_wait', '_time']]
+        return pd.DataFrame(_row_list, columns=_columns + ['latency', 'error'])
+
+    def summary(self):
+        """
+        Number of files, mean and largest time, mean and largest queue wait and throughput (files per
+        second between the first start and the last end) of each stage, the 'pipeline' row giving the
+        latency from detection to written profile
+
+        :return: one row per stage
+        :rtype: pd.DataFrame
+        """
+        _row_list = []
+        for _stage in STAGES + ['pipeline']:
+            if _stage == 'pipeline':
+                _start_list = [_record['detected'] for _record in self.records if 'write_end' in _record]
+                _end_list = [_record['write_end'] for _record in self.records if 'write_end' in _record]
+                _wait_list = []
+            else:
+                _done_list = [_record for _record in self.records if _stage + '_end' in _record]
+                _start_list = [_record[_stage + '_start'] for _record in _done_list]
+                _end_list = [_record[_stage + '_end'] for _record in _done_list]
+                _previous = 'detected' if _stage == 'read' else STAGES[STAGES.index(_stage) - 1] + '_end'
+                _wait_list = [_record[_stage + '_start'] - _record[_previous] for _record in _done_list]
+            _time_list = np.subtract(_end_list, _start_list)
+            _duration = max(_end_list) - min(_start_list) if len(_end_list) else np.nan
+            _row_list.append([len(_time_list),
+                              np.mean(_time_list) if len(_time_list) else np.nan,
+                              np.max(_time_list) if len(_time_list) else np.nan,
+                              np.mean(_wait_list) if len(_wait_list) else np.nan,
+                              np.max(_wait_list) if len(_wait_list) else np.nan,
+                              len(_time_list) / _duration if _duration > 0 else np.nan])
+        return pd.DataFrame(_row_list, index=STAGES + ['pipeline'],
+                            columns=['count', 'mean_time', 'max_time', 'mean_wait', 'max_wait', 'throughput'])
+
+
+class WatchPipeline(object):
+
+    def __init__(self, input_dir, output_dir, pattern='*.fits', bin_width=None, n_bins=None, file_format='npz',
+                 mask=None, n_readers=2, n_workers=2, queue_size=4, poll_interval=0.5, process_existing=True,
+                 geometry_cache=None, callback=None):
+        """
+        Radial profiles of the frames landing in a folder during an acquisition, as fast as they arrive.
+        The folder is polled for new files, which are read by concurrent readers, whose profiles are
+        computed by a pool of threads with the geometries compiled once in the cache, and written.
+        The stages are connected by bounded queues, so that a slow stage holds the previous ones back
+        instead of piling frames up in memory
+
+        :param input_dir: folder the frames land in
+        :type input_dir: str
+        :param output_dir: folder the profiles are written to, one file per frame with the frame name
+        :type output_dir: str
+        :param pattern: Optional. Pattern of the frame file names. Default: '*.fits'
+        :type pattern: str
+        :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        :param file_format: Optional. 'npz', 'hdf5' or 'csv'. Default: 'npz'
+        :type file_format: str
+        :param mask: Optional. Pixels left out of every profile, see 'DetectorMask'.
+        :type mask: DetectorMask or np.array
+        :param n_readers: Optional. Number of files read at the same time. Default: 2
+        :type n_readers: int
+        :param n_workers: Optional. Number of profiles computed at the same time. Default: 2
+        :type n_workers: int
+        :param queue_size: Optional. Number of items waiting between two stages. Default: 4
+        :type queue_size: int
+        :param poll_interval: Optional. Seconds between two scans of the folder, a file being processed once
+            its size did not change between two scans. Default: 0.5
+        :type poll_interval: float
+        :param process_existing: Optional. Processes the files already in the folder when started,
+            the files whose profile already exists being skipped. Default: True
+        :type process_existing: bool
+        :param geometry_cache: Optional. Cache of the compiled geometries, a new one by default.
+        :type geometry_cache: GeometryCache
+        :param callback: Optional. Function called with the timings of each file once processed,
+            see 'PipelineMetrics'.
+        :type callback: callable
+        """
+        if file_format not in EXPORTERS:
+            raise ValueError("'file_format' has to be one of {}.".format(list(EXPORTERS)))
+        if min(n_readers, n_workers, queue_size) < 1:
+            raise ValueError("'n_readers', 'n_workers' and 'queue_size' have to be at least 1.")
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.pattern = pattern
+        self.bin_width = bin_width
+        self.n_bins = n_bins
+        self.file_format = file_format
+        self.mask = get_detector_mask(mask)
+        self.n_readers = n_readers
+        self.n_workers = n_workers
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.process_existing = process_existing
+        self.geometry_cache = GeometryCache() if geometry_cache is None else geometry_cache
+        self.metrics = PipelineMetrics(callback=callback)
+        self.param_list = []
+        self._seen = set()
+        self._sizes = {}
+        self._stop_requested = False
+
+    def add_params(self, center: tuple, radius=None, angle_range=None):
+        """
+
+        :param center: Origin of the radial plot, '(x0, y0)' or '(x0, y0, z0)'.
+        :type center: tuple
+        :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
+        :type radius: int or float
+        :param angle_range: Angular coverage in degrees '(0, 360)'. Optional, default 'None' used to include all.
+        :type angle_range: tuple
+        """
+        validate_params(center=center, radius=radius, angle_range=angle_range, dimension=len(center))
+        self.param_list.append(form_param_dict(center=center, radius=radius, angle_range=angle_range))
+
+    def run(self, max_files=None, idle_timeout=None):
+        """
+        Watches the folder until 'stop' is called, 'max_files' files are processed or no new file
+        arrived for 'idle_timeout' seconds, the files found being processed before returning
+
+        :param max_files: Optional. Number of files after which the pipeline stops.
+        :type max_files: int
+        :param idle_timeout: Optional. Seconds without new file after which the pipeline stops.
+        :type idle_timeout: float
+        :return: timings of the files processed
+        :rtype: PipelineMetrics
+        """
+        return asyncio.run(self.run_async(max_files=max_files, idle_timeout=idle_timeout))
+
+    def stop(self):
+        '''stop watching the folder, e.g. from another thread, the files found being processed'''
+        self._stop_requested = True
+
+    async def run_async(self, max_files=None, idle_timeout=None):
+        '''coroutine of 'run', e.g. to run the pipeline within the event loop of an acquisition software'''
+        if len(self.param_list) == 0:
+            raise ValueError("No parameters to calculate, use 'add_params' first.")
+        self._stop_requested = False
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+        if not self.process_existing:
+            self._seen.update(self._list_files())
+        _read_queue = asyncio.Queue(maxsize=self.queue_size)
+        _compute_queue = asyncio.Queue(maxsize=self.queue_size)
+        _write_queue = asyncio.Queue(maxsize=self.queue_size)
+        with ThreadPoolExecutor(max_workers=self.n_readers + 1) as _io_executor, \
+                ThreadPoolExecutor(max_workers=self.n_workers) as _compute_executor:
+            _task_list = [asyncio.ensure_future(self._process(_read_queue, _compute_queue, 'read', _io_executor,
+                                                              self._read))
+                          for _ in range(self.n_readers)]
+            _task_list += [asyncio.ensure_future(self._process(_compute_queue, _write_queue, 'compute',
+                                                               _compute_executor, self._compute))
+                           for _ in range(self.n_workers)]
+            _task_list.append(asyncio.ensure_future(self._process(_write_queue, None, 'write', _io_executor,
+                                                                  self._write)))
+            try:
+                await self._watch(_read_queue, max_files=max_files, idle_timeout=idle_timeout)
+                for _queue in [_read_queue, _compute_queue, _write_queue]:
+                    await _queue.join()
+            finally:
+                for _task in _task_list:
+                    _task.cancel()
+                await asyncio.gather(*_task_list, return_exceptions=True)
+        return self.metrics
+
+    def calculate(self, data):
+        """
+        Profile of one frame, with the geometries of the cache
+
+        :param data: frame
+        :type data: np.array
+        :return: calculation holding the profile
+        :rtype: CalculateRadialProfile
+        """
+        o_calculate = CalculateRadialProfile(data=data, geometry_cache=self.geometry_cache, mask=self.mask)
+        for each_param_dict in self.param_list:
+            o_calculate.add_params(**each_param_dict)
+        o_calculate.calculate_cached(bin_width=self.bin_width, n_bins=self.n_bins)
+        return o_calculate
+
+    def get_output_path(self, file_path):
+        '''profile file of a frame file'''
+        _name = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(self.output_dir, _name + EXPORTERS[self.file_format][1])
+
+    def _read(self, record, _):
+        return load_frame(record['file'])
+
+    def _compute(self, record, data):
+        return self.calculate(data)
+
+    def _write(self, record, o_calculate):
+        return write_output(o_calculate, self.get_output_path(record['file']), self.file_format,
+                            metadata={'input': record['file']})
+
+    def _list_files(self):
+        '''files of the folder matching the pattern'''
+        with os.scandir(self.input_dir) as _entries:
+            return set([_entry.path for _entry in _entries
+                        if _entry.is_file() and fnmatch.fnmatch(_entry.name, self.pattern)])
+
+    def _find_ready_files(self):
+        '''new files whose size did not change since the previous scan, in name order'''
+        ready_list = []
+        for _file in sorted(self._list_files() - self._seen):
+            if os.path.exists(self.get_output_path(_file)):
+                self._seen.add(_file)
+                continue
+            try:
+                _size = os.path.getsize(_file)
+            except OSError:
+                continue
+            if _size > 0 and self._sizes.get(_file) == _size:
+                self._seen.add(_file)
+                del self._sizes[_file]
+                ready_list.append(_file)
+            else:
+                self._sizes[_file] = _size
+        return ready_list
+
+    async def _watch(self, read_queue, max_files=None, idle_timeout=None):
+        _n_files = 0
+        _last_arrival = time.perf_counter()
+        while not self._stop_requested:
+            _ready_list = self._find_ready_files()
+            for _file in _ready_list:
+                await read_queue.put(({'file': _file, 'detected': time.perf_counter()}, None))
+                _n_files += 1
+                if max_files is not None and _n_files >= max_files:
+                    return
+            if len(_ready_list) or len(self._sizes):
+                _last_arrival = time.perf_counter()
+            elif idle_timeout is not None and time.perf_counter() - _last_arrival > idle_timeout:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, in_queue, out_queue, stage, executor, function):
+        '''stage loop: runs the function of each item in the executor and hands its result to the next stage'''
+        _loop = asyncio.get_running_loop()
+        while True:
+            record, item = await in_queue.get()
+            try:
+                record[stage + '_start'] = time.perf_counter()
+                try:
+                    _result = await _loop.run_in_executor(executor, function, record, item)
+                except Exception as _error:
+                    record['error'] = '{}: {!r}'.format(stage, _error)
+                    self.metrics.add(record)
+                    continue
+                record[stage + '_end'] = time.perf_counter()
+                if out_queue is None:
+                    self.metrics.add(record)
+                else:
+                    await out_queue.put((record, _result))
+            finally:
+                in_queue.task_done()
@@ -0,0 +1,112 @@
+import numpy as np
+
+from sectorizedradialprofile.binning import BinAccumulator, make_bin_edges
+from sectorizedradialprofile.calculate_radial_profile import form_param_dict, get_max_radius, validate_params
+from sectorizedradialprofile.geometry import default_geometry_cache
+
+
+class PolarTransform(object):
+
+    def __init__(self, shape: tuple, center: tuple, radius=None, bin_width=1, angle_step=1, geometry_cache=None,
+                 mask=None):
+        """
+        Remaps 2D frames onto a (angle, radius) "cake" grid through a lookup table compiled once for the center
+
+        :param shape: shape of the frames, '(y, x)'
+        :type shape: tuple
+        :param center: Origin of the radial plot, '(x0, y0)'.
+        :type center: tuple
+        :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
+        :type radius: int or float
+        :param bin_width: width of the radial cells. Default: 1
+        :type bin_width: int or float
+        :param angle_step: width of the angular cells in degrees, has to divide 360. Default: 1
+        :type angle_step: int or float
+        :param geometry_cache: Optional. Cache of the compiled geometries, default 'None' uses the module wide cache.
+        :type geometry_cache: GeometryCache
+        :param mask: Optional. Pixels left out of every cell, see 'DetectorMask'.
+        :type mask: DetectorMask or np.array
+        """
+        if len(shape) != 2:
+            raise ValueError('Only 2D frames can be remapped to polar coordinates.')
+        validate_params(center=center, radius=radius, angle_range=None, dimension=2)
+        _n_angles = 360 / angle_step
+        if angle_step <= 0 or not np.isclose(_n_angles, np.round(_n_angles)):
+            raise ValueError("'angle_step' has to divide 360.")
+        self.shape = tuple(shape)
+        self.center = center
+        self.radius = radius
+        self.angle_edges = np.linspace(0, 360, int(np.round(_n_angles)) + 1)
+        self.radius_edges = make_bin_edges(get_max_radius(self.shape, form_param_dict(center, radius, None)),
+                                           bin_width=bin_width)
+        _geometry_cache = default_geometry_cache if geometry_cache is None else geometry_cache
+        self.geometry = _geometry_cache.get(shape=self.shape, center=center, radius=radius,
+                                            bin_edges=self.radius_edges, sector_edges=tuple(self.angle_edges),
+                                            mask=mask)
+
+    def transform(self, data):
+        """
+        Remaps a frame, only gathering its pixels into their polar cell
+
+        :param data: 2D frame of the transform shape
+        :type data: np.array
+        :return: polar image of the frame
+        :rtype: PolarImage
+        """
+        _accumulator = self.geometry.accumulate(data)
+        _shape = (len(self.angle_edges) - 1, len(self.radius_edges) - 1)
+        _polar_accumulator = BinAccumulator(_shape[1], n_frames=_shape[0])
+        _polar_accumulator.count = _accumulator.count.reshape(_shape)
+        _polar_accumulator.mean = _accumulator.mean.reshape(_shape)
+        _polar_accumulator.m2 = _accumulator.m2.reshape(_shape)
+        return PolarImage(_polar_accumulator, self.angle_edges, self.radius_edges)
+
+
+class PolarImage(object):
+
+    def __init__(self, accumulator, angle_edges, radius_edges):
+        """
+        Frame remapped onto a (angle, radius) grid, each cell keeping the statistics of its pixels
+
+        :param accumulator: 2D accumulator of shape (number of angles, number of radii)
+        :type accumulator: BinAccumulator
+        :param angle_edges: edges of the angular cells in degrees
+        :type angle_edges: np.array
+        :param radius_edges: edges of the radial cells
+        :type radius_edges: np.array
+        """
+        self.accumulator = accumulator
+        self.angle_edges = angle_edges
+        self.radius_edges = radius_edges
+        self.angle = (angle_edges[:-1] + angle_edges[1:]) / 2
+        self.radius = (radius_edges[:-1] + radius_edges[1:]) / 2
+
+    @property
+    def image(self):
+        '''mean of each cell, NaN for the cells without pixels'''
+        return self.accumulator.statistics()[0]
+
+    @property
+    def count(self):
+        return self.accumulator.count
+
+    def sector_profile(self, angle_range=None):
+        """
+        Radial profile of a sector, reduced from the cells whose center is within the angle range
+
+        :param angle_range: Angular coverage in degrees '(0, 360)', wrapping around 0 when the start is greater
+            than the end. Optional, default 'None' used to include all.
+        :type angle_range: tuple
+        :return: profile indexed by radius with 'mean', 'std' and 'sem' columns
+        :rtype: pd.DataFrame
+        """
+        if angle_range is None:
+            _index = Ellipsis
+        else:
+            validate_params(center=(0, 0), radius=None, angle_range=angle_range, dimension=2)
+            _from, _to = angle_range
+            if _from <= _to:
+                _index = np.flatnonzero((self.angle >= _from) & (self.angle <= _to))
+            else:
+                _index = np.flatnonzero((self.angle >= _from) | (self.angle <= _to))
+        return self.accumulator.collapse(_index).to_dataframe(self.radius)
@@ -0,0 +1,141 @@
+from collections import deque
+import numpy as np
+
+from sectorizedradialprofile.binning import BinAccumulator, make_bin_edges
+from sectorizedradialprofile.calculate_radial_profile import form_param_dict, get_max_radius, validate_params
+from sectorizedradialprofile.geometry import default_geometry_cache
+
+
+class RunningProfile(object):
+
+    def __init__(self, shape: tuple, center: tuple, radius=None, angle_range=None, bin_width=None, n_bins=None,
+                 window_size=None, mask=None, geometry_cache=None):
+        """
+        Radial profile of the sum of the frames added so far (or of the last 'window_size' ones),
+        updated frame by frame. The geometry is compiled once, each frame added (or removed) only
+        costs the gathering of its selected pixels into their running sums, instead of a whole
+        calculation of the summed image. Integer frames are summed exactly, so that frames can
+        be removed without rounding errors, the sums switching to float64 once a float frame is added
+
+        :param shape: shape of the frames, '(y, x)' or '(z, y, x)'
+        :type shape: tuple
+        :param center: Origin of the radial plot, '(x0, y0)' or '(x0, y0, z0)'.
+        :type center: tuple
+        :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
+        :type radius: int or float
+        :param angle_range: Angular coverage in degrees '(0, 360)'. Optional, default 'None' used to include all.
+        :type angle_range: tuple
+        :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        :param window_size: Optional. Number of frames summed, the oldest frame being removed when a frame is
+            added to a full window. Default 'None' sums all the frames.
+        :type window_size: int
+        :param mask: Optional. Pixels left out of the profile, see 'DetectorMask'.
+        :type mask: DetectorMask or np.array
+        :param geometry_cache: Optional. Cache of the compiled geometries, default 'None' uses the module wide cache.
+        :type geometry_cache: GeometryCache
+        """
+        self.shape = tuple(shape)
+        if len(self.shape) not in [2, 3]:
+            raise ValueError('Only 2D or 3D frames are supported.')
+        validate_params(center=center, radius=radius, angle_range=angle_range, dimension=len(self.shape))
+        if window_size is not None and window_size < 1:
+            raise ValueError("'window_size' has to be at least 1.")
+        self.params = form_param_dict(center=center, radius=radius, angle_range=angle_range)
+        if bin_width is not None or n_bins is not None:
+            self.bin_edges = make_bin_edges(get_max_radius(self.shape, self.params), bin_width=bin_width,
+                                            n_bins=n_bins)
+        else:
+            self.bin_edges = None
+        _geometry_cache = default_geometry_cache if geometry_cache is None else geometry_cache
+        self.geometry = _geometry_cache.get(shape=self.shape, bin_edges=self.bin_edges, mask=mask, **self.params)
+        self.window_size = window_size
+        self.clear()
+
+    def __len__(self):
+        '''number of frames summed'''
+        return self.n_frames
+
+    def clear(self):
+        '''forget all the frames'''
+        self.n_frames = 0
+        self.pixel_sum = None
+        # number of summed frames in which each pixel is NaN, the pixel is left out while it is not 0
+        self.pixel_nan_count = np.zeros(len(self.geometry.pixel_indices), dtype=np.int64)
+        self._window_values = deque()
+
+    def add_frame(self, data):
+        """
+        Adds a frame to the sum, removing the oldest frame of a full window
+
+        :param data: frame of the profile shape
+        :type data: np.array
+        """
+        _values = self.geometry.gather_pixels(data)
+        if self.pixel_sum is None:
+            _dtype = np.int64 if _values.dtype.kind in 'biu' else np.float64
+            self.pixel_sum = np.zeros(len(_values), dtype=_dtype)
+        self._update(_values, 1)
+        if self.window_size is not None:
+            self._window_values.append(_values)
+            if len(self._window_values) > self.window_size:
+                self._update(self._window_values.popleft(), -1)
+
+    def remove_frame(self, data):
+        """
+        Removes a frame added before from the sum
+
+        :param data: frame of the profile shape
+        :type data: np.array
+        """
+        if self.n_frames == 0:
+            raise ValueError('No frame to remove.')
+        if self.window_size is not None:
+            raise ValueError("Frames leave a sliding window by themselves, use 'clear' to empty it.")
+        self._update(self.geometry.gather_pixels(data), -1)
+
+    def _update(self, values, sign):
+        '''add (sign 1) or subtract (sign -1) the values of the selected pixels of a frame'''
+        if values.dtype.kind in 'fc':
+            if self.pixel_sum.dtype.kind != 'f':
+                # float frame with integer sums, which would truncate it
+                self.pixel_sum = self.pixel_sum.astype(np.float64)
+            _nan_indices = np.isnan(values)
+            if _nan_indices.any():
+                self.pixel_nan_count += sign * _nan_indices
+                values = np.where(_nan_indices, 0, values)
+        if sign > 0:
+            np.add(self.pixel_sum, values, out=self.pixel_sum, casting='unsafe')
+        else:
+            np.subtract(self.pixel_sum, values, out=self.pixel_sum, casting='unsafe')
+        self.n_frames += sign
+
+    def get_accumulator(self, average=False):
+        """
+
+        :param average: Optional. Statistics of the mean frame instead of the summed frame. Default: False
+        :type average: bool
+        :return: accumulator of the bins of the summed (or mean) frame
+        :rtype: BinAccumulator
+        """
+        accumulator = BinAccumulator(self.geometry.n_bins)
+        if self.n_frames == 0:
+            return accumulator
+        _valid_indices = np.flatnonzero(self.pixel_nan_count == 0)
+        _values = self.pixel_sum[_valid_indices].astype(np.float64)
+        if average:
+            _values /= self.n_frames
+        accumulator.add(self.geometry.bin_index[_valid_indices], _values)
+        return accumulator
+
+    def get_profile(self, average=False):
+        """
+
+        :param average: Optional. Profile of the mean frame instead of the summed frame. Default: False
+        :type average: bool
+        :return: profile indexed by radius with 'mean', 'std' and 'sem' columns, as 'radial_profile'
+        :rtype: pd.DataFrame
+        """
+        return self.get_accumulator(average=average).to_dataframe(self.geometry.bin_radius)
@@ -0,0 +1,77 @@
+import numpy as np
+
+# working memory per pixel of a slab: data converted to float64, radius, bin index, flat index and selection
+SLAB_BYTES_PER_PIXEL = 8 * 4 + 1
+# pixels of one block of whole rows (or planes) processed by a thread, about 10 MiB of working memory
+BLOCK_PIXELS = 2 ** 18
+
+
+class SlabReader(object):
+
+    def __init__(self, shape: tuple, read_slab, dtype=np.float64):
+        """
+        Data read slab by slab along the first axis by a callback, for volumes larger than the memory
+
+        :param shape: shape of the full data, '(z, y, x)' or '(y, x)'
+        :type shape: tuple
+        :param read_slab: function called with 'start' and 'stop' returning the array 'data[start:stop]'
+        :type read_slab: callable
+        :param dtype: dtype of the data
+        :type dtype: np.dtype
+        """
+        self.shape = tuple(shape)
+        self.ndim = len(self.shape)
+        self.dtype = np.dtype(dtype)
+        self.read_slab = read_slab
+
+    def __getitem__(self, window):
+        _first_slice = window[0]
+        _start, _stop, _ = _first_slice.indices(self.shape[0])
+        _slab = np.asarray(self.read_slab(_start, _stop))
+        return _slab[(slice(None),) + tuple(window[1:])]
+
+
+def get_slab_windows(window, memory_budget, itemsize=8):
+    """
+    Splits a window along its first axis into slabs whose processing fits in the memory budget
+
+    :param window: one slice per axis
+    :type window: tuple
+    :param memory_budget: memory, in bytes, a slab can use
+    :type memory_budget: int
+    :param itemsize: size in bytes of one data value
+    :type itemsize: int
+    :return: slab windows
+    :rtype: list
+    """
+    _plane_bytes = max(_get_plane_size(window) * (SLAB_BYTES_PER_PIXEL + itemsize), 1)
+    return _split_window(window, max(int(memory_budget // _plane_bytes), 1))
+
+
+def get_block_windows(window, block_pixels=BLOCK_PIXELS):
+    """
+    Splits a window along its first axis into blocks of whole rows (or planes) of about 'block_pixels' pixels.
+    The blocks only depend on the window, so that they do not change with the number of threads processing them
+
+    :param window: one slice per axis
+    :type window: tuple
+    :param block_pixels: Optional. Number of pixels of a block, at least one row (or plane). Default: 'BLOCK_PIXELS'
+    :type block_pixels: int
+    :return: block windows
+    :rtype: list
+    """
+    return _split_window(window, max(int(block_pixels // max(_get_plane_size(window), 1)), 1))
+
+
+def _get_plane_size(window):
+    '''number of pixels of a row (or plane) of the window'''
+    return int(np.prod([_slice.stop - _slice.start for _slice in window[1:]]))
+
+
+def _split_window(window, thickness):
+    '''windows of 'thickness' rows (or planes) covering the window'''
+    window_list = []
+    for _start in range(window[0].start, window[0].stop, thickness):
+        _stop = min(_start + thickness, window[0].stop)
+        window_list.append((slice(_start, _stop),) + tuple(window[1:]))
+    return window_list
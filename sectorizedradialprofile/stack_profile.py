@@ -0,0 +1,168 @@
+import numpy as np
+
+from sectorizedradialprofile.binning import BinAccumulator, make_bin_edges
+from sectorizedradialprofile.calculate_radial_profile import form_param_dict, get_max_radius, validate_params
+from sectorizedradialprofile.geometry import default_geometry_cache, get_detector_mask
+
+# working arrays per pixel of a chunk, in values of the reduction dtype: converted frames, valid pixels,
+# deviations and their squares
+STACK_VALUES_PER_PIXEL = 4
+
+
+class CalculateStackRadialProfile(object):
+
+    def __init__(self, data: np.ndarray, stack_axis=0, frames_per_chunk=None, dtype=np.float64, geometry_cache=None,
+                 mask=None, memory_budget=2 ** 30):
+        """
+        Radial profile of every frame of a stack sharing the same geometry
+
+        :param data: numpy array of 2D or 3D frames stacked along 'stack_axis'
+        :type data: np.array
+        :param stack_axis: axis along which the frames are stacked. Default: 0
+        :type stack_axis: int
+        :param frames_per_chunk: Optional. Maximum number of frames reduced at once, default 'None' only bounds
+            the chunks of frames by the memory budget.
+        :type frames_per_chunk: int
+        :param dtype: dtype the chunks of frames are converted to for the reduction, 'np.float32' halves
+            the memory and time of the reduction when its precision is enough, e.g. for 8 or 16 bits detectors.
+            The bins are accumulated across chunks in float64. Default: np.float64
+        :type dtype: np.dtype
+        :param geometry_cache: Optional. Cache of the compiled geometries, default 'None' uses the module wide cache.
+        :type geometry_cache: GeometryCache
+        :param mask: Optional. Pixels of the frames left out of every profile, see 'DetectorMask'.
+        :type mask: DetectorMask or np.array
+        :param memory_budget: Optional. Memory in bytes the reduction of a chunk of frames can use, see
+            'get_frames_per_chunk'. Default: 1 GiB
+        :type memory_budget: int
+        """
+        self.data = np.moveaxis(data, stack_axis, 0)
+        self.stack_axis = stack_axis
+        self.n_frames = self.data.shape[0]
+        self.frame_shape = self.data.shape[1:]
+        self.dimension = len(self.frame_shape)
+        if self.dimension not in [2, 3]:
+            raise ValueError('Only stacks of 2D or 3D frames are supported.')
+        if frames_per_chunk is not None and frames_per_chunk < 1:
+            raise ValueError("'frames_per_chunk' has to be at least 1.")
+        self.frames_per_chunk = frames_per_chunk
+        self.memory_budget = memory_budget
+        if np.dtype(dtype) not in [np.float32, np.float64]:
+            raise ValueError("'dtype' has to be np.float32 or np.float64.")
+        self.dtype = np.dtype(dtype)
+        self.geometry_cache = default_geometry_cache if geometry_cache is None else geometry_cache
+        self.mask = get_detector_mask(mask, self.frame_shape)
+        self.param_list = []
+        self.bin_edges = None
+        self.radius = None
+        self.mean = None
+        self.std = None
+        self.sem = None
+        self.count = None
+
+    def add_params(self, center: tuple, radius=None, angle_range=None):
+        """
+
+        :param center: Origin of the radial plot, '(x0, y0)' or '(x0, y0, z0)'.
+        :type center: tuple
+        :param radius: The maximum distance from specified center. Optional, default 'None' used to include all.
+        :type radius: int or float
+        :param angle_range: Angular coverage in degrees '(0, 360)'. Optional, default 'None' used to include all.
+        :type angle_range: tuple
+        """
+        validate_params(center=center, radius=radius, angle_range=angle_range, dimension=self.dimension)
+        self.param_list.append(form_param_dict(center=center, radius=radius, angle_range=angle_range))
+
+    def calculate(self, bin_width=None, n_bins=None):
+        """
+        Performs the radial profile calculation of all the frames. The selected pixels of each
+        chunk of frames are reduced into their bins by a single sparse matrix product, the number
+        of frames of a chunk being given by the memory budget.
+        Results are arrays of shape (number of frames, number of bins) in 'mean', 'std', 'sem'
+        and 'count', with the radius of each bin in 'radius'
+
+        :param bin_width: Optional. Width of the radial bins, default is one bin per distinct radius.
+        :type bin_width: int or float
+        :param n_bins: Optional. Number of radial bins up to the largest radius.
+        :type n_bins: int
+        """
+        if len(self.param_list) == 0:
+            raise ValueError("No parameters to calculate, use 'add_params' first.")
+        if bin_width is not None or n_bins is not None:
+            _r_max = max([get_max_radius(self.frame_shape, each_param_dict) for each_param_dict in self.param_list])
+            self.bin_edges = make_bin_edges(_r_max, bin_width=bin_width, n_bins=n_bins)
+        else:
+            self.bin_edges = None
+        _geometry_list = [self.geometry_cache.get(shape=self.frame_shape, bin_edges=self.bin_edges, mask=self.mask,
+                                                  **each_param_dict)
+                          for each_param_dict in self.param_list]
+
+        # geometries of distinct radii are merged on the union of their radii
+        _radius = np.unique(np.concatenate([_geometry.bin_radius for _geometry in _geometry_list]))
+        _operator_list = []
+        for _geometry in _geometry_list:
+            _bin_map = np.searchsorted(_radius, _geometry.bin_radius)
+            _operator = _geometry.make_operator(bin_map=_bin_map, n_bins=len(_radius), dtype=self.dtype)
+            _operator_list.append((_geometry.window, _operator))
+
+        _window_size = max([int(np.prod([_slice.stop - _slice.start for _slice in _window]))
+                            for _window, _ in _operator_list])
+        _frames_per_chunk = get_frames_per_chunk(_window_size, self.memory_budget, itemsize=self.dtype.itemsize,
+                                                 data_itemsize=self.data.dtype.itemsize)
+        if self.frames_per_chunk is not None:
+            _frames_per_chunk = min(_frames_per_chunk, self.frames_per_chunk)
+
+        _accumulator = BinAccumulator(len(_radius), n_frames=self.n_frames)
+        for _start in range(0, self.n_frames, _frames_per_chunk):
+            _frames = slice(_start, min(_start + _frames_per_chunk, self.n_frames))
+            for _window, _operator in _operator_list:
+                _add_frames(_accumulator, _frames, self.data[(_frames,) + _window], _operator)
+
+        _occupied = _accumulator.count.any(axis=0)
+        mean, std, sem = _accumulator.statistics()
+        self.radius = _radius[_occupied]
+        self.mean = mean[:, _occupied]
+        self.std = std[:, _occupied]
+        self.sem = sem[:, _occupied]
+        self.count = _accumulator.count[:, _occupied]
+
+
+def get_frames_per_chunk(frame_size, memory_budget, itemsize=8, data_itemsize=8):
+    """
+    Number of frames reduced at once so that the working arrays of a chunk fit in the memory budget
+
+    :param frame_size: number of pixels of the window of a frame
+    :type frame_size: int
+    :param memory_budget: memory, in bytes, the reduction of a chunk can use
+    :type memory_budget: int
+    :param itemsize: size in bytes of one value of the reduction dtype
+    :type itemsize: int
+    :param data_itemsize: size in bytes of one data value, read before the conversion
+    :type data_itemsize: int
+    :return: number of frames, at least 1
+    :rtype: int
+    """
+    _frame_bytes = max(frame_size * (STACK_VALUES_PER_PIXEL * itemsize + data_itemsize + 1), 1)
+    return max(int(memory_budget // _frame_bytes), 1)
+
+
+def _add_frames(accumulator, frames, window_data, operator):
+    '''merge the bin statistics of the windows of a chunk of frames into the accumulator'''
+    _values = np.array(window_data, dtype=operator.dtype).reshape(window_data.shape[0], -1)
+    _nan_indices = np.isnan(_values)
+    _has_nan = _nan_indices.any()
+    if _has_nan:
+        _values[_nan_indices] = 0
+        _valid = np.invert(_nan_indices).astype(operator.dtype)
+        _count = np.rint(operator.T.dot(_valid.T).T).astype(np.int64)
+    else:
+        _count = np.broadcast_to(np.rint(np.asarray(operator.sum(axis=0))).astype(np.int64),
+                                 (_values.shape[0], operator.shape[1]))
+    _sum = operator.T.dot(_values.T).T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        _mean = np.where(_count > 0, _sum / _count, 0)
+    # deviation of each pixel to the mean of its bin, second product for a numerically stable M2
+    _deviation = _values - operator.dot(_mean.T.astype(operator.dtype)).T
+    if _has_nan:
+        _deviation *= _valid
+    _m2 = operator.T.dot((_deviation * _deviation).T).T
+    accumulator.combine(_count, _mean, _m2, index=frames)
@@ -10,11 +10,20 @@ setup(
     packages=find_packages(exclude=['tests', 'notebooks']),
     include_package_data=True,
     test_suite='tests',
+    python_requires='>=3.8',
     install_requires=[
         'numpy',
         'pandas',
         'scikit-image',
+        'scipy',
     ],
+    entry_points={
+        'console_scripts': ['sectorized-radial-profile = sectorizedradialprofile.cli:main'],
+    },
+    extras_require={
+        'numba': ['numba'],
+        'dask': ['dask[array]'],
+    },
     dependency_links=[
     ],
     description="Radial profile of a given sector of an 2D array",
@@ -24,8 +33,9 @@ setup(
     classifiers=['Development Status :: 3 - Alpha',
                  'Topic :: Scientific/Engineering :: Physics',
                  'Intended Audience :: Developers',
-                 'Programming Language :: Python :: 3.6',
-                 'Programming Language :: Python :: 3.7',
+                 'Programming Language :: Python :: 3.8',
+                 'Programming Language :: Python :: 3.9',
+                 'Programming Language :: Python :: 3.10',
                  ],
 )
 
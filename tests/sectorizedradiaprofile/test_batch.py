@@ -0,0 +1,66 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.batch import calculate_objects_profiles, get_memmap_args
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.volume = np.random.RandomState(0).rand(30, 25, 20)
+        self.objects = {'obj_1': [(10, 10, 10), 5],
+                        'obj_2': [(15, 20, 20), 4.5],
+                        'obj_3': [(5, 5, 25), 3]}
+
+    def _assert_profiles(self, profiles, bin_width=None):
+        assert list(profiles.keys()) == list(self.objects.keys())
+        for _name, (_center, _radius) in self.objects.items():
+            o_calculate = CalculateRadialProfile(data=self.volume)
+            o_calculate.add_params(center=_center, radius=_radius)
+            o_calculate.calculate(bin_width=bin_width)
+            pd.testing.assert_frame_equal(profiles[_name], o_calculate.radial_profile)
+
+    def test_serial_objects_profiles(self):
+        '''assert each object profile matches its own calculation'''
+        self._assert_profiles(calculate_objects_profiles(self.volume, self.objects, n_workers=1))
+
+    def test_parallel_objects_profiles(self):
+        '''assert the profiles computed by the process pool from shared memory'''
+        self._assert_profiles(calculate_objects_profiles(self.volume, self.objects, bin_width=1, n_workers=2),
+                              bin_width=1)
+
+    def test_memmap_objects_profiles(self):
+        '''assert the workers re-open a memory mapped volume'''
+        with tempfile.TemporaryDirectory() as _folder:
+            _file_path = os.path.join(_folder, 'volume.dat')
+            memmap = np.memmap(_file_path, dtype=np.float64, mode='w+', shape=self.volume.shape)
+            memmap[:] = self.volume
+            memmap.flush()
+            self._assert_profiles(calculate_objects_profiles(memmap, self.objects, n_workers=2))
+            del memmap
+
+    def test_sliced_memmap_objects_profiles(self):
+        '''assert a slice of a memory mapped volume is shared instead of re-opened from its parent offset'''
+        with tempfile.TemporaryDirectory() as _folder:
+            _file_path = os.path.join(_folder, 'volume.dat')
+            memmap = np.memmap(_file_path, dtype=np.float64, mode='w+', shape=(35,) + self.volume.shape[1:])
+            memmap[5:] = self.volume
+            memmap.flush()
+            assert get_memmap_args(memmap) is not None
+            assert get_memmap_args(memmap[5:]) is None
+            assert get_memmap_args(memmap[5:, ::2]) is None
+            self._assert_profiles(calculate_objects_profiles(memmap[5:], self.objects, n_workers=2))
+            del memmap
+
+    def test_label_analysis_dataframe(self):
+        '''assert an Amira-Avizo label analysis DataFrame is accepted'''
+        df_amira = pd.DataFrame({'EqDiameter': [10, 9, 6],
+                                 'BaryCenterX': [10, 15, 5],
+                                 'BaryCenterY': [10, 20, 5],
+                                 'BaryCenterZ': [10, 20, 25],
+                                 'index': [1, 2, 3]})
+        self._assert_profiles(calculate_objects_profiles(self.volume, df_amira, n_workers=1))
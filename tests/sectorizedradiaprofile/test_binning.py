@@ -0,0 +1,110 @@
+import unittest
+import pytest
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.binning import BinAccumulator, make_bin_edges, radius_to_bin_index, \
+    accumulate_sorted, merge_accumulators
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+
+
+class TestClass(unittest.TestCase):
+
+    def test_make_bin_edges(self):
+        '''assert the bin edges are built from either the bin width or the number of bins'''
+        assert (make_bin_edges(10, bin_width=2.5) == [0, 2.5, 5, 7.5, 10]).all()
+        assert (make_bin_edges(10.1, bin_width=2.5) == [0, 2.5, 5, 7.5, 10, 12.5]).all()
+        assert (make_bin_edges(10, n_bins=4) == [0, 2.5, 5, 7.5, 10]).all()
+        self.assertRaises(ValueError, make_bin_edges, 10)
+        self.assertRaises(ValueError, make_bin_edges, 10, 1, 10)
+        self.assertRaises(ValueError, make_bin_edges, 10, -1)
+        self.assertRaises(ValueError, make_bin_edges, 10, None, 2.5)
+
+    def test_radius_to_bin_index(self):
+        '''assert the last bin includes its right edge'''
+        bin_edges = make_bin_edges(10, bin_width=2.5)
+        bin_index = radius_to_bin_index(np.array([0, 2.4, 2.5, 9.9, 10]), bin_edges)
+        assert (bin_index == [0, 0, 1, 3, 3]).all()
+
+    def test_accumulator_matches_pandas(self):
+        '''assert mean, std and sem match the pandas groupby aggregation'''
+        rng = np.random.RandomState(0)
+        bin_index = rng.randint(0, 5, size=200)
+        bin_index[bin_index == 3] = 2  # leaves bin 3 empty
+        bin_index[0] = 4
+        bin_index[1:] = np.where(bin_index[1:] == 4, 0, bin_index[1:])  # bin 4 has a single value
+        values = rng.normal(10, 2, size=200)
+        accumulator = BinAccumulator(5)
+        accumulator.add(bin_index[:100], values[:100])
+        accumulator.add(bin_index[100:], values[100:])
+        profile = accumulator.to_dataframe(np.arange(5))
+
+        df = pd.DataFrame({'radius': bin_index, 'value': values})
+        expected = df.groupby('radius').agg({'value': ['mean', 'std', 'sem']})['value']
+        assert list(profile.index) == [0, 1, 2, 4]
+        for _column in ['mean', 'std', 'sem']:
+            np.testing.assert_allclose(profile[_column], expected[_column])
+
+    def test_merged_accumulators(self):
+        '''assert merging partial accumulators gives the statistics of all the values'''
+        rng = np.random.RandomState(1)
+        bin_index = rng.randint(0, 4, size=300)
+        values = 1e9 + rng.normal(0, 1, size=300)  # large offset, where sums of squares lose the variance
+        full_accumulator = BinAccumulator(4)
+        full_accumulator.add(bin_index, values)
+        merged_accumulator = BinAccumulator(4)
+        for _start in [200, 0, 100]:
+            _accumulator = BinAccumulator(4)
+            _accumulator.add(bin_index[_start: _start + 100], values[_start: _start + 100])
+            merged_accumulator.merge(_accumulator)
+        for _merged, _full in zip(merged_accumulator.statistics(), full_accumulator.statistics()):
+            np.testing.assert_allclose(_merged, _full)
+        expected_std = [np.std(values[bin_index == _bin], ddof=1) for _bin in range(4)]
+        np.testing.assert_allclose(full_accumulator.statistics()[1], expected_std, rtol=1e-6)
+
+    def test_accumulate_sorted_and_merge(self):
+        '''assert sorted radii are grouped per distinct radius and merged on the union of the radii'''
+        radius, accumulator = accumulate_sorted(np.array([0, 1, 1, 2.5]), np.array([1, 2, 4, 8]))
+        assert list(radius) == [0, 1, 2.5]
+        assert list(accumulator.mean) == [1, 3, 8]
+        other_radius, other_accumulator = accumulate_sorted(np.array([1, 3]), np.array([6, 5]))
+        merged_radius, merged_accumulator = merge_accumulators([radius, other_radius],
+                                                               [accumulator, other_accumulator])
+        assert list(merged_radius) == [0, 1, 2.5, 3]
+        assert list(merged_accumulator.count) == [1, 3, 1, 1]
+        assert list(merged_accumulator.mean) == [1, 4, 8, 5]
+        assert merged_accumulator.statistics()[1][1] == pytest.approx(2)
+
+    def test_binned_profile(self):
+        '''assert the binned engine groups the pixels by radial bins'''
+        data = np.ones((11, 11))
+        data[5, 7] = 10
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.add_params(center=(5, 5), radius=4)
+        o_calculate.calculate(bin_width=1)
+        radial_profile = o_calculate.radial_profile
+        assert list(radial_profile.index) == [0.5, 1.5, 2.5, 3.5]
+        assert radial_profile['mean'][0.5] == 1
+        # ring [2, 3[ holds 16 pixels (r = 2, sqrt(5), sqrt(8))
+        assert radial_profile['mean'][2.5] == pytest.approx((15 + 10) / 16)
+
+    def test_binned_profile_with_n_bins(self):
+        '''assert one bin covering all radii gives the mean of the selected pixels'''
+        data = np.arange(100, dtype=float).reshape(10, 10)
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.add_params(center=(5, 5), angle_range=(0, 90))
+        o_calculate.calculate(n_bins=1)
+        o_reference = CalculateRadialProfile(data=data)
+        o_reference.add_params(center=(5, 5), angle_range=(0, 90))
+        o_reference.calculate()
+        assert o_calculate.radial_profile['mean'].iloc[0] == pytest.approx(np.mean(o_reference.data_sorted_by_radius))
+        self.assertRaises(ValueError, o_calculate.calculate, 1, 1)
+
+    def test_binned_profile_ignores_nan(self):
+        '''assert NaN pixels are not part of the binned profile'''
+        data = np.ones((10, 10))
+        data[5, 6] = np.nan
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.add_params(center=(5, 5))
+        o_calculate.calculate(bin_width=2)
+        assert (o_calculate.radial_profile['mean'] == 1).all()
@@ -1,10 +1,12 @@
 import unittest
 import pytest
 import numpy as np
+import pandas as pd
 import os
 from skimage import io
 
-from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.binning import accumulate_sorted
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile, get_bounding_window
 
 
 class TestClass(unittest.TestCase):
@@ -86,7 +88,7 @@ class TestClass(unittest.TestCase):
         [height, width] = np.shape(data)
         [y0, x0] = [int(height / 2), int(width / 2)]
         center = (x0, y0)
-        angle_range = (0, 90)
+        angle_range = (270, 360)
         o_calculate = CalculateRadialProfile(data=data)
         o_calculate.add_params(center=center, angle_range=angle_range)
 
@@ -115,7 +117,7 @@ class TestClass(unittest.TestCase):
         [height, width] = np.shape(data)
         [y0, x0] = [int(height / 2), int(width / 2)]
         center = (x0, y0)
-        angle_range = (0, 90)
+        angle_range = (180, 360)
         o_calculate = CalculateRadialProfile(data=data)
         o_calculate.add_params(center=center, angle_range=angle_range)
         o_calculate.calculate()
@@ -123,7 +125,7 @@ class TestClass(unittest.TestCase):
 
         assert array_angle_deg[0, 0] == 315
         assert array_angle_deg[y0, x0] == 180
-        assert array_angle_deg[np.int(height / 2), 0] == 270
+        assert array_angle_deg[int(height / 2), 0] == 270
         self.assertAlmostEqual(array_angle_deg[height - 1, 0], 231.3, delta=0.1)
 
     def test_new_working_data(self):
@@ -141,7 +143,8 @@ class TestClass(unittest.TestCase):
         real_working_data[:] = np.nan
         real_working_data[0:6, 5:, ] = 1
         real_working_data[y0, x0] = np.nan
-        assert (working_data[0:5, 6:, ] == real_working_data[0:5, 6:, ]).all()
+        assert o_calculate.window == (slice(0, 6), slice(5, 10))  # top right quadrant
+        assert (working_data[0:5, 1:, ] == real_working_data[0:5, 6:, ]).all()
 
     def test_sort_indices_of_radius(self):
         '''assert the array of radius indices is correctly sorted'''
@@ -155,8 +158,8 @@ class TestClass(unittest.TestCase):
         o_calculate.calculate()
         sorted_radius_indices = o_calculate.sorted_radius_indices
 
-        assert 55 == sorted_radius_indices[0]
-        assert 0 == sorted_radius_indices[-1]
+        assert 25 == sorted_radius_indices[0]  # center, at the bottom left of the 6x5 window
+        assert 4 == sorted_radius_indices[-1]
 
     def test_sort_radius(self):
         '''assert the array of radius is correctly sorted'''
@@ -247,3 +250,137 @@ class TestClass(unittest.TestCase):
         mean_counts_expected = [501.144, 501.581, 502.065]
         for _expected, _returned in zip(mean_counts_expected, mean_counts_returned):
             assert _returned == pytest.approx(_expected, abs=1e-2)
+
+    def test_wrap_around_angle_range(self):
+        '''assert a sector crossing 0 degree matches the two sectors it is made of'''
+        data = np.random.RandomState(0).rand(50, 40)
+        center = (20, 25)
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.add_params(center=center, angle_range=(350, 10))
+        o_calculate.calculate()
+        o_reference = CalculateRadialProfile(data=data)
+        o_reference.add_params(center=center, angle_range=(350, 360))
+        o_reference.add_params(center=center, angle_range=(0, 10))
+        o_reference.calculate()
+        pd.testing.assert_frame_equal(o_calculate.radial_profile, o_reference.radial_profile)
+        _reference_data = np.concatenate([o_reference.get_sorted_radial_array(_param_dict)[1]
+                                          for _param_dict in o_reference.param_list])
+        assert sorted(o_calculate.data_sorted_by_radius) == sorted(_reference_data)
+        bad_angle_range = (350, 370)
+        self.assertRaises(ValueError, o_calculate.add_params, center, None, bad_angle_range)
+
+    def test_bounding_window(self):
+        '''assert the window bounds the radius and the sector of the parameters'''
+        assert get_bounding_window((10, 10), (5, 5)) == (slice(0, 10), slice(0, 10))
+        assert get_bounding_window((10, 10), (5, 5), radius=2) == (slice(3, 8), slice(3, 8))
+        assert get_bounding_window((10, 10), (5, 5), radius=2.5) == (slice(2, 9), slice(2, 9))
+        assert get_bounding_window((10, 10), (1, 8), radius=3) == (slice(5, 10), slice(0, 5))
+        assert get_bounding_window((10, 10), (5, 5), angle_range=(90, 180)) == (slice(5, 10), slice(5, 10))
+        assert get_bounding_window((10, 10), (5, 5), angle_range=(350, 10)) == (slice(0, 6), slice(3, 8))
+        assert get_bounding_window((5, 10, 10), (5, 5, 0), radius=2) == (slice(0, 3), slice(3, 8), slice(3, 8))
+        assert get_bounding_window((10, 10), (20, 20), radius=2) == (slice(10, 10), slice(10, 10))
+
+    def test_window_does_not_change_profile(self):
+        '''assert the profile over the window matches the one over the full frame'''
+        data = np.random.RandomState(1).rand(60, 50)
+        for _center, _radius, _angle_range in [((20, 30), 12.5, None),
+                                                ((20, 30), 12.5, (30, 200)),
+                                                ((20, 30), None, (300, 45)),
+                                                ((49, 0), 20, (170, 280))]:
+            o_calculate = CalculateRadialProfile(data=data)
+            o_calculate.add_params(center=_center, radius=_radius, angle_range=_angle_range)
+            o_calculate.calculate()
+            y_index, x_index = np.indices(data.shape)
+            radius_array = np.sqrt((x_index - _center[0]) ** 2 + (y_index - _center[1]) ** 2)
+            keep = np.ones(data.shape, dtype=bool)
+            if _radius is not None:
+                keep &= radius_array <= _radius
+            if _angle_range is not None:
+                angle = np.mod(180 - np.degrees(np.arctan2(x_index - _center[0], y_index - _center[1])), 360)
+                if _angle_range[0] <= _angle_range[1]:
+                    keep &= (angle >= _angle_range[0]) & (angle <= _angle_range[1])
+                else:
+                    keep &= (angle >= _angle_range[0]) | (angle <= _angle_range[1])
+            assert sorted(o_calculate.data_sorted_by_radius) == sorted(data[keep])
+
+    def test_coordinates_are_open_grids(self):
+        '''assert no full size index array is created at initialization'''
+        data = np.ones((4, 20, 10))
+        o_calculate = CalculateRadialProfile(data=data)
+        assert o_calculate.z_index.shape == (4, 1, 1)
+        assert o_calculate.y_index.shape == (1, 20, 1)
+        assert o_calculate.x_index.shape == (1, 1, 10)
+        o_calculate.add_params(center=(5, 10, 2), radius=3)
+        o_calculate.calculate()
+        z_index, y_index, x_index = np.indices(data.shape)
+        radius_array = np.sqrt((x_index - 5) ** 2 + (y_index - 10) ** 2 + (z_index - 2) ** 2)
+        assert (o_calculate.radius_array == radius_array[o_calculate.window]).all()
+
+    def test_selection_keeps_data_dtype(self):
+        '''assert the selected data are gathered in their original dtype and NaN pixels are left out'''
+        data = np.arange(100, dtype=np.uint16).reshape(10, 10)
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.add_params(center=(5, 5), radius=3)
+        o_calculate.calculate()
+        assert o_calculate.data_sorted_by_radius.dtype == np.uint16
+        assert o_calculate.radial_profile['mean'][0] == 55
+
+        float_data = np.array(data, dtype=np.float32)
+        float_data[5, 6] = np.nan
+        o_calculate = CalculateRadialProfile(data=float_data)
+        o_calculate.add_params(center=(5, 5), radius=3)
+        o_calculate.calculate()
+        assert not np.isnan(o_calculate.data_sorted_by_radius).any()
+        assert len(o_calculate.data_sorted_by_radius) == np.sum(o_calculate.radius_array <= 3) - 1
+        assert o_calculate.radial_profile['mean'][1] == np.mean([45, 54, 65])
+
+    def test_integer_radius_matches_sorted_radius(self):
+        '''assert the radii of centers on the pixel grid, or half way, are grouped as by sorting'''
+        data = np.random.RandomState(3).rand(30, 40)
+        data[12, 21] = np.nan
+        for center, radius, angle_range in [((20, 15), 7.5, None), ((20.5, 15), np.sqrt(50), (300, 100)),
+                                            ((19.5, 14.5), None, (10, 200)), ((0, 29), 12, None)]:
+            o_calculate = CalculateRadialProfile(data=data)
+            o_calculate.add_params(center=center, radius=radius, angle_range=angle_range)
+            radius_array, accumulator = o_calculate.accumulate_integer_radius(o_calculate.param_list[0])
+            sorted_radius, sorted_data = o_calculate.get_sorted_radial_array(o_calculate.param_list[0])
+            expected_radius, expected_accumulator = accumulate_sorted(sorted_radius, sorted_data)
+            np.testing.assert_array_equal(radius_array, expected_radius)
+            np.testing.assert_array_equal(accumulator.count, expected_accumulator.count)
+            np.testing.assert_allclose(accumulator.mean, expected_accumulator.mean)
+
+    def test_integer_radius_intermediates(self):
+        '''assert the intermediate arrays skipped by the integer radius path are computed when inspected'''
+        data = np.random.RandomState(4).rand(20, 20)
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.add_params(center=(10, 10), radius=5)
+        o_calculate.calculate()
+        assert 'sorted_radius' not in o_calculate.__dict__
+        np.testing.assert_array_equal(np.unique(o_calculate.sorted_radius), o_calculate.radial_profile.index)
+        assert len(o_calculate.data_sorted_by_radius) == 81
+        self.assertRaises(AttributeError, getattr, o_calculate, 'array_angle_deg')
+        self.assertRaises(AttributeError, getattr, o_calculate, 'not_an_attribute')
+
+    def test_sector_profiles(self):
+        '''assert each sector of the single pass matches its own profile'''
+        data = np.random.RandomState(2).rand(40, 50)
+        center = (22, 18)
+        sector_edges = [0, 45, 90, 200, 360]
+        o_calculate = CalculateRadialProfile(data=data)
+        o_calculate.calculate_sectors(center=center, sector_edges=sector_edges, radius=15, bin_width=2)
+        assert o_calculate.sector_mean.shape == (4, 8)
+        for _sector in range(4):
+            o_reference = CalculateRadialProfile(data=data)
+            # sectors exclude their end edge, except the last one, while 'angle_range' includes both
+            _stop = sector_edges[_sector + 1] - (1e-9 if _sector < 3 else 0)
+            o_reference.add_params(center=center, radius=15, angle_range=(sector_edges[_sector], _stop))
+            o_reference.calculate(bin_width=2)
+            np.testing.assert_allclose(o_calculate.sector_mean[_sector], o_reference.radial_profile['mean'])
+            np.testing.assert_allclose(o_calculate.sector_std[_sector], o_reference.radial_profile['std'])
+        assert o_calculate.sector_count.sum() == np.sum(
+            (np.indices(data.shape)[0] - 18) ** 2 + (np.indices(data.shape)[1] - 22) ** 2 <= 15 ** 2)
+
+        o_calculate.calculate_sectors(center=center, sector_edges=range(0, 361, 10))
+        assert o_calculate.sector_mean.shape == (36, len(o_calculate.sector_radius))
+        self.assertRaises(ValueError, o_calculate.calculate_sectors, center, [0, 90, 45])
+        self.assertRaises(ValueError, o_calculate.calculate_sectors, center, [0, 400])
@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.chunked import get_chunks, get_chunk_windows, calculate_chunked, dask
+from sectorizedradialprofile.instrumentation import ProfileStats
+
+
+class ChunkedArray(object):
+    '''array read chunk by chunk, with the regular chunk shape of zarr arrays and HDF5 datasets'''
+
+    def __init__(self, data, chunks):
+        self.data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+        self.chunks = chunks
+        self.read_windows = []
+
+    def __getitem__(self, window):
+        self.read_windows.append(window)
+        return np.array(self.data[window])
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(0).rand(12, 30, 40)
+        self.data[5, 10, 20] = np.nan
+
+    def test_chunk_windows(self):
+        '''assert the chunks of regular and dask like chunk shapes cover the data once'''
+        chunks = get_chunks(ChunkedArray(self.data, (5, 16, 40)))
+        assert chunks == ((5, 5, 2), (16, 14), (40,))
+        window_list = get_chunk_windows(chunks)
+        assert len(window_list) == 6
+        assert window_list[1] == (slice(0, 5), slice(16, 30), slice(0, 40))
+        covered = np.zeros(self.data.shape, dtype=int)
+        for _window in window_list:
+            covered[_window] += 1
+        assert (covered == 1).all()
+        assert get_chunks(self.data) is None
+        self.assertRaises(ValueError, calculate_chunked, self.data, [])
+
+    def test_chunked_profile(self):
+        '''assert the profile of chunked data matches the in-memory profile and only needed chunks are read'''
+        mask = np.zeros(self.data.shape, dtype=bool)
+        mask[:, 15, :] = True
+        for kwargs in [{}, {'bin_width': 2}, {'n_workers': 3}]:
+            chunked_data = ChunkedArray(self.data, (4, 7, 9))
+            o_chunked = CalculateRadialProfile(data=chunked_data, mask=mask)
+            o_reference = CalculateRadialProfile(data=self.data, mask=mask)
+            for o_calculate in [o_chunked, o_reference]:
+                o_calculate.add_params(center=(20, 15, 6), radius=6)
+                o_calculate.add_params(center=(10.5, 8, 3), radius=4)
+                o_calculate.calculate(**kwargs)
+            np.testing.assert_array_equal(o_chunked.radial_profile.index, o_reference.radial_profile.index)
+            np.testing.assert_allclose(o_chunked.radial_profile['mean'], o_reference.radial_profile['mean'])
+            np.testing.assert_allclose(o_chunked.radial_profile['std'], o_reference.radial_profile['std'])
+            assert len(chunked_data.read_windows) < len(get_chunk_windows(get_chunks(chunked_data)))
+
+    def test_chunk_stages(self):
+        '''assert the stages of each chunk read are recorded with the index of their parameter set'''
+        stats = ProfileStats()
+        chunked_data = ChunkedArray(self.data, (4, 15, 20))
+        o_calculate = CalculateRadialProfile(data=chunked_data, stats=stats)
+        o_calculate.add_params(center=(20, 15, 6), radius=3)
+        o_calculate.add_params(center=(5, 5, 1), radius=2)
+        o_calculate.calculate(bin_width=1, n_workers=2)
+        df = stats.to_dataframe()
+        assert list(df['stage'][-1:]) == ['profile']
+        df_geometry = df[df['stage'] == 'geometry']
+        assert len(df_geometry) == 2 * len(chunked_data.read_windows)
+        _z, _y, _x = np.indices(self.data.shape)
+        _n_pixels = [np.sum((_x - 20) ** 2 + (_y - 15) ** 2 + (_z - 6) ** 2 <= 9),
+                     np.sum((_x - 5) ** 2 + (_y - 5) ** 2 + (_z - 1) ** 2 <= 4)]
+        assert list(df_geometry.groupby('param_index')['n_pixels'].sum()) == _n_pixels
+        assert set(df[df['stage'] == 'accumulate']['param_index']) == {0, 1}
+
+    @unittest.skipIf(dask is None, 'dask is not installed')
+    def test_dask_profile(self):
+        '''assert the profile of a dask array matches the in-memory profile'''
+        import dask.array
+        dask_data = dask.array.from_array(self.data, chunks=(5, 10, 15))
+        o_chunked = CalculateRadialProfile(data=dask_data)
+        o_reference = CalculateRadialProfile(data=self.data)
+        for o_calculate in [o_chunked, o_reference]:
+            o_calculate.add_params(center=(20, 15, 6))
+            o_calculate.calculate(bin_width=1.5, scheduler='threads')
+        np.testing.assert_allclose(o_chunked.radial_profile['mean'], o_reference.radial_profile['mean'])
+        np.testing.assert_array_equal(o_chunked.bin_accumulator.count, o_reference.bin_accumulator.count)
@@ -0,0 +1,113 @@
+import unittest
+import os
+import json
+import tempfile
+import numpy as np
+from PIL import Image
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.cli import main, load_manifest, make_tasks, run_batch
+from sectorizedradialprofile.export import read_npz
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        rng = np.random.RandomState(0)
+        self.frames = []
+        os.makedirs(os.path.join(self.folder.name, 'run'))
+        for _index in range(3):
+            _frame = rng.randint(0, 2 ** 12, size=(20, 30)).astype(np.uint16)
+            Image.fromarray(_frame).save(os.path.join(self.folder.name, 'run', 'frame_{}.tif'.format(_index)))
+            self.frames.append(_frame)
+        self.manifest_path = os.path.join(self.folder.name, 'manifest.json')
+        with open(self.manifest_path, 'w') as _file:
+            json.dump({'output_dir': 'profiles',
+                       'defaults': {'bin_width': 1},
+                       'entries': [{'name': 'quarter', 'files': 'run/*.tif', 'center': [15, 10],
+                                    'angle_range': [0, 90]},
+                                   {'files': ['run/frame_0.tif'], 'center': [15, 10], 'radius': 8,
+                                    'sector_edges': [0, 180, 360]}]}, _file)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_tasks(self):
+        '''assert one task is made per file of each entry'''
+        task_list = make_tasks(load_manifest(self.manifest_path))
+        assert len(task_list) == 4
+        assert task_list[0]['output'] == os.path.join(self.folder.name, 'profiles', 'quarter', 'frame_0.npz')
+        assert task_list[3]['output'] == os.path.join(self.folder.name, 'profiles', 'entry_001', 'frame_0.npz')
+        assert task_list[0]['param_list'] == [{'center': (15, 10), 'radius': None, 'angle_range': (0, 90)}]
+
+    def test_batch_resumes(self):
+        '''assert the profiles are written and a batch run again only processes the missing outputs'''
+        assert main([self.manifest_path, '-n', '2']) == 0
+        _output_path = os.path.join(self.folder.name, 'profiles', 'quarter', 'frame_2.npz')
+        kind, arrays, metadata = read_npz(_output_path)
+        o_calculate = CalculateRadialProfile(data=self.frames[2])
+        o_calculate.add_params(center=(15, 10), angle_range=(0, 90))
+        o_calculate.calculate(bin_width=1)
+        np.testing.assert_array_equal(arrays['mean'], o_calculate.radial_profile['mean'])
+        assert metadata['input'].endswith('frame_2.tif')
+        assert read_npz(os.path.join(self.folder.name, 'profiles', 'entry_001', 'frame_0.npz'))[0] == 'sectors'
+
+        manifest = load_manifest(self.manifest_path)
+        assert run_batch(manifest, n_workers=1) == (0, 4, {})
+        os.remove(_output_path)
+        assert run_batch(manifest, n_workers=1) == (1, 3, {})
+        assert run_batch(manifest, n_workers=1, restart=True) == (4, 0, {})
+
+    def test_mask(self):
+        '''assert the non zero pixels of the mask image of an entry are left out'''
+        mask = np.zeros((20, 30), dtype=np.uint8)
+        mask[8:12, :] = 1
+        Image.fromarray(mask).save(os.path.join(self.folder.name, 'mask.tif'))
+        manifest = {'base_dir': self.folder.name, 'output_dir': 'masked',
+                    'entries': [{'files': 'run/frame_1.tif', 'center': [15, 10], 'radius': 8, 'mask': 'mask.tif'}]}
+        assert run_batch(manifest, n_workers=1) == (1, 0, {})
+        kind, arrays, metadata = read_npz(os.path.join(self.folder.name, 'masked', 'entry_000', 'frame_1.npz'))
+        o_calculate = CalculateRadialProfile(data=self.frames[1], mask=mask > 0)
+        o_calculate.add_params(center=(15, 10), radius=8)
+        o_calculate.calculate()
+        np.testing.assert_array_equal(arrays['mean'], o_calculate.radial_profile['mean'])
+        _in_radius = (np.indices(mask.shape)[0] - 10) ** 2 + (np.indices(mask.shape)[1] - 15) ** 2 <= 64
+        assert arrays['count'].sum() == np.sum(_in_radius & (mask == 0))
+
+    def test_failed_tasks(self):
+        '''assert an unreadable file is reported without stopping the other tasks, and is processed again'''
+        _broken_path = os.path.join(self.folder.name, 'run', 'frame_1.tif')
+        with open(_broken_path, 'w') as _file:
+            _file.write('not an image')
+        manifest = load_manifest(self.manifest_path)
+        for _n_workers in [1, 2]:
+            n_processed, n_skipped, failures = run_batch(manifest, n_workers=_n_workers, restart=True)
+            assert (n_processed, n_skipped) == (3, 0)
+            assert list(failures) == [_broken_path]
+            assert os.path.exists(os.path.join(self.folder.name, 'profiles', 'quarter', 'frame_2.npz'))
+            assert not os.path.exists(os.path.join(self.folder.name, 'profiles', 'quarter', 'frame_1.npz'))
+        assert run_batch(manifest, n_workers=1)[:2] == (0, 3)
+        assert main([self.manifest_path, '-n', '2']) == 1
+
+    def test_same_file_names(self):
+        '''assert the files of the same name in different folders keep their folders in the outputs'''
+        for _run in ['run_a', 'run_b']:
+            os.makedirs(os.path.join(self.folder.name, _run))
+            Image.fromarray(self.frames[0 if _run == 'run_a' else 1]).save(
+                os.path.join(self.folder.name, _run, 'f.tif'))
+        manifest = {'base_dir': self.folder.name, 'output_dir': 'profiles',
+                    'entries': [{'name': 'runs', 'files': 'run_*/f.tif', 'center': [15, 10], 'radius': 8}]}
+        task_list = make_tasks(manifest)
+        assert [_task['output'] for _task in task_list] == \
+            [os.path.join(self.folder.name, 'profiles', 'runs', _run, 'f.npz') for _run in ['run_a', 'run_b']]
+        assert run_batch(manifest, n_workers=1) == (2, 0, {})
+        for _index, _run in enumerate(['run_a', 'run_b']):
+            kind, arrays, metadata = read_npz(os.path.join(self.folder.name, 'profiles', 'runs', _run, 'f.npz'))
+            assert metadata['input'] == os.path.join(self.folder.name, _run, 'f.tif')
+            o_calculate = CalculateRadialProfile(data=self.frames[_index])
+            o_calculate.add_params(center=(15, 10), radius=8)
+            o_calculate.calculate()
+            np.testing.assert_array_equal(arrays['mean'], o_calculate.radial_profile['mean'])
+        manifest['entries'][0]['files'] = ['run_a/f.tif', 'run_b/f.tif']
+        self.assertRaises(ValueError, make_tasks, manifest)
@@ -0,0 +1,80 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.stack_profile import CalculateStackRadialProfile
+from sectorizedradialprofile.export import export_npz, read_npz, export_csv, export_hdf5, h5py
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.data = np.random.RandomState(0).rand(20, 25)
+        self.o_calculate = CalculateRadialProfile(data=self.data)
+        self.o_calculate.add_params(center=(10, 12), radius=6)
+        self.o_calculate.add_params(center=(10, 12), angle_range=(0, 90))
+        self.o_calculate.calculate(bin_width=0.5)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_profile_npz(self):
+        '''assert a profile is written and read back with its parameters and metadata'''
+        _file_path = os.path.join(self.folder.name, 'profile.npz')
+        export_npz(self.o_calculate, _file_path, metadata={'file': 'frame_001.fits'})
+        kind, arrays, metadata = read_npz(_file_path)
+        assert kind == 'profile'
+        assert metadata == {'file': 'frame_001.fits'}
+        np.testing.assert_array_equal(arrays['radius'], self.o_calculate.radial_profile.index)
+        np.testing.assert_array_equal(arrays['std'], self.o_calculate.radial_profile['std'])
+        np.testing.assert_array_equal(arrays['bin_edges'], self.o_calculate.bin_edges)
+        np.testing.assert_array_equal(arrays['param_center'], [[10, 12], [10, 12]])
+        np.testing.assert_array_equal(arrays['param_radius'], [6, np.nan])
+        np.testing.assert_array_equal(arrays['param_angle_range'], [[np.nan, np.nan], [0, 90]])
+
+    def test_sectors_and_stack(self):
+        '''assert sectors and stack profiles are exported as 2D arrays'''
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.calculate_sectors(center=(10, 12), sector_edges=[0, 90, 360], bin_width=1)
+        _file_path = os.path.join(self.folder.name, 'sectors.npz')
+        export_npz(o_calculate, _file_path, compressed=True)
+        kind, arrays, metadata = read_npz(_file_path)
+        assert kind == 'sectors'
+        assert arrays['mean'].shape == (2, len(o_calculate.sector_radius))
+        np.testing.assert_array_equal(arrays['count'], o_calculate.sector_count)
+        np.testing.assert_array_equal(arrays['sector_edges'], [0, 90, 360])
+
+        o_stack = CalculateStackRadialProfile(data=np.array([self.data, 2 * self.data, 3 * self.data]))
+        o_stack.add_params(center=(10, 12), radius=5)
+        o_stack.calculate()
+        _file_path = os.path.join(self.folder.name, 'stack.csv')
+        export_csv(o_stack, _file_path, metadata={'run': 12})
+        df = pd.read_csv(_file_path, comment='#', float_precision='round_trip')
+        assert list(df.columns) == ['frame', 'radius', 'mean', 'std', 'sem', 'count']
+        assert len(df) == 3 * len(o_stack.radius)
+        np.testing.assert_array_equal(df['mean'].values.reshape(3, -1), o_stack.mean)
+        np.testing.assert_array_equal(df['count'].values.reshape(3, -1), o_stack.count)
+        with open(_file_path) as _file:
+            assert _file.readline() == '# kind: stack\n'
+
+    def test_profile_csv(self):
+        '''assert the CSV values keep all their digits'''
+        _file_path = os.path.join(self.folder.name, 'profile.csv')
+        export_csv(self.o_calculate, _file_path)
+        df = pd.read_csv(_file_path, comment='#', float_precision='round_trip', index_col='radius')
+        np.testing.assert_array_equal(df['mean'], self.o_calculate.radial_profile['mean'])
+        np.testing.assert_array_equal(df['sem'], self.o_calculate.radial_profile['sem'])
+        self.assertRaises(ValueError, export_csv, self.o_calculate, _file_path, None, 'sectors')
+
+    @unittest.skipIf(h5py is None, 'h5py is not installed')
+    def test_hdf5(self):
+        '''assert the results are written to a HDF5 group with their metadata'''
+        _file_path = os.path.join(self.folder.name, 'profiles.h5')
+        export_hdf5(self.o_calculate, _file_path, metadata={'file': 'frame_001.fits'}, group='frame_001')
+        with h5py.File(_file_path, 'r') as _file:
+            assert _file['frame_001'].attrs['kind'] == 'profile'
+            np.testing.assert_array_equal(_file['frame_001/mean'][()], self.o_calculate.radial_profile['mean'])
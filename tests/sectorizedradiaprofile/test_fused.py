@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.binning import make_bin_edges
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.fused import fused_accumulate, NUMBA_AVAILABLE
+from sectorizedradialprofile.geometry import SectorGeometry, get_bounding_window
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(2).rand(30, 25)
+        self.data[12, 9] = np.nan
+
+    def test_fused_matches_geometry(self):
+        '''assert the fused loops select and bin the same pixels as the compiled geometry'''
+        bin_edges = make_bin_edges(12, bin_width=1.5)
+        for _angle_range in [None, (30, 200), (300, 45)]:
+            _window = get_bounding_window(self.data.shape, (10, 14), 12, _angle_range)
+            geometry = SectorGeometry(self.data.shape, center=(10, 14), radius=12, angle_range=_angle_range,
+                                      bin_edges=bin_edges)
+            expected = geometry.accumulate(self.data)
+            for _n_blocks in [1, 4]:
+                accumulator = fused_accumulate(self.data, _window, center=(10, 14), radius=12,
+                                               angle_range=_angle_range, bin_edges=bin_edges, n_blocks=_n_blocks)
+                np.testing.assert_array_equal(accumulator.count, expected.count)
+                np.testing.assert_allclose(accumulator.mean, expected.mean)
+                np.testing.assert_allclose(accumulator.m2, expected.m2)
+
+    @unittest.skipIf(not NUMBA_AVAILABLE, 'numba is not installed')
+    def test_numba_engine_profile(self):
+        '''assert both engines give the same profile with the compiled kernels, in 2D and 3D'''
+        volume = np.random.RandomState(3).rand(8, 9, 10)
+        for _data, _center in [(self.data, (10, 14)), (volume, (4, 5, 3))]:
+            _profiles = []
+            for _engine in ['numpy', 'numba']:
+                o_calculate = CalculateRadialProfile(data=_data)
+                o_calculate.add_params(center=_center)
+                o_calculate.add_params(center=_center, radius=3)
+                o_calculate.calculate(bin_width=0.5, engine=_engine)
+                _profiles.append(o_calculate.radial_profile)
+            pd.testing.assert_frame_equal(_profiles[0], _profiles[1])
+        self.assertRaises(ValueError, o_calculate.calculate, 1, None, None, 'cuda')
+
+    @unittest.skipIf(NUMBA_AVAILABLE, 'numba is installed')
+    def test_numba_engine_needs_numba(self):
+        '''assert the numba engine is not run as plain python without numba'''
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.add_params(center=(10, 14))
+        self.assertRaises(ImportError, o_calculate.calculate, 1, None, None, 'numba')
+        o_calculate.calculate(bin_width=1)
+        assert o_calculate.bin_edges is not None
+
+    def test_engine_needs_binning(self):
+        '''assert an engine is only accepted by the binned calculation and checked before any calculation'''
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.add_params(center=(10, 14))
+        for _engine in ['numpy', 'numba']:
+            self.assertRaises(ValueError, o_calculate.calculate, engine=_engine)
+        self.assertRaises(ValueError, o_calculate.calculate, engine='bogus')
+        self.assertRaises(ValueError, o_calculate.calculate, 1, None, 1000, 'bogus')
@@ -0,0 +1,151 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+
+from sectorizedradialprofile.binning import make_bin_edges
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.fused import NUMBA_AVAILABLE
+from sectorizedradialprofile.geometry import SectorGeometry, GeometryCache, DetectorMask
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(0).rand(40, 30)
+
+    def test_exact_geometry_matches_profile(self):
+        '''assert the exact geometry selects the same pixels and radii as the profile calculation'''
+        center = (12, 20)
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.add_params(center=center, radius=10, angle_range=(300, 100))
+        o_calculate.calculate()
+        geometry = SectorGeometry(self.data.shape, center=center, radius=10, angle_range=(300, 100))
+        bin_index, values = geometry.gather(self.data)
+        assert sorted(values) == sorted(o_calculate.data_sorted_by_radius)
+        np.testing.assert_array_equal(geometry.bin_radius, np.unique(o_calculate.sorted_radius))
+        np.testing.assert_allclose(geometry.accumulate(self.data).statistics()[0],
+                                   o_calculate.radial_profile['mean'])
+
+    def test_geometry_leaves_out_nan(self):
+        '''assert NaN pixels are left out when gathering'''
+        data = np.array(self.data)
+        data[20, 13] = np.nan
+        geometry = SectorGeometry(data.shape, center=(12, 20), radius=3)
+        bin_index, values = geometry.gather(data)
+        assert len(values) == len(geometry.pixel_indices) - 1
+        assert len(bin_index) == len(values)
+        self.assertRaises(ValueError, geometry.gather, data[1:])
+        self.assertRaises(ValueError, SectorGeometry, (10, 10, 10), (5, 5, 5), None, (0, 90))
+
+    def test_gather_non_contiguous_data(self):
+        '''assert gathering from a non contiguous array matches gathering from a contiguous one'''
+        geometry = SectorGeometry(self.data.shape, center=(12, 20), radius=10, angle_range=(10, 100))
+        fortran_data = np.asfortranarray(self.data)
+        np.testing.assert_array_equal(geometry.gather(fortran_data)[1], geometry.gather(self.data)[1])
+        assert geometry.gather(self.data.astype(np.uint16))[1].dtype == np.uint16
+
+    def test_save_and_load(self):
+        '''assert a saved geometry is loaded back identical'''
+        bin_edges = make_bin_edges(10, bin_width=0.5)
+        geometry = SectorGeometry(self.data.shape, center=(12, 20), radius=10, angle_range=(10, 100),
+                                  bin_edges=bin_edges)
+        with tempfile.TemporaryDirectory() as _folder:
+            _file_path = os.path.join(_folder, 'geometry.npz')
+            geometry.save(_file_path)
+            loaded_geometry = SectorGeometry.load(_file_path)
+        assert loaded_geometry.key == geometry.key
+        assert loaded_geometry.window == geometry.window
+        np.testing.assert_array_equal(loaded_geometry.pixel_indices, geometry.pixel_indices)
+        np.testing.assert_array_equal(loaded_geometry.bin_index, geometry.bin_index)
+        np.testing.assert_array_equal(loaded_geometry.accumulate(self.data).sum, geometry.accumulate(self.data).sum)
+
+    def test_lru_eviction(self):
+        '''assert the least recently used geometry is evicted first'''
+        cache = GeometryCache(max_size=2)
+        first = cache.get(self.data.shape, center=(1, 1))
+        second = cache.get(self.data.shape, center=(2, 2))
+        assert cache.get(self.data.shape, center=(1.0, 1.0)) is first
+        cache.get(self.data.shape, center=(3, 3))
+        assert len(cache) == 2
+        assert first.key in cache
+        assert second.key not in cache
+        self.assertRaises(ValueError, GeometryCache, 0)
+
+    def test_eviction_by_size(self):
+        '''assert the geometries are evicted when their memory exceeds the limit, a larger one is not kept'''
+        _nbytes = GeometryCache().get(self.data.shape, center=(1, 1)).nbytes
+        cache = GeometryCache(max_bytes=2 * _nbytes)
+        first = cache.get(self.data.shape, center=(1, 1))
+        second = cache.get(self.data.shape, center=(2, 2), radius=3)
+        assert cache.nbytes == first.nbytes + second.nbytes
+        cache.get(self.data.shape, center=(3, 3))
+        assert first.key not in cache
+        assert second.key in cache
+        assert cache.nbytes <= 2 * _nbytes
+        small_cache = GeometryCache(max_bytes=_nbytes - 1)
+        geometry = small_cache.get(self.data.shape, center=(1, 1))
+        assert len(geometry.pixel_indices) == self.data.size
+        assert len(small_cache) == 0
+
+    def test_cache_dir(self):
+        '''assert the geometries are reloaded from the cache folder'''
+        with tempfile.TemporaryDirectory() as _folder:
+            cache = GeometryCache(cache_dir=_folder)
+            geometry = cache.get(self.data.shape, center=(5, 5), radius=4)
+            assert len(os.listdir(_folder)) == 1
+            other_cache = GeometryCache(cache_dir=_folder)
+            loaded_geometry = other_cache.get(self.data.shape, center=(5, 5), radius=4)
+            assert loaded_geometry is not geometry
+            np.testing.assert_array_equal(loaded_geometry.pixel_indices, geometry.pixel_indices)
+
+    def test_binned_profile_uses_cache(self):
+        '''assert the binned engine compiles each geometry once'''
+        cache = GeometryCache()
+        for _ in range(2):
+            o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=cache)
+            o_calculate.add_params(center=(12, 20), radius=10)
+            o_calculate.add_params(center=(12, 20), radius=10, angle_range=(0, 45))
+            o_calculate.calculate(bin_width=1)
+        assert len(cache) == 2
+
+    def test_mask_is_part_of_the_key(self):
+        '''assert masked geometries leave out the masked pixels and are cached apart'''
+        mask = DetectorMask.from_pixels(self.data.shape, [(12, 20), (13, 21), (0, 0)])
+        assert len(mask) == 3
+        cache = GeometryCache()
+        geometry = cache.get(self.data.shape, center=(12, 20), radius=3)
+        masked_geometry = cache.get(self.data.shape, center=(12, 20), radius=3, mask=mask)
+        assert len(cache) == 2
+        assert len(masked_geometry.pixel_indices) == len(geometry.pixel_indices) - 2
+        assert cache.get(self.data.shape, center=(12, 20), radius=3, mask=np.array(mask.mask)) is masked_geometry
+        self.assertRaises(ValueError, cache.get, (10, 10), (5, 5), None, None, None, None, mask)
+        with tempfile.TemporaryDirectory() as _folder:
+            _file_path = os.path.join(_folder, 'geometry.npz')
+            masked_geometry.save(_file_path)
+            assert SectorGeometry.load(_file_path, mask=mask).key == masked_geometry.key
+            self.assertRaises(ValueError, SectorGeometry.load, _file_path)
+
+    def test_mask_matches_nan(self):
+        '''assert masking pixels gives the profiles of the data with these pixels set to NaN'''
+        mask = np.zeros(self.data.shape, dtype=bool)
+        mask[18:23, :] = True  # chip gap
+        mask[5, 7] = True
+        nan_data = np.array(self.data)
+        nan_data[mask] = np.nan
+        case_list = [((12, 20), {}), ((12.3, 20), {}), ((12, 20), {'bin_width': 2}),
+                     ((12.3, 20), {'memory_budget': 2000})]
+        if NUMBA_AVAILABLE:
+            case_list.append(((12, 20), {'bin_width': 2, 'engine': 'numba'}))
+        for center, kwargs in case_list:
+            o_masked = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache(), mask=mask)
+            o_reference = CalculateRadialProfile(data=nan_data, geometry_cache=GeometryCache())
+            for o_calculate in [o_masked, o_reference]:
+                o_calculate.add_params(center=center, radius=12, angle_range=(300, 100))
+                o_calculate.calculate(**kwargs)
+            np.testing.assert_array_equal(o_masked.radial_profile.index, o_reference.radial_profile.index)
+            np.testing.assert_allclose(o_masked.radial_profile['mean'], o_reference.radial_profile['mean'])
+            _masked_count = o_masked.bin_accumulator.count
+            _reference_count = o_reference.bin_accumulator.count
+            np.testing.assert_array_equal(_masked_count[_masked_count > 0], _reference_count[_reference_count > 0])
+        self.assertRaises(ValueError, CalculateRadialProfile, self.data, None, None, mask[1:])
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.geometry import GeometryCache
+from sectorizedradialprofile.instrumentation import ProfileStats
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(0).rand(30, 40)
+
+    def test_exact_stages(self):
+        '''assert each stage of each parameter set is recorded and sent to the callback'''
+        received = []
+        stats = ProfileStats(callback=received.append)
+        o_calculate = CalculateRadialProfile(data=self.data, stats=stats)
+        o_calculate.add_params(center=(20, 15), radius=5)
+        o_calculate.add_params(center=(20, 15), angle_range=(0, 90))
+        o_calculate.calculate()
+        df = stats.to_dataframe()
+        assert list(df['stage']) == ['radius', 'selection', 'gather', 'accumulate',
+                                     'radius', 'angle', 'selection', 'gather', 'accumulate',
+                                     'merge', 'profile']
+        assert list(df['param_index'][:5]) == [0] * 4 + [1]
+        assert received == stats.records
+        assert (df['wall_time'] >= 0).all()
+        assert df['n_pixels'][0] == 11 * 11
+        assert df['n_pixels'][2] == 81  # pixels within a radius of 5
+        assert df['n_pixels'][8] == len(o_calculate.data_sorted_by_radius)
+        assert df['allocated_bytes'].isnull().all()
+
+    def test_sorted_stages(self):
+        '''assert the pixels are sorted by radius for a center off the pixel grid'''
+        stats = ProfileStats()
+        o_calculate = CalculateRadialProfile(data=self.data, stats=stats)
+        o_calculate.add_params(center=(20.3, 15), radius=5)
+        o_calculate.calculate()
+        df = stats.to_dataframe()
+        assert list(df['stage']) == ['radius', 'selection', 'sort', 'gather', 'accumulate', 'merge', 'profile']
+        assert df['n_pixels'][4] == len(o_calculate.data_sorted_by_radius)
+
+    def test_binned_stages_memory(self):
+        '''assert the binned stages are recorded with the memory they allocate'''
+        stats = ProfileStats(trace_memory=True)
+        o_calculate = CalculateRadialProfile(data=self.data, geometry_cache=GeometryCache(), stats=stats)
+        o_calculate.add_params(center=(20, 15))
+        o_calculate.calculate(bin_width=1, engine='numpy')
+        summary = stats.summary()
+        assert list(summary.index) == ['geometry', 'accumulate', 'profile']
+        assert summary['n_pixels']['geometry'] == self.data.size
+        assert summary['allocated_bytes']['geometry'] > self.data.nbytes  # radius array of the window
+        stats.clear()
+        assert len(stats) == 0
+
+    def test_slab_stages(self):
+        '''assert the stages of each slab are recorded with the index of its parameter set by every thread'''
+        stats = ProfileStats()
+        o_calculate = CalculateRadialProfile(data=self.data, stats=stats)
+        o_calculate.add_params(center=(20, 15), radius=5)
+        o_calculate.add_params(center=(20, 15), angle_range=(0, 90))
+        o_calculate.calculate(bin_width=1, memory_budget=3 * 20 * 41, n_workers=2)
+        df = stats.to_dataframe()
+        assert list(df['stage'][-2:]) == ['merge', 'profile']
+        df_slabs = df[:-2]
+        assert set(df_slabs['stage']) == {'geometry', 'accumulate'}
+        assert sorted(df_slabs['param_index'].unique()) == [0, 1]
+        _geometry_pixels = df_slabs[df_slabs['stage'] == 'geometry'].groupby('param_index')['n_pixels'].sum()
+        assert _geometry_pixels[0] == 81  # pixels within a radius of 5, over the slabs
+        # 3 rows of 20 pixels per slab, the 11 rows of the first window and the 16 rows of the second one
+        assert list(df_slabs[df_slabs['stage'] == 'accumulate'].groupby('param_index').size()) == [3, 6]
+
+    def test_no_stats(self):
+        '''assert nothing is recorded without stats'''
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.add_params(center=(20, 15))
+        o_calculate.calculate()
+        assert o_calculate.stats is None
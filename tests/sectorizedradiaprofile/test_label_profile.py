@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.label_profile import calculate_label_profiles
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.data = rng.rand(20, 24, 28)
+        _z, _y, _x = np.ogrid[:20, :24, :28]
+        self.labels = np.zeros(self.data.shape, dtype=np.uint16)
+        self.labels[(_x - 8) ** 2 + (_y - 9) ** 2 + (_z - 10) ** 2 <= 36] = 3
+        self.labels[(_x - 20) ** 2 + (_y - 14) ** 2 + (_z - 7) ** 2 <= 25] = 7
+        self.labels[15:, 20:, 25:] = 9  # not in the label analysis
+        self.df_amira = pd.DataFrame({'index': [3, 7],
+                                      'BaryCenterX': [8, 20.5],
+                                      'BaryCenterY': [9, 14],
+                                      'BaryCenterZ': [10, 7],
+                                      'EqDiameter': [12, 10]})
+
+    def _reference_profile(self, label, center, bin_width):
+        _data = np.where(self.labels == label, self.data, np.nan)
+        o_calculate = CalculateRadialProfile(data=_data)
+        o_calculate.add_params(center=center)
+        o_calculate.calculate(bin_width=bin_width)
+        return o_calculate.radial_profile
+
+    def test_objects_of_label_volume(self):
+        '''assert each object profile is made of its own voxels, whatever the slabs'''
+        for _memory_budget in [2 ** 28, 2000]:
+            profile_dict = calculate_label_profiles(self.data, self.labels, self.df_amira, bin_width=1.5,
+                                                    memory_budget=_memory_budget)
+            assert list(profile_dict) == ['obj_3', 'obj_7']
+            for _label, _center in [(3, (8, 9, 10)), (7, (20.5, 14, 7))]:
+                _expected = self._reference_profile(_label, _center, 1.5)
+                _profile = profile_dict['obj_' + str(_label)]
+                np.testing.assert_allclose(_profile.index, _expected.index)
+                np.testing.assert_allclose(_profile['mean'], _expected['mean'])
+                np.testing.assert_allclose(_profile['std'], _expected['std'])
+
+    def test_label_image(self):
+        '''assert 2D label images are profiled from a dictionary of centers'''
+        image = self.data[10]
+        labels = self.labels[10]
+        profile_dict = calculate_label_profiles(image, labels, {3: (8, 9)}, bin_width=1)
+        _data = np.where(labels == 3, image, np.nan)
+        o_calculate = CalculateRadialProfile(data=_data)
+        o_calculate.add_params(center=(8, 9))
+        o_calculate.calculate(bin_width=1)
+        np.testing.assert_allclose(profile_dict['obj_3']['mean'], o_calculate.radial_profile['mean'])
+        self.assertRaises(ValueError, calculate_label_profiles, image, labels[1:], {3: (8, 9)})
+        self.assertRaises(ValueError, calculate_label_profiles, image, labels, {3: (8, 9, 1)})
@@ -0,0 +1,76 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+
+from sectorizedradialprofile.loader import FitsImage, load_frame, load_stack, iter_frames
+
+
+def write_fits(file_path, data, bzero=None):
+    '''minimal FITS writer of a primary image'''
+    _bitpix = {np.dtype('>i2'): 16, np.dtype('>i4'): 32, np.dtype('>f4'): -32, np.dtype('>f8'): -64}[data.dtype]
+    _cards = ['SIMPLE  = {:>20}'.format('T'),
+              'BITPIX  = {:>20}'.format(_bitpix),
+              'NAXIS   = {:>20}'.format(data.ndim)]
+    _cards += ['NAXIS{:<3}= {:>20}'.format(_axis + 1, _len) for _axis, _len in enumerate(data.shape[::-1])]
+    if bzero is not None:
+        _cards += ['BSCALE  = {:>20}'.format(1), 'BZERO   = {:>20} / offset'.format(bzero)]
+    _cards += ["COMMENT   'frame'", 'END']
+    _header = ''.join([_card.ljust(80) for _card in _cards])
+    _header = _header.ljust(-(-len(_header) // 2880) * 2880)
+    _data = data.tobytes()
+    with open(file_path, 'wb') as _file:
+        _file.write(_header.encode('ascii'))
+        _file.write(_data + b'\0' * (-len(_data) % 2880))
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        rng = np.random.RandomState(0)
+        self.frames = [rng.randint(0, 2 ** 16, size=(6, 5)).astype(np.uint16) for _ in range(7)]
+        self.list_files = []
+        for _index, _frame in enumerate(self.frames):
+            _file_path = os.path.join(self.folder.name, 'frame_{:03}.fits'.format(_index))
+            write_fits(_file_path, (_frame.astype(np.int32) - 32768).astype('>i2'), bzero=32768)
+            self.list_files.append(_file_path)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_fits_image(self):
+        '''assert the FITS data are memory mapped and unsigned integers restored from their offset'''
+        fits_image = FitsImage(self.list_files[0])
+        assert fits_image.shape == (6, 5)
+        assert fits_image.dtype == np.uint16
+        assert isinstance(fits_image.memmap(), np.memmap)
+        np.testing.assert_array_equal(load_frame(self.list_files[0]), self.frames[0])
+        _file_path = os.path.join(self.folder.name, 'float.fits')
+        write_fits(_file_path, np.arange(12, dtype='>f4').reshape(3, 4))
+        assert load_frame(_file_path).dtype == np.float32
+        np.testing.assert_array_equal(load_frame(_file_path), np.arange(12).reshape(3, 4))
+        self.assertRaises(ValueError, FitsImage, __file__)
+
+    def test_load_stack(self):
+        '''assert the frames are loaded in order into a single stack, whatever the number of threads'''
+        for _n_workers in [1, 3]:
+            stack = load_stack(self.list_files, n_workers=_n_workers)
+            assert stack.shape == (7, 6, 5)
+            np.testing.assert_array_equal(stack, np.array(self.frames))
+        stack = load_stack(self.list_files, dtype=np.float32)
+        assert stack.dtype == np.float32
+        np.testing.assert_array_equal(stack, np.array(self.frames))
+
+    def test_tiff_and_iter_frames(self):
+        '''assert TIFF frames are loaded and frames are yielded lazily in order'''
+        from PIL import Image
+        _file_path = os.path.join(self.folder.name, 'frame.tif')
+        Image.fromarray(self.frames[0]).save(_file_path)
+        np.testing.assert_array_equal(load_frame(_file_path), self.frames[0])
+        frames = iter_frames(self.list_files + [_file_path], read_ahead=2)
+        np.testing.assert_array_equal(next(frames), self.frames[0])
+        _frames = list(frames)
+        assert len(_frames) == 7
+        np.testing.assert_array_equal(_frames[-1], self.frames[0])
+        np.testing.assert_array_equal(_frames[3], self.frames[4])
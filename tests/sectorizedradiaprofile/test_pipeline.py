@@ -0,0 +1,79 @@
+import unittest
+import os
+import tempfile
+import threading
+import numpy as np
+from PIL import Image
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.export import read_npz
+from sectorizedradialprofile.pipeline import WatchPipeline
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.folder.name, 'frames')
+        self.output_dir = os.path.join(self.folder.name, 'profiles')
+        os.makedirs(self.input_dir)
+        rng = np.random.RandomState(0)
+        self.frames = [rng.randint(0, 2 ** 12, size=(20, 30)).astype(np.uint16) for _ in range(4)]
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _save_frame(self, index):
+        '''frame written under another name then renamed, as it would be complete when found'''
+        _file_path = os.path.join(self.input_dir, 'frame_{}.tif'.format(index))
+        Image.fromarray(self.frames[index]).save(_file_path + '.tmp', format='TIFF')
+        os.replace(_file_path + '.tmp', _file_path)
+
+    def test_profiles_of_arriving_frames(self):
+        '''assert the frames in the folder and the ones arriving are profiled with their timings'''
+        for _index in range(2):
+            self._save_frame(_index)
+        received = []
+        pipeline = WatchPipeline(self.input_dir, self.output_dir, pattern='*.tif', poll_interval=0.01,
+                                 queue_size=1, callback=received.append)
+        pipeline.add_params(center=(15, 10), radius=8)
+        pipeline.add_params(center=(15, 10), angle_range=(0, 90))
+        _writer = threading.Timer(0.1, lambda: [self._save_frame(_index) for _index in [2, 3]])
+        _writer.start()
+        metrics = pipeline.run(max_files=4, idle_timeout=5)
+        _writer.join()
+        assert len(metrics) == 4
+        assert received == metrics.records
+        for _index in range(4):
+            kind, arrays, metadata = read_npz(os.path.join(self.output_dir, 'frame_{}.npz'.format(_index)))
+            o_calculate = CalculateRadialProfile(data=self.frames[_index])
+            o_calculate.add_params(center=(15, 10), radius=8)
+            o_calculate.add_params(center=(15, 10), angle_range=(0, 90))
+            o_calculate.calculate()
+            np.testing.assert_array_equal(arrays['radius'], o_calculate.radial_profile.index)
+            np.testing.assert_allclose(arrays['mean'], o_calculate.radial_profile['mean'])
+        df = metrics.to_dataframe()
+        assert df['error'].isnull().all()
+        assert (df['latency'] >= df['read_time'] + df['compute_time'] + df['write_time']).all()
+        summary = metrics.summary()
+        assert list(summary.index) == ['read', 'compute', 'write', 'pipeline']
+        assert (summary['count'] == 4).all()
+        assert len(pipeline.geometry_cache) == 2
+
+    def test_errors_and_restart(self):
+        '''assert a file which can not be read is reported and the profiled files are not processed again'''
+        self._save_frame(0)
+        with open(os.path.join(self.input_dir, 'frame_9.tif'), 'w') as _file:
+            _file.write('not an image')
+        pipeline = WatchPipeline(self.input_dir, self.output_dir, pattern='*.tif', bin_width=2, poll_interval=0.01)
+        pipeline.add_params(center=(15, 10))
+        metrics = pipeline.run(idle_timeout=0.1)
+        df = metrics.to_dataframe().set_index('file')
+        assert df['error'][os.path.join(self.input_dir, 'frame_9.tif')].startswith('read')
+        assert np.isnan(df['latency'][os.path.join(self.input_dir, 'frame_9.tif')])
+        assert os.path.exists(os.path.join(self.output_dir, 'frame_0.npz'))
+
+        other_pipeline = WatchPipeline(self.input_dir, self.output_dir, pattern='*.tif', poll_interval=0.01)
+        other_pipeline.add_params(center=(15, 10))
+        assert len(other_pipeline.run(idle_timeout=0.1)) == 1  # only the broken file again
+        self.assertRaises(ValueError, WatchPipeline, self.input_dir, self.output_dir, file_format='xls')
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.polar import PolarTransform
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(3).rand(40, 50)
+        self.center = (22, 18)
+
+    def test_polar_image(self):
+        '''assert the polar image has one cell per angle and radius'''
+        o_polar = PolarTransform(self.data.shape, center=self.center, radius=10, bin_width=2, angle_step=10)
+        polar_image = o_polar.transform(self.data)
+        assert polar_image.image.shape == (36, 5)
+        assert polar_image.count.sum() == np.sum(
+            (np.indices(self.data.shape)[0] - 18) ** 2 + (np.indices(self.data.shape)[1] - 22) ** 2 <= 100)
+        self.assertRaises(ValueError, PolarTransform, self.data.shape, self.center, None, 1, 7)
+        self.assertRaises(ValueError, PolarTransform, (2, 3, 4), (1, 1, 1))
+
+    def test_full_profile(self):
+        '''assert the profile over all the angles matches the binned profile'''
+        o_polar = PolarTransform(self.data.shape, center=self.center, bin_width=1.5, angle_step=5)
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.add_params(center=self.center)
+        o_calculate.calculate(bin_width=1.5)
+        pd.testing.assert_frame_equal(o_polar.transform(self.data).sector_profile(), o_calculate.radial_profile)
+
+    def test_sector_profiles(self):
+        '''assert sector profiles reduced from the polar image match the sectors calculated directly'''
+        o_polar = PolarTransform(self.data.shape, center=self.center, radius=15, bin_width=1, angle_step=1)
+        polar_image = o_polar.transform(self.data)
+        o_calculate = CalculateRadialProfile(data=self.data)
+        o_calculate.calculate_sectors(center=self.center, sector_edges=[0, 30, 100, 340, 360], radius=15,
+                                      bin_width=1)
+        for _sector, _angle_range in enumerate([(0, 30), (30, 100)]):
+            sector_profile = polar_image.sector_profile(_angle_range)
+            _occupied = o_calculate.sector_count[_sector] > 0
+            np.testing.assert_allclose(sector_profile.index, o_calculate.sector_radius[_occupied])
+            np.testing.assert_allclose(sector_profile['mean'], o_calculate.sector_mean[_sector][_occupied])
+            np.testing.assert_allclose(sector_profile['std'], o_calculate.sector_std[_sector][_occupied])
+        # wrapping around 0
+        sector_profile = polar_image.sector_profile((340, 30))
+        o_reference = CalculateRadialProfile(data=self.data)
+        o_reference.add_params(center=self.center, radius=15, angle_range=(340, 30 - 1e-9))
+        o_reference.calculate(bin_width=1)
+        pd.testing.assert_frame_equal(sector_profile, o_reference.radial_profile)
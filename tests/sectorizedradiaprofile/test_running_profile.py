@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.geometry import GeometryCache
+from sectorizedradialprofile.running_profile import RunningProfile
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.frames = rng.randint(0, 2 ** 12, size=(6, 30, 40)).astype(np.uint16)
+
+    def _get_reference(self, data, **kwargs):
+        o_calculate = CalculateRadialProfile(data=data, geometry_cache=GeometryCache())
+        o_calculate.add_params(center=(20, 15), radius=10, angle_range=(300, 100))
+        o_calculate.calculate(**kwargs)
+        return o_calculate.radial_profile
+
+    def test_running_sum(self):
+        '''assert the running profile matches the profile of the summed frames while frames are added and removed'''
+        running_profile = RunningProfile(self.frames.shape[1:], center=(20, 15), radius=10, angle_range=(300, 100),
+                                         geometry_cache=GeometryCache())
+        for _index in range(3):
+            running_profile.add_frame(self.frames[_index])
+        assert len(running_profile) == 3
+        _reference = self._get_reference(self.frames[:3].sum(axis=0, dtype=np.float64))
+        profile = running_profile.get_profile()
+        np.testing.assert_array_equal(profile.index, _reference.index)
+        np.testing.assert_allclose(profile['mean'], _reference['mean'])
+        np.testing.assert_allclose(profile['std'], _reference['std'])
+
+        running_profile.remove_frame(self.frames[0])
+        _reference = self._get_reference(self.frames[1:3].mean(axis=0))
+        np.testing.assert_allclose(running_profile.get_profile(average=True)['mean'], _reference['mean'])
+        assert running_profile.pixel_sum.dtype == np.int64
+        running_profile.clear()
+        assert len(running_profile.get_profile()) == 0
+        self.assertRaises(ValueError, running_profile.remove_frame, self.frames[0])
+
+    def test_sliding_window(self):
+        '''assert a sliding window only sums the last frames, NaN pixels being left out while in the window'''
+        frames = self.frames.astype(np.float64)
+        frames[1, 15, 22] = np.nan
+        running_profile = RunningProfile(frames.shape[1:], center=(20, 15), radius=10, angle_range=(300, 100),
+                                         bin_width=2, window_size=2, geometry_cache=GeometryCache())
+        for _index in range(3):
+            running_profile.add_frame(frames[_index])
+        assert len(running_profile) == 2
+        assert running_profile.get_accumulator().count.sum() == len(running_profile.geometry.pixel_indices) - 1
+        _reference = self._get_reference(frames[1] + frames[2], bin_width=2)
+        np.testing.assert_allclose(running_profile.get_profile()['mean'], _reference['mean'])
+        running_profile.add_frame(frames[3])
+        assert running_profile.get_accumulator().count.sum() == len(running_profile.geometry.pixel_indices)
+        _reference = self._get_reference(frames[2] + frames[3], bin_width=2)
+        np.testing.assert_allclose(running_profile.get_profile()['mean'], _reference['mean'])
+        self.assertRaises(ValueError, running_profile.remove_frame, frames[3])
+        self.assertRaises(ValueError, RunningProfile, frames.shape[1:], (20, 15), None, None, None, None, 0)
+
+    def test_float_frame_after_integer_frames(self):
+        '''assert a float frame added to (or removed from) integer sums is not truncated'''
+        running_profile = RunningProfile(self.frames.shape[1:], center=(20, 15), radius=10, angle_range=(300, 100),
+                                         geometry_cache=GeometryCache())
+        running_profile.add_frame(self.frames[0])
+        assert running_profile.pixel_sum.dtype == np.int64
+        offset_frame = np.full(self.frames.shape[1:], 0.7)
+        running_profile.add_frame(offset_frame)
+        assert running_profile.pixel_sum.dtype == np.float64
+        _reference = self._get_reference(self.frames[0] + offset_frame)
+        np.testing.assert_allclose(running_profile.get_profile()['mean'], _reference['mean'])
+
+        other_profile = RunningProfile(self.frames.shape[1:], center=(20, 15), radius=10, angle_range=(300, 100),
+                                       geometry_cache=GeometryCache())
+        for _index in range(2):
+            other_profile.add_frame(self.frames[_index])
+        other_profile.remove_frame(offset_frame)
+        _reference = self._get_reference(self.frames[0] + self.frames[1] - offset_frame)
+        np.testing.assert_allclose(other_profile.get_profile()['mean'], _reference['mean'])
@@ -0,0 +1,92 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.slab import SlabReader, get_slab_windows, get_block_windows
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.volume = np.random.RandomState(0).rand(20, 15, 10)
+        self.volume[3, 7, 5] = np.nan
+
+    def test_get_slab_windows(self):
+        '''assert the slabs cover the window along its first axis within the budget'''
+        window = (slice(2, 12), slice(0, 10), slice(0, 10))
+        slab_windows = get_slab_windows(window, memory_budget=100 * 90)
+        assert [_slab[0] for _slab in slab_windows] == [slice(2, 4), slice(4, 6), slice(6, 8), slice(8, 10),
+                                                         slice(10, 12)]
+        assert slab_windows[0][1:] == window[1:]
+        assert len(get_slab_windows(window, memory_budget=1)) == 10
+
+    def test_get_block_windows(self):
+        '''assert the blocks of whole rows only depend on the window, giving the threads enough blocks'''
+        block_windows = get_block_windows((slice(0, 2048), slice(0, 2048)))
+        assert len(block_windows) == 16
+        assert block_windows[1] == (slice(128, 256), slice(0, 2048))
+        assert len(get_block_windows((slice(0, 10), slice(0, 10), slice(0, 10)), block_pixels=250)) == 5
+        assert len(get_block_windows((slice(0, 10), slice(0, 10), slice(0, 10)), block_pixels=1)) == 10
+
+    def test_memmap_slabs_match_in_memory_profile(self):
+        '''assert the profile of a memory mapped volume processed by slabs matches the in-memory one'''
+        with tempfile.TemporaryDirectory() as _folder:
+            _file_path = os.path.join(_folder, 'volume.dat')
+            memmap = np.memmap(_file_path, dtype=np.float64, mode='w+', shape=self.volume.shape)
+            memmap[:] = self.volume
+            memmap.flush()
+            memmap = np.memmap(_file_path, dtype=np.float64, mode='r', shape=self.volume.shape)
+            for _bin_width in [None, 1.5]:
+                o_reference = CalculateRadialProfile(data=self.volume)
+                o_reference.add_params(center=(5, 7, 4), radius=6)
+                o_reference.add_params(center=(2, 2, 15))
+                o_reference.calculate(bin_width=_bin_width)
+                o_calculate = CalculateRadialProfile(data=memmap)
+                o_calculate.add_params(center=(5, 7, 4), radius=6)
+                o_calculate.add_params(center=(2, 2, 15))
+                o_calculate.calculate(bin_width=_bin_width, memory_budget=5 * 150 * 50)
+                pd.testing.assert_frame_equal(o_calculate.radial_profile, o_reference.radial_profile,
+                                              check_names=False)
+            del memmap
+
+    def test_slab_reader(self):
+        '''assert data read through a callback are processed slab by slab'''
+        read_calls = []
+
+        def read_slab(start, stop):
+            read_calls.append((start, stop))
+            return self.volume[start:stop]
+
+        reader = SlabReader(self.volume.shape, read_slab)
+        o_calculate = CalculateRadialProfile(data=reader)
+        o_calculate.add_params(center=(5, 7, 10), radius=4)
+        o_calculate.calculate(bin_width=1, memory_budget=3 * 150 * 50)
+        o_reference = CalculateRadialProfile(data=self.volume)
+        o_reference.add_params(center=(5, 7, 10), radius=4)
+        o_reference.calculate(bin_width=1)
+        np.testing.assert_allclose(o_calculate.radial_profile['mean'], o_reference.radial_profile['mean'])
+        assert read_calls == [(6, 12), (12, 15)]  # 9x9 planes of 41 bytes per pixel, 6 planes per slab
+
+    def test_threads_are_deterministic(self):
+        '''assert the profile processed by blocks of rows does not depend on the number of threads'''
+        image = np.random.RandomState(1).rand(60, 40)
+        for _data, _center in [(image, (15, 30)), (self.volume, (5, 7, 4))]:
+            for _bin_width in [None, 0.5]:
+                o_reference = CalculateRadialProfile(data=_data)
+                o_reference.add_params(center=_center)
+                o_reference.calculate(bin_width=_bin_width)
+                for _memory_budget in [4 * 500, None]:
+                    _profiles = []
+                    for _n_workers in [1, 2, 5]:
+                        o_calculate = CalculateRadialProfile(data=_data)
+                        o_calculate.add_params(center=_center)
+                        o_calculate.calculate(bin_width=_bin_width, memory_budget=_memory_budget, n_workers=_n_workers)
+                        _profiles.append(o_calculate.radial_profile)
+                    pd.testing.assert_frame_equal(_profiles[0], o_reference.radial_profile, check_names=False)
+                    for _profile in _profiles[1:]:
+                        pd.testing.assert_frame_equal(_profile, _profiles[0], check_exact=True)
+        self.assertRaises(ValueError, o_calculate.calculate, None, None, None, None, 0)
+        self.assertRaises(ValueError, o_calculate.calculate, 1, None, None, 'numpy', 2)
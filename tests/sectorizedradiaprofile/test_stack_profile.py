@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+from sectorizedradialprofile.calculate_radial_profile import CalculateRadialProfile
+from sectorizedradialprofile.stack_profile import CalculateStackRadialProfile, get_frames_per_chunk
+
+
+class TestClass(unittest.TestCase):
+
+    def setUp(self):
+        self.stack = np.random.RandomState(0).rand(5, 30, 40)
+        self.stack[2, 10, 14] = np.nan
+
+    def test_initialization(self):
+        '''assert the stack axis is moved first and the frames dimension checked'''
+        o_stack = CalculateStackRadialProfile(data=np.moveaxis(self.stack, 0, 2), stack_axis=2)
+        assert o_stack.n_frames == 5
+        assert o_stack.frame_shape == (30, 40)
+        self.assertRaises(ValueError, CalculateStackRadialProfile, np.ones((2, 3)))
+        self.assertRaises(ValueError, o_stack.add_params, (1, 2, 3))
+        self.assertRaises(ValueError, o_stack.calculate)
+
+    def test_frames_per_chunk(self):
+        '''assert the chunks of frames are sized by the memory budget, whatever the size of the frames'''
+        assert get_frames_per_chunk(2048 * 2048, 2 ** 30, itemsize=8, data_itemsize=2) == 7
+        assert get_frames_per_chunk(2048 * 2048, 2 ** 30, itemsize=4, data_itemsize=2) == 13
+        assert get_frames_per_chunk(2048 * 2048, 1) == 1
+        o_reference = CalculateStackRadialProfile(data=self.stack)
+        for o_stack in [o_reference, CalculateStackRadialProfile(data=self.stack, memory_budget=2 * 1200 * 41)]:
+            o_stack.add_params(center=(12, 10), angle_range=(0, 90))
+            o_stack.calculate(bin_width=1)
+        np.testing.assert_array_equal(o_stack.count, o_reference.count)
+        np.testing.assert_allclose(o_stack.mean, o_reference.mean)
+        np.testing.assert_allclose(o_stack.std, o_reference.std)
+
+    def test_exact_stack_profile(self):
+        '''assert each frame profile matches the single frame calculation'''
+        o_stack = CalculateStackRadialProfile(data=self.stack, frames_per_chunk=2)
+        o_stack.add_params(center=(12, 10), radius=8, angle_range=(0, 90))
+        o_stack.add_params(center=(12, 10), radius=5, angle_range=(180, 200))
+        o_stack.calculate()
+        assert o_stack.mean.shape == (5, len(o_stack.radius))
+        for _frame in range(5):
+            o_calculate = CalculateRadialProfile(data=self.stack[_frame])
+            o_calculate.add_params(center=(12, 10), radius=8, angle_range=(0, 90))
+            o_calculate.add_params(center=(12, 10), radius=5, angle_range=(180, 200))
+            o_calculate.calculate()
+            radial_profile = o_calculate.radial_profile
+            np.testing.assert_allclose(o_stack.radius, radial_profile.index)
+            np.testing.assert_allclose(o_stack.mean[_frame], radial_profile['mean'])
+            np.testing.assert_allclose(o_stack.std[_frame], radial_profile['std'])
+            np.testing.assert_allclose(o_stack.sem[_frame], radial_profile['sem'])
+
+    def test_binned_stack_profile(self):
+        '''assert the binned stack profile matches the binned single frame calculation'''
+        stack = np.moveaxis(self.stack, 0, -1)
+        o_stack = CalculateStackRadialProfile(data=stack, stack_axis=-1)
+        o_stack.add_params(center=(20, 15))
+        o_stack.calculate(bin_width=2)
+        for _frame in range(5):
+            o_calculate = CalculateRadialProfile(data=self.stack[_frame])
+            o_calculate.add_params(center=(20, 15))
+            o_calculate.calculate(bin_width=2)
+            np.testing.assert_allclose(o_stack.mean[_frame], o_calculate.radial_profile['mean'])
+        assert np.isnan(self.stack[2, 10, 14])
+
+    def test_float32_reduction(self):
+        '''assert the float32 reduction is close to the float64 one'''
+        stack = (self.stack * 1000).astype(np.float32)
+        o_stack = CalculateStackRadialProfile(data=stack, dtype=np.float32)
+        o_stack.add_params(center=(20, 15))
+        o_stack.calculate(bin_width=1)
+        o_reference = CalculateStackRadialProfile(data=stack)
+        o_reference.add_params(center=(20, 15))
+        o_reference.calculate(bin_width=1)
+        np.testing.assert_allclose(o_stack.mean, o_reference.mean, rtol=1e-5)
+        np.testing.assert_array_equal(o_stack.count, o_reference.count)
+        self.assertRaises(ValueError, CalculateStackRadialProfile, stack, 0, 64, np.int32)